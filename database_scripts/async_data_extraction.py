@@ -0,0 +1,314 @@
+from database_scripts.file_handler import get_absolute_file_path
+from database_scripts.data_extraction import DataExtractor
+from database_scripts.currency_rate_extraction import CurrencyExtractor
+from concurrent.futures import Executor
+from typing import Callable
+import asyncio
+import functools
+import os
+import logging
+
+
+"""
+LOG CREATION
+"""
+log_filename = get_absolute_file_path(
+    "async_data_extraction.log", "logs"
+)  # "logs/async_data_extraction.log"
+if not os.path.exists(log_filename):
+    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
+
+async_data_extraction_logger = logging.getLogger(__name__)
+
+# Set the default level as DEBUG
+async_data_extraction_logger.setLevel(logging.DEBUG)
+
+# Format the logs by time, filename, function_name, level_name and the message
+format = logging.Formatter(
+    "%(asctime)s:%(filename)s:%(funcName)s:%(levelname)s:%(message)s"
+)
+file_handler = logging.FileHandler(log_filename)
+
+# Set the formatter to the variable format
+
+file_handler.setFormatter(format)
+
+async_data_extraction_logger.addHandler(file_handler)
+
+
+class AsyncDataExtractor:
+    '''
+    A class which extracts the network sources concurrently on an asyncio event loop,
+    so that the time taken is that of the slowest source rather than the sum of all of them.
+
+    The downloads and the parsing run in an executor, so the event loop is never blocked.
+    At most max_concurrency sources are extracted at the same time.
+    Each attempt is given timeout seconds, and failed attempts are retried with an increasing delay.
+    As its thread cannot be cancelled, a timed out attempt keeps its place for one more timeout, and its result is used if it finishes.
+    A thread which is still running after that is left to finish on its own, and the attempt fails.
+
+    main.py does not use this class, as its pipelines already extract the sources concurrently through
+    PipelineScheduler and DataExtractor.extract_with_cache(). It is for extracting the sources outside the pipelines.
+
+    Attributes
+
+    extractor: The DataExtractor used to download and parse the sources
+
+    max_concurrency: The maximum number of sources extracted at the same time
+
+    timeout: The number of seconds each attempt is given
+
+    retries: The maximum number of attempts for each source
+
+    retry_delay: The number of seconds waited before the first retry. This doubles for every retry
+
+    executor: The executor the extraction runs in. By default, this is the event loop's thread pool
+
+    Methods
+
+    read_s3_bucket_to_dataframe()
+    read_json_from_s3()
+    retrieve_pdf_data()
+    read_html_tables()
+    extract_all()
+    run()
+    '''
+    def __init__(
+        self,
+        extractor : DataExtractor = None,
+        max_concurrency : int = 4,
+        timeout : float = 300,
+        retries : int = 3,
+        retry_delay : float = 1.0,
+        executor : Executor = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer")
+        if retries < 1:
+            raise ValueError("retries must be a positive integer")
+        self.extractor = extractor or DataExtractor()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.executor = executor
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    async def read_s3_bucket_to_dataframe(self, s3_url : str):
+        '''
+        Method to read a .csv file from an s3_bucket into a Pandas Dataframe
+
+        Parameters:
+
+        s3_url : str
+
+        The url to the s3_bucket
+
+        Returns:
+
+        dataframe : pd.DataFrame
+        '''
+        return await self._run_with_retries(
+            s3_url, self.extractor.read_s3_bucket_to_dataframe, s3_url
+        )
+
+    async def read_json_from_s3(self, bucket_url : str):
+        '''
+        Method to read a .json file from an s3_bucket into a Pandas Dataframe
+
+        Parameters:
+
+        bucket_url : str
+
+        The link to the .json file
+
+        Returns:
+
+        dataframe : pd.DataFrame
+        '''
+        return await self._run_with_retries(
+            bucket_url, self.extractor.read_json_from_s3, bucket_url
+        )
+
+    async def retrieve_pdf_data(self, link_to_pdf : str, max_workers : int = 4):
+        '''
+        Method to read the tables in a pdf file into a Pandas Dataframe
+
+        Parameters:
+
+        link_to_pdf : str
+
+        The link to the pdf file
+
+        max_workers : int = 4
+
+        The maximum number of pages read at the same time
+
+        Returns:
+
+        dataframe : pd.DataFrame
+        '''
+        return await self._run_with_retries(
+            link_to_pdf, self.extractor.retrieve_pdf_data_in_parallel, link_to_pdf, max_workers
+        )
+
+    async def read_html_tables(self, currency_extractor : CurrencyExtractor, index_numbers : list):
+        '''
+        Method to read tables from the website of a CurrencyExtractor
+
+        Parameters:
+
+        currency_extractor : CurrencyExtractor
+
+        The CurrencyExtractor for the website
+
+        index_numbers : list
+
+        The indexes of the html tables to read
+
+        Returns:
+
+        html_tables : list
+
+        A list of Pandas Dataframes, one for each index number
+        '''
+        def read_tables():
+            html = currency_extractor.read_html_data()
+            return [
+                currency_extractor.html_to_dataframe(html, index_number)
+                for index_number in index_numbers
+            ]
+
+        return await self._run_with_retries(currency_extractor.url, read_tables)
+
+    async def extract_all(self, sources : dict):
+        '''
+        Method to extract several sources concurrently
+
+        Parameters:
+
+        sources : dict
+
+        A dictionary of each source name to an awaitable from one of the read methods,
+        e.g. {"products": async_extractor.read_s3_bucket_to_dataframe(s3_url)}
+
+        Returns:
+
+        extracted_sources : dict
+
+        A dictionary of each source name to its DataFrame,
+        or to the exception raised if the source could not be extracted
+        '''
+        source_names = list(sources)
+        results = await asyncio.gather(*sources.values(), return_exceptions=True)
+
+        extracted_sources = dict(zip(source_names, results))
+        failed_sources = [
+            source_name for source_name, result in extracted_sources.items()
+            if isinstance(result, BaseException)
+        ]
+        if failed_sources:
+            async_data_extraction_logger.error(f"Failed to extract {failed_sources}")
+            print(f"Failed to extract {failed_sources}. Please view the logs")
+        async_data_extraction_logger.info(
+            f"Extracted {len(source_names) - len(failed_sources)} of {len(source_names)} sources"
+        )
+        return extracted_sources
+
+    def run(self, source_factory : Callable):
+        '''
+        Method to extract several sources concurrently from synchronous code
+
+        Parameters:
+
+        source_factory : Callable
+
+        A function which takes this AsyncDataExtractor and returns the sources dictionary for extract_all(),
+        e.g. lambda async_extractor: {"products": async_extractor.read_s3_bucket_to_dataframe(s3_url)}
+
+        Returns:
+
+        extracted_sources : dict
+
+        A dictionary of each source name to its DataFrame, or to the exception raised
+        '''
+        async def extract_sources():
+            return await self.extract_all(source_factory(self))
+
+        return asyncio.run(extract_sources())
+
+    async def _run_with_retries(self, source : str, extract_function : Callable, *args):
+        '''
+        Utility method to run a blocking extract function in the executor,
+        limiting the number running at once, with a timeout and retries
+
+        Parameters:
+
+        source : str
+
+        The name of the source, used in the logs
+
+        extract_function : Callable
+
+        The blocking function which downloads and parses the source
+
+        *args
+
+        The arguments passed to the extract_function
+
+        Returns:
+
+        The output of the extract_function
+        '''
+        loop = asyncio.get_running_loop()
+        for attempt in range(1, self.retries + 1):
+            try:
+                async with self._get_semaphore():
+                    async_data_extraction_logger.info(f"Extracting {source} (attempt {attempt})")
+                    extraction = loop.run_in_executor(self.executor, functools.partial(extract_function, *args))
+                    try:
+                        return await asyncio.wait_for(asyncio.shield(extraction), self.timeout)
+                    except asyncio.TimeoutError:
+                        # The thread of a timed out attempt cannot be stopped, so it keeps its slot for one more timeout,
+                        # rather than the retry downloading the source alongside it
+                        async_data_extraction_logger.warning(
+                            f"Attempt {attempt} to extract {source} timed out. Waiting up to {self.timeout}s for its thread to finish"
+                        )
+                        await asyncio.wait([extraction], timeout=self.timeout)
+                        if not extraction.done():
+                            # Give up on a hung thread, so that it fails the source instead of blocking the run
+                            async_data_extraction_logger.error(
+                                f"The thread extracting {source} is still running. Releasing its slot and leaving it to finish"
+                            )
+                        elif extraction.exception() is None:
+                            # Use the late result rather than downloading the source again
+                            async_data_extraction_logger.info(f"Extracted {source} after the timeout")
+                            return extraction.result()
+                        raise
+            except ValueError:
+                # Invalid urls and arguments fail the same way every time
+                async_data_extraction_logger.exception(f"Unable to extract {source}")
+                raise
+            except (asyncio.TimeoutError, Exception) as e:
+                if attempt == self.retries:
+                    async_data_extraction_logger.exception(
+                        f"Failed to extract {source} after {attempt} attempts"
+                    )
+                    raise
+                delay = self.retry_delay * 2 ** (attempt - 1)
+                async_data_extraction_logger.warning(
+                    f"Attempt {attempt} to extract {source} failed : {e!r}. Retrying in {delay}s"
+                )
+                await asyncio.sleep(delay)
+
+    def _get_semaphore(self):
+        '''
+        Utility method to get the semaphore limiting the number of sources extracted at once.
+        A new semaphore is made for each event loop, as run() starts a new loop every time
+        '''
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
@@ -0,0 +1,275 @@
+from database_scripts.file_handler import get_absolute_file_path
+from botocore.exceptions import ClientError
+import urllib.request
+import urllib.error
+import threading
+import hashlib
+import shutil
+import json
+import os
+import logging
+
+
+"""
+LOG CREATION
+"""
+log_filename = get_absolute_file_path(
+    "conditional_fetcher.log", "logs"
+)  # "logs/conditional_fetcher.log"
+if not os.path.exists(log_filename):
+    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
+
+conditional_fetcher_logger = logging.getLogger(__name__)
+
+# Set the default level as DEBUG
+conditional_fetcher_logger.setLevel(logging.DEBUG)
+
+# Format the logs by time, filename, function_name, level_name and the message
+format = logging.Formatter(
+    "%(asctime)s:%(filename)s:%(funcName)s:%(levelname)s:%(message)s"
+)
+file_handler = logging.FileHandler(log_filename)
+
+# Set the formatter to the variable format
+
+file_handler.setFormatter(format)
+
+conditional_fetcher_logger.addHandler(file_handler)
+
+
+class ConditionalFetcher:
+    '''
+    A class which downloads sources using conditional requests.
+
+    The ETag and Last-Modified headers of each source are stored alongside its payload.
+    The next request for the source sends them back, and if the server replies with
+    304 Not Modified, the stored payload is used instead of downloading it again.
+
+    The fetcher also records the version of each source which a pipeline last loaded,
+    so that a pipeline can skip sources it has already loaded.
+
+    Attributes
+
+    cache_directory: The directory the payloads and metadata.json are stored in
+
+    Methods
+
+    fetch()
+    fetch_s3_object()
+    get_version()
+    is_processed()
+    mark_processed()
+    '''
+    def __init__(self, cache_directory : str):
+        self.cache_directory = cache_directory
+        self.metadata_file_path = os.path.join(cache_directory, "metadata.json")
+        self._metadata_lock = threading.Lock()
+        os.makedirs(self.cache_directory, exist_ok=True)
+        self.metadata = self._load_metadata()
+
+    def fetch(self, url : str):
+        '''
+        Method to download a url, unless it is unchanged since it was last downloaded
+
+        Parameters:
+
+        url : str
+
+        The url of the source
+
+        Returns:
+
+        (payload_file_path, changed) : Tuple
+
+        The path to the local copy of the payload, and False if the server replied 304 Not Modified
+        '''
+        source_metadata, payload_file_path = self._get_cached_source(url)
+
+        request = urllib.request.Request(url)
+        if source_metadata.get("etag"):
+            request.add_header("If-None-Match", source_metadata["etag"])
+        if source_metadata.get("last_modified"):
+            request.add_header("If-Modified-Since", source_metadata["last_modified"])
+
+        try:
+            with urllib.request.urlopen(request) as response:
+                self._save_payload(payload_file_path, response)
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+            conditional_fetcher_logger.info(f"{url} not modified. Using the stored payload")
+            return payload_file_path, False
+
+        self._update_source(url, headers.get("ETag"), headers.get("Last-Modified"))
+        conditional_fetcher_logger.info(f"Downloaded {url}")
+        return payload_file_path, True
+
+    def fetch_s3_object(self, url : str, s3_client, bucket_name : str, key : str):
+        '''
+        Method to download an object from an s3_bucket, unless it is unchanged since it was last downloaded
+
+        Parameters:
+
+        url : str
+
+        The url of the object, used to identify the source
+
+        s3_client
+
+        The boto3 client used to get the object
+
+        bucket_name : str
+
+        The name of the bucket
+
+        key : str
+
+        The key of the object
+
+        Returns:
+
+        (payload_file_path, changed) : Tuple
+
+        The path to the local copy of the payload, and False if the object was not modified
+        '''
+        source_metadata, payload_file_path = self._get_cached_source(url)
+
+        conditional_arguments = {}
+        if source_metadata.get("etag"):
+            conditional_arguments["IfNoneMatch"] = source_metadata["etag"]
+
+        try:
+            response = s3_client.get_object(Bucket=bucket_name, Key=key, **conditional_arguments)
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("304", "NotModified"):
+                raise
+            conditional_fetcher_logger.info(f"{url} not modified. Using the stored payload")
+            return payload_file_path, False
+
+        self._save_payload(payload_file_path, response["Body"])
+        self._update_source(url, response.get("ETag"), None)
+        conditional_fetcher_logger.info(f"Downloaded {url}")
+        return payload_file_path, True
+
+    def get_version(self, url : str):
+        '''
+        Method to get the version of a source last downloaded, from its ETag or Last-Modified header
+
+        Returns:
+
+        version : str
+
+        The version of the source, or None if the server sent neither header
+        '''
+        with self._metadata_lock:
+            source_metadata = self.metadata["sources"].get(url, {})
+        return source_metadata.get("etag") or source_metadata.get("last_modified")
+
+    def is_processed(self, pipeline_name : str, url : str):
+        '''
+        Method to check if a pipeline has already loaded the version of a source last downloaded
+
+        Parameters:
+
+        pipeline_name : str
+
+        The name of the pipeline
+
+        url : str
+
+        The url of the source
+
+        Returns:
+
+        bool : True if the pipeline loaded this version, False otherwise
+        '''
+        version = self.get_version(url)
+        if version is None:
+            # Sources without a version can never be shown to be unchanged
+            return False
+        with self._metadata_lock:
+            processed_version = self.metadata["processed"].get(pipeline_name, {}).get(url)
+        return processed_version == version
+
+    def mark_processed(self, pipeline_name : str, url : str):
+        '''
+        Method to record that a pipeline has loaded the version of a source last downloaded
+
+        Parameters:
+
+        pipeline_name : str
+
+        The name of the pipeline
+
+        url : str
+
+        The url of the source
+        '''
+        version = self.get_version(url)
+        with self._metadata_lock:
+            self.metadata["processed"].setdefault(pipeline_name, {})[url] = version
+            self._save_metadata()
+        conditional_fetcher_logger.info(f"{pipeline_name} processed {url} ({version})")
+
+    def _get_cached_source(self, url : str):
+        '''
+        Utility method to get the stored headers of a source and the path to its payload.
+        The headers are only returned if the payload is still on disk
+        '''
+        payload_file_path = os.path.join(
+            self.cache_directory, hashlib.sha256(url.encode("utf-8")).hexdigest()
+        )
+        with self._metadata_lock:
+            source_metadata = dict(self.metadata["sources"].get(url, {}))
+        if not os.path.exists(payload_file_path):
+            # Without a stored payload there is nothing to fall back on, so request the full source
+            source_metadata = {}
+        return source_metadata, payload_file_path
+
+    def _update_source(self, url : str, etag : str, last_modified : str):
+        '''
+        Utility method to store the headers of a downloaded source
+        '''
+        with self._metadata_lock:
+            self.metadata["sources"][url] = {"etag": etag, "last_modified": last_modified}
+            self._save_metadata()
+
+    @staticmethod
+    def _save_payload(payload_file_path : str, stream):
+        '''
+        Utility method to write a downloaded payload to disk
+        '''
+        # Write to a temporary file first so that readers never see a partial payload
+        temporary_file_path = f"{payload_file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary_file_path, "wb") as payload_file:
+                shutil.copyfileobj(stream, payload_file)
+            os.replace(temporary_file_path, payload_file_path)
+        finally:
+            if os.path.exists(temporary_file_path):
+                os.remove(temporary_file_path)
+
+    def _load_metadata(self):
+        '''
+        Utility method to read metadata.json, or start a new one
+        '''
+        try:
+            with open(self.metadata_file_path, "r") as metadata_file:
+                return json.load(metadata_file)
+        except FileNotFoundError:
+            return {"sources": {}, "processed": {}}
+        except json.JSONDecodeError:
+            conditional_fetcher_logger.warning(
+                f"{self.metadata_file_path} is corrupt. Every source will be downloaded again"
+            )
+            return {"sources": {}, "processed": {}}
+
+    def _save_metadata(self):
+        '''
+        Utility method to write metadata.json. The caller must hold the metadata lock
+        '''
+        temporary_file_path = f"{self.metadata_file_path}.{os.getpid()}.tmp"
+        with open(temporary_file_path, "w") as metadata_file:
+            json.dump(self.metadata, metadata_file, indent=4)
+        os.replace(temporary_file_path, self.metadata_file_path)
@@ -2,6 +2,7 @@ import urllib.request
 import pandas as pd
 from datetime import datetime
 from database_scripts.file_handler import get_absolute_file_path
+from database_scripts.conditional_fetcher import ConditionalFetcher
 
 
 
@@ -15,6 +16,8 @@ class CurrencyExtractor:
 
     url: The url of the website 
 
+    fetcher: An optional ConditionalFetcher, so that an unchanged page is not downloaded again 
+
     Methods 
 
     read_html_data()
@@ -23,8 +26,9 @@ class CurrencyExtractor:
     convert_columns() 
     save_data() 
     '''
-    def __init__(self, url):
+    def __init__(self, url, fetcher: ConditionalFetcher = None):
         self.url = url
+        self.fetcher = fetcher
 
     def read_html_data(self):
         '''
@@ -38,6 +42,12 @@ class CurrencyExtractor:
 
         The html from the website 
         '''
+        if self.fetcher is not None:
+            # Read the stored copy of the page if the website reports it as unchanged
+            html_file_path, _ = self.fetcher.fetch(self.url)
+            with open(html_file_path, "rb") as html_file:
+                return html_file.read()
+
         with urllib.request.urlopen(self.url) as webpage:
             html = webpage.read()
 
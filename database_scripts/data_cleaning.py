@@ -79,13 +79,13 @@ class DataCleaning:
 
         data_cleaning_logger.info("Cleaning date columns : join_date and birth_date")
         data_cleaning_logger.info("Attempting to clean dates into correct format")
-        # Apply the clean_dates function to the dataframe
-        legacy_users_dataframe["join_date"] = legacy_users_dataframe["join_date"].apply(
-            self.clean_dates
+        # Apply the clean_dates_vectorised function to the dataframe
+        legacy_users_dataframe["join_date"] = self.clean_dates_vectorised(
+            legacy_users_dataframe["join_date"]
+        )
+        legacy_users_dataframe["date_of_birth"] = self.clean_dates_vectorised(
+            legacy_users_dataframe["date_of_birth"]
         )
-        legacy_users_dataframe["date_of_birth"] = legacy_users_dataframe[
-            "date_of_birth"
-        ].apply(self.clean_dates)
 
         data_cleaning_logger.info(
             "Dropping rows within birth_date and join_date columns which have nulls"
@@ -170,28 +170,30 @@ class DataCleaning:
         data_cleaning_logger.info(f"Number of rows : {len(legacy_store_dataframe)}")
 
         data_cleaning_logger.info("Stating column names for the table")
-        # State the column names for the table
-        legacy_store_dataframe.columns = [
-            "store_key",
-            "store_address",
-            "longitude",
-            "null_column",
-            "city",
-            "store_code",
-            "number_of_staff",
-            "opening_date",
-            "store_type",
-            "latitude",
-            "country_code",
-            "region",
-        ]
+        # State the column names for the table,
+        # unless the columns were already renamed when they were read from the source database
+        if "store_key" not in legacy_store_dataframe.columns:
+            legacy_store_dataframe.columns = [
+                "store_key",
+                "store_address",
+                "longitude",
+                "null_column",
+                "city",
+                "store_code",
+                "number_of_staff",
+                "opening_date",
+                "store_type",
+                "latitude",
+                "country_code",
+                "region",
+            ]
 
         data_cleaning_logger.debug("Column names")
         data_cleaning_logger.debug(legacy_store_dataframe.columns)
 
         data_cleaning_logger.info("Dropping null_column within the table")
-        # Drop the null_column column within the table
-        legacy_store_dataframe = legacy_store_dataframe.drop("null_column", axis=1)
+        # Drop the null_column column within the table if it was read from the source database
+        legacy_store_dataframe = legacy_store_dataframe.drop("null_column", axis=1, errors="ignore")
         data_cleaning_logger.info("null_column dropped")
         data_cleaning_logger.info(f"Number of rows : {len(legacy_store_dataframe)}")
 
@@ -220,9 +222,9 @@ class DataCleaning:
             "Applying the clean_date method to the opening_date column"
         )
         # Change the opening_date column to a datetime
-        legacy_store_dataframe["opening_date"] = legacy_store_dataframe[
-            "opening_date"
-        ].apply(self.clean_dates)
+        legacy_store_dataframe["opening_date"] = self.clean_dates_vectorised(
+            legacy_store_dataframe["opening_date"]
+        )
 
         data_cleaning_logger.info(
             "Dropping dates from the opening_date column which are null"
@@ -344,12 +346,12 @@ class DataCleaning:
         data_cleaning_logger.info(f"Number of rows : {len(card_details_table)}")
 
         data_cleaning_logger.info(
-            "Applying the clean_dates method to to the dataframe to clean the date values"
+            "Applying the clean_dates_vectorised method to to the dataframe to clean the date values"
+        )
+        # Apply the clean_dates_vectorised method to the dataframe to clean the date values
+        card_details_table["date_payment_confirmed"] = self.clean_dates_vectorised(
+            card_details_table["date_payment_confirmed"]
         )
-        # Apply the clean_dates method to the dataframe to clean the date values
-        card_details_table["date_payment_confirmed"] = card_details_table[
-            "date_payment_confirmed"
-        ].apply(self.clean_dates)
 
         data_cleaning_logger.info(
             "Converting date_payment_confirmed column to a datetime"
@@ -450,20 +452,22 @@ class DataCleaning:
         data_cleaning_logger.info(f"Number of rows : {len(orders_dataframe)}")
 
         data_cleaning_logger.info("Stating the name of the columns")
-        # State the names of the columns
-        orders_dataframe.columns = [
-            "order_key",
-            "null_key",
-            "date_uuid",
-            "first_name",
-            "last_name",
-            "user_uuid",
-            "card_number",
-            "store_code",
-            "product_code",
-            "null_column",
-            "product_quantity",
-        ]
+        # State the names of the columns,
+        # unless the columns were already renamed when they were read from the source database
+        if "order_key" not in orders_dataframe.columns:
+            orders_dataframe.columns = [
+                "order_key",
+                "null_key",
+                "date_uuid",
+                "first_name",
+                "last_name",
+                "user_uuid",
+                "card_number",
+                "store_code",
+                "product_code",
+                "null_column",
+                "product_quantity",
+            ]
         data_cleaning_logger.info("Names of columns")
         data_cleaning_logger.info(orders_dataframe.columns)
 
@@ -474,7 +478,7 @@ class DataCleaning:
         )
         # Drop the following columns within the dataframe if they exist
         orders_dataframe.drop(
-            ["null_key", "first_name", "last_name", "null_column"], axis=1, inplace=True
+            ["null_key", "first_name", "last_name", "null_column"], axis=1, inplace=True, errors="ignore"
         )
 
         data_cleaning_logger.debug("Columns dropped")
@@ -519,6 +523,64 @@ class DataCleaning:
         print("Job clean_orders_table has completed successfully.")
         return orders_dataframe 
 
+    def resolve_foreign_keys(
+        self,
+        orders_dataframe : pd.DataFrame,
+        key_maps : dict,
+        foreign_keys : list,
+        unknown_key : int = 0,
+        not_applicable_key : int = -1,
+    ):
+        """
+        Method to fill the foreign key columns of the orders table from the key maps of the dimension tables,
+        so that the orders table is loaded with its keys rather than updated afterwards.
+        The foreign keys are resolved in order, so a foreign key can look up a column resolved before it,
+        e.g. the currency_key from the country_code of the store
+
+        Parameters:
+        orders_dataframe : pd.DataFrame
+        The cleaned orders table
+
+        key_maps : dict
+        A dictionary of each target_column to its key map, as returned by DatabaseConnector.load_key_maps
+
+        foreign_keys : list
+        A list of dictionaries with the target_column and source_column of each foreign key
+
+        unknown_key : int = 0
+        The key given to rows whose natural key is not in the dimension table
+
+        not_applicable_key : int = -1
+        The key given to rows without a natural key
+
+        Returns:
+        orders_dataframe : pd.DataFrame
+        The orders table with the foreign key columns filled in
+        """
+        for foreign_key in foreign_keys:
+            target_column = foreign_key["target_column"]
+            source_values = orders_dataframe[foreign_key["source_column"]]
+            has_natural_key = source_values.notna()
+
+            # Series.map looks each natural key up in the hashed index of the key map
+            resolved_values = pd.Series(np.nan, index=orders_dataframe.index, dtype=object)
+            resolved_values[has_natural_key] = source_values[has_natural_key].astype(str).map(
+                key_maps[target_column]
+            )
+
+            if target_column.endswith("_key"):
+                unmatched_rows = has_natural_key & resolved_values.isna()
+                resolved_values[unmatched_rows] = unknown_key
+                resolved_values[~has_natural_key] = not_applicable_key
+                resolved_values = resolved_values.astype("int64")
+                data_cleaning_logger.info(
+                    f"Resolved {target_column} : {int(unmatched_rows.sum())} unknown, "
+                    f"{int((~has_natural_key).sum())} not applicable"
+                )
+            orders_dataframe[target_column] = resolved_values
+
+        return orders_dataframe
+
     def clean_time_event_table(self, time_df : pd.DataFrame):
         """
         Method to read in a time_dimension table from an AWS S3 Bucket,
@@ -647,10 +709,10 @@ class DataCleaning:
         )
 
         data_cleaning_logger.info(
-            "Applying the convert_to_kg method to the weight column"
+            "Applying the convert_to_kg_vectorised method to the weight column"
         )
-        # Apply the convert_to_kg method to the 'weight' column to standardise the weights to kg
-        products_table["weight"] = products_table["weight"].apply(self.convert_to_kg)
+        # Apply the convert_to_kg_vectorised method to the 'weight' column to standardise the weights to kg
+        products_table["weight"] = self.convert_to_kg_vectorised(products_table["weight"])
 
         data_cleaning_logger.info("Dropping any weights which are Nulls")
         # Drop any weights which are NaNs
@@ -1019,6 +1081,65 @@ class DataCleaning:
             data_cleaning_logger.warning("Unknown value, returning None")
             return None
 
+    def convert_to_kg_vectorised(self, weights : pd.Series):
+        """
+        Utility method to standardise a whole Series of weights into kg.
+        Gives the same results as applying convert_to_kg to each value,
+        but converts the regular weights with NumPy arithmetic
+
+        Parameters:
+        weights : pd.Series
+        A Series of the weights of the products
+
+        Returns:
+        clean_weights : pd.Series
+        A Series of the weights in kg, with NaN where the value is not a weight
+        """
+        # Pull the multiplier, value and unit out of each weight, e.g. 12 x 100g
+        weight_parts = weights.astype(object).str.extract(
+            r"^(?:(?P<multiplier>\d+(?:\.\d+)?) x )?(?P<value>\d+(?:\.\d+)?)(?P<unit>kg|g|ml|oz)(?P<trailing>\s*\.)?$"
+        )
+        multiplier = weight_parts["multiplier"]
+        unit = weight_parts["unit"]
+        has_multiplier = multiplier.notna()
+        has_trailing = weight_parts["trailing"].notna()
+
+        clean_weights = pd.Series(np.nan, index=weights.index, dtype="float64")
+
+        # Weights in kg are already standardised
+        kg_mask = unit.eq("kg") & ~has_multiplier & ~has_trailing
+        clean_weights[kg_mask] = weight_parts.loc[kg_mask, "value"].astype(float)
+
+        # Multipacks only work for weights in g and are not divided by 1000, as in convert_to_kg
+        multipack_mask = unit.eq("g") & has_multiplier & ~has_trailing
+        clean_weights[multipack_mask] = multiplier[multipack_mask].astype(float) * weight_parts.loc[
+            multipack_mask, "value"
+        ].astype(float)
+
+        # Weights in g or ml have any '.' removed, which also covers irregular values such as '77g .'
+        gram_mask = unit.isin(["g", "ml"]) & ~has_multiplier
+        clean_weights[gram_mask] = (
+            weight_parts.loc[gram_mask, "value"].str.replace(".", "", regex=False).astype(float) / 1000
+        )
+
+        # Weights in oz are converted using the oz to kg conversion factor
+        oz_mask = unit.eq("oz") & ~has_multiplier & ~has_trailing
+        clean_weights[oz_mask] = np.round(
+            weight_parts.loc[oz_mask, "value"].astype(float) * 0.028349523, 2
+        )
+
+        # Any other value uses convert_to_kg so that the results are the same
+        fallback_mask = ~(kg_mask | multipack_mask | gram_mask | oz_mask)
+        data_cleaning_logger.debug(
+            f"Converting {fallback_mask.sum()} irregular weights with convert_to_kg"
+        )
+        if fallback_mask.any():
+            clean_weights[fallback_mask] = (
+                weights[fallback_mask].apply(self.convert_to_kg).astype(float)
+            )
+
+        return clean_weights
+
     def convert_text_file_to_dict(self, text_file_name):
         mapping_dictionary = {}
         with open(f"{text_file_name}.txt", "r") as file:
@@ -1069,4 +1190,57 @@ class DataCleaning:
             )
             return pd.to_datetime(date, errors="coerce")
 
+    def clean_dates_vectorised(self, dates : pd.Series):
+        """
+        Utility method to clean a whole Series of dates at once.
+        Gives the same results as applying clean_dates to each value,
+        but parses each date format with a single call to pd.to_datetime
+
+        Parameters:
+        dates : pd.Series
+        A Series of dates extracted from the data sources
+
+        Returns:
+        cleaned_dates : pd.Series
+        A Series of datetimes, with NaT where the value is 'NULL' or could not be parsed
+        """
+        # Values which are not strings fall through to the generic parsing
+        dates = dates.astype(object)
+        cleaned_dates = pd.Series(pd.NaT, index=dates.index, dtype="datetime64[ns]")
+
+        # Sort the dates into the formats understood by clean_dates
+        # The formats are checked in the same order as clean_dates
+        null_mask = dates.eq("NULL")
+        unmatched_mask = ~null_mask
+        date_formats = [
+            # Dates already in the correct format use the same generic parsing as clean_dates
+            (r"\d{4}-\d{2}-\d{2}", "mixed"),
+            (r"\d{4}/\d{1,2}/\d{1,2}", "%Y/%m/%d"),
+            (r"\d{4} [a-zA-Z]{3,} \d{2}", "%Y %B %d"),
+        ]
+        for date_pattern, date_format in date_formats:
+            format_mask = unmatched_mask & dates.str.match(date_pattern, na=False)
+            unmatched_mask &= ~format_mask
+            data_cleaning_logger.debug(
+                f"{format_mask.sum()} dates with Date Format {date_format} converted to datetime objects"
+            )
+            if format_mask.any():
+                cleaned_dates.loc[format_mask] = pd.to_datetime(
+                    dates[format_mask], format=date_format
+                )
+
+        data_cleaning_logger.warning(
+            f"{null_mask.sum()} date fields are NULL. Converting to NaT (Not a Datetime)"
+        )
+        if unmatched_mask.any():
+            # Try to convert the remaining dates with generic parsing, ignoring errors
+            data_cleaning_logger.warning(
+                f"Date format unknown for {unmatched_mask.sum()} dates. Attempting to convert to datetime"
+            )
+            cleaned_dates.loc[unmatched_mask] = pd.to_datetime(
+                dates[unmatched_mask], format="mixed", errors="coerce"
+            )
+
+        return cleaned_dates
+
 
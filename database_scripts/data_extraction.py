@@ -1,15 +1,29 @@
 from database_scripts.file_handler import get_absolute_file_path
+from database_scripts.extraction_cache import ExtractionCache
+from database_scripts.conditional_fetcher import ConditionalFetcher
 from sqlalchemy import inspect
 from sqlalchemy import select
 from sqlalchemy.engine import Engine
 from sqlalchemy import Table
 from sqlalchemy import MetaData
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 from urllib.parse import urlparse
-from io import StringIO
+from typing import Callable
+import urllib.request
+from io import BytesIO, TextIOWrapper
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
 import pandas as pd
+import numpy as np
 import boto3
+import threading
+import tempfile
+import shutil
+import hashlib
 import tabula
+import pypdf
 import re
 import os
 import logging
@@ -39,14 +53,99 @@ file_handler.setFormatter(format)
 
 data_extraction_logger.addHandler(file_handler)
 
+# The string COPY ... TO STDOUT writes for a NULL
+COPY_NULL_MARKER = "\\N"
+
+
+def _read_pdf_page_range(pdf_file_path : str, first_page : int, last_page : int):
+    """
+    Function to read the tables on a contiguous range of pages of a pdf file using tabula-py.
+    Each page is written to its own pdf and the pages are converted in a single batch,
+    so that tabula-java is started once for the range rather than once for every page.
+
+    Parameters:
+    pdf_file_path : str
+    The path to the pdf file
+
+    first_page : int
+    The first page to read, starting from 1
+
+    last_page : int
+    The last page to read
+
+    Returns:
+    page_tables : dict
+    A dictionary of each page number to the tables on that page as a Pandas DataFrame
+    """
+    pdf_reader = pypdf.PdfReader(pdf_file_path)
+    page_numbers = range(first_page, last_page + 1)
+    with tempfile.TemporaryDirectory() as page_directory:
+        for page_number in page_numbers:
+            pdf_writer = pypdf.PdfWriter()
+            pdf_writer.add_page(pdf_reader.pages[page_number - 1])
+            pdf_writer.write(os.path.join(page_directory, f"page_{page_number}.pdf"))
+
+        # tabula-java writes a page_<number>.csv next to each page it finds tables on
+        tabula.convert_into_by_batch(page_directory, output_format="csv", lattice=True)
+
+        page_tables = {}
+        for page_number in page_numbers:
+            try:
+                page_tables[page_number] = pd.read_csv(os.path.join(page_directory, f"page_{page_number}.csv"))
+            except (FileNotFoundError, pd.errors.EmptyDataError):
+                page_tables[page_number] = pd.DataFrame()
+    return page_tables
+
 
 class DataExtractor:
-    def __init__(self):
-        pass 
+    def __init__(
+        self,
+        cache : ExtractionCache = None,
+        s3_max_pool_connections : int = 32,
+        fetcher : ConditionalFetcher = None,
+    ):
+        # An optional local cache of extracted DataFrames used by extract_with_cache
+        self.cache = cache
+        # An optional store of downloaded files, so that unchanged http and s3 sources are not downloaded again
+        self.fetcher = fetcher
+        # One s3_client is shared by every S3 read, created on first use
+        self.s3_max_pool_connections = s3_max_pool_connections
+        self.s3_client = None
+        self._s3_client_lock = threading.Lock()
+        # Maps the column types used in database_schema.yaml to pandas dtypes
+        # None marks the date types, which are parsed after reading
+        self.dtype_mapping = {
+            "BIGINT": "Int64",
+            "INTEGER": "Int64",
+            "SMALLINT": "Int64",
+            "FLOAT": "float64",
+            "NUMERIC": "float64",
+            "DECIMAL": "float64",
+            "BOOLEAN": "boolean",
+            "VARCHAR": str,
+            "UUID": str,
+            "TIME": str,
+            "DATE": None,
+            "TIMESTAMP": None,
+            "DATETIME": None,
+        }
+        # Maps PostgreSQL type OIDs to pandas dtypes for columns missing from database_schema.yaml
+        self.postgres_oid_mapping = {
+            16: "boolean",
+            20: "Int64",
+            21: "Int64",
+            23: "Int64",
+            700: "float64",
+            701: "float64",
+            1700: "float64",
+            1082: None,
+            1114: None,
+            1184: None,
+        }
 
 
     def read_rds_table(
-        self, table_name: str, engine : Engine 
+        self, table_name: str, engine : Engine, columns = None, where : str = None
     ):
         """
         Method to read a table from an RDS and return a Pandas Dataframe
@@ -58,6 +157,14 @@ class DataExtractor:
         engine : Engine
         The Engine object which represents either the source or target database 
 
+        columns : list | dict = None
+        The columns to read. Either a list of column names, or a dictionary of
+        each column name to the name it is read as. By default, every column is read
+
+        where : str = None
+        A SQL condition, such as "store_type <> 'Web Portal'", which rows must meet to be read.
+        By default, every row is read
+
         """
         try:
 
@@ -65,14 +172,471 @@ class DataExtractor:
             data_extraction_logger.info("Initialising connection to the database")
             data_extraction_logger.info(f"Using {engine}")
 
-            # Connect to the database
-            connection = engine.connect()
+            # Connect to the database. The connection is returned to the pool once the table is read
+            with engine.connect() as connection:
+                data_extraction_logger.info(
+                    f"Successfully connected to database via {connection}"
+                )
+
+                if columns or where:
+                    # Only the columns and rows which are needed are sent by the database
+                    select_query = self._build_select_query(table_name, engine, columns, [where])
+                    dataframe_table = pd.read_sql_query(text(select_query), connection)
+                else:
+                    dataframe_table = pd.read_sql_table(table_name, connection)
+            return dataframe_table
+
+        except OperationalError as e:
+            # Handles connection query errors
+            data_extraction_logger.exception(
+                "Failed to read table, please ensure that the table_name is correct"
+            )
+            raise ValueError(f"Failed to read table '{table_name}': {e}")
+
+        except Exception as e:
+            # Handles other exceptions
+            data_extraction_logger.exception(
+                "An error occured while reading the table. Please view the traceback message"
+            )
+            raise Exception(f"Error occured while reading table '{table_name}' : {e}")
+
+    def read_rds_table_in_chunks(
+        self,
+        table_name: str,
+        engine : Engine,
+        chunksize : int = 50000,
+        columns = None,
+        where : str = None
+    ):
+        """
+        Method to read a table from an RDS in chunks using a server-side cursor.
+        Only one chunk of the table is held in memory at any one time.
+
+        Parameters:
+        table_name : str
+        The name of the table from the source database
+
+        engine : Engine
+        The Engine object which represents either the source or target database
+
+        chunksize : int = 50000
+        The maximum number of rows in each DataFrame yielded
+
+        columns : list | dict = None
+        The columns to read. Either a list of column names, or a dictionary of
+        each column name to the name it is read as. By default, every column is read
+
+        where : str = None
+        A SQL condition, such as "store_type <> 'Web Portal'", which rows must meet to be read.
+        By default, every row is read
+
+        Yields:
+        dataframe_chunk : pd.DataFrame
+        A Pandas DataFrame containing up to chunksize rows of the table
+
+        """
+        if chunksize < 1:
+            data_extraction_logger.error(f"Invalid chunksize {chunksize}")
+            raise ValueError("chunksize must be a positive integer")
+
+        try:
+            data_extraction_logger.info("Initialising streaming connection to the database")
+            data_extraction_logger.info(f"Using {engine}")
+
+            with engine.connect() as connection:
+                # Server-side cursors cannot be used under AUTOCOMMIT,
+                # so the connection is given its own transaction
+                connection.execution_options(
+                    isolation_level="READ COMMITTED",
+                    stream_results=True,
+                    max_row_buffer=chunksize,
+                )
+                with connection.begin():
+                    data_extraction_logger.info(
+                        f"Streaming {table_name} in chunks of {chunksize} rows"
+                    )
+                    if columns or where:
+                        select_query = self._build_select_query(table_name, engine, columns, [where])
+                        dataframe_chunks = pd.read_sql_query(
+                            text(select_query), connection, chunksize=chunksize
+                        )
+                    else:
+                        dataframe_chunks = pd.read_sql_table(table_name, connection, chunksize=chunksize)
+                    for chunk_number, dataframe_chunk in enumerate(dataframe_chunks):
+                        data_extraction_logger.debug(
+                            f"Chunk {chunk_number} : {len(dataframe_chunk)} rows"
+                        )
+                        yield dataframe_chunk
+
+            data_extraction_logger.info(f"Finished streaming {table_name}")
+
+        except OperationalError as e:
+            # Handles connection query errors
+            data_extraction_logger.exception(
+                "Failed to read table, please ensure that the table_name is correct"
+            )
+            raise ValueError(f"Failed to read table '{table_name}': {e}")
+
+    def read_rds_table_incremental(
+        self,
+        table_name: str,
+        engine : Engine,
+        key_column : str,
+        watermark = None,
+        chunksize : int = 50000,
+        columns = None,
+        where : str = None
+    ):
+        """
+        Method to read the rows of a table from an RDS which are past a watermark.
+        The rows are streamed in order of the key_column using a server-side cursor,
+        so the largest key of each chunk can be saved as the new watermark.
+
+        Parameters:
+        table_name : str
+        The name of the table from the source database
+
+        engine : Engine
+        The Engine object which represents either the source or target database
+
+        key_column : str
+        The name of an increasing column, such as a key or a timestamp, used for the watermark
+
+        watermark = None
+        Only rows with a key_column greater than the watermark are read.
+        By default, this is None, which reads every row
+
+        chunksize : int = 50000
+        The maximum number of rows in each DataFrame yielded
+
+        columns : list | dict = None
+        The columns to read. Either a list of column names, or a dictionary of
+        each column name to the name it is read as. By default, every column is read
+
+        where : str = None
+        A SQL condition, such as "store_type <> 'Web Portal'", which rows must meet to be read.
+        By default, every row is read
+
+        Yields:
+        dataframe_chunk : pd.DataFrame
+        A Pandas DataFrame containing up to chunksize rows past the watermark
+
+        """
+        if chunksize < 1:
+            data_extraction_logger.error(f"Invalid chunksize {chunksize}")
+            raise ValueError("chunksize must be a positive integer")
+
+        quote = engine.dialect.identifier_preparer.quote
+        conditions = [where]
+        if watermark is not None:
+            conditions.append(f"{quote(key_column)} > :watermark")
+        select_query = self._build_select_query(table_name, engine, columns, conditions)
+        select_query += f" ORDER BY {quote(key_column)}"
+        # The chunks hold the key column under its new name if the projection renames it
+        projected_key_column = self.get_projected_column_name(key_column, columns)
+
+        try:
+            data_extraction_logger.info(
+                f"Streaming rows of {table_name} with {key_column} past {watermark}"
+            )
+            with engine.connect() as connection:
+                # Server-side cursors cannot be used under AUTOCOMMIT,
+                # so the connection is given its own transaction
+                connection.execution_options(
+                    isolation_level="READ COMMITTED",
+                    stream_results=True,
+                    max_row_buffer=chunksize,
+                )
+                with connection.begin():
+                    for dataframe_chunk in pd.read_sql_query(
+                        text(select_query),
+                        connection,
+                        params={"watermark": watermark},
+                        chunksize=chunksize,
+                    ):
+                        data_extraction_logger.debug(
+                            f"Chunk of {len(dataframe_chunk)} rows up to {dataframe_chunk[projected_key_column].max()}"
+                        )
+                        yield dataframe_chunk
+
+            data_extraction_logger.info(f"Finished streaming {table_name}")
+
+        except OperationalError as e:
+            # Handles connection query errors
+            data_extraction_logger.exception(
+                "Failed to read table, please ensure that the table_name is correct"
+            )
+            raise ValueError(f"Failed to read table '{table_name}': {e}")
+
+    def read_rds_table_partitioned(
+        self,
+        table_name: str,
+        engine : Engine,
+        key_column : str,
+        partitions : int = 4,
+        columns = None,
+        where : str = None,
+        max_workers : int = 4
+    ):
+        """
+        Method to read a table from an RDS over several connections at the same time,
+        splitting the table into ranges of an integer key_column
+
+        Parameters:
+        table_name : str
+        The name of the table from the source database
+
+        engine : Engine
+        The Engine object which represents either the source or target database.
+        Its connection pool should allow at least as many connections as max_workers
+
+        key_column : str
+        The name of an integer column, such as index or order_key, used to split the table
+
+        partitions : int = 4
+        The number of ranges the table is split into
+
+        columns : list | dict = None
+        The columns to read. Either a list of column names, or a dictionary of
+        each column name to the name it is read as. By default, every column is read
+
+        where : str = None
+        A SQL condition, such as "store_type <> 'Web Portal'", which rows must meet to be read.
+        By default, every row is read
+
+        max_workers : int = 4
+        The maximum number of ranges read at the same time
+
+        Returns:
+        dataframe_table : pd.DataFrame
+        A Pandas DataFrame of the whole table, in order of the ranges of the key_column
+
+        """
+        partition_tables = list(
+            self.iter_rds_table_partitions(table_name, engine, key_column, partitions, columns, where, max_workers)
+        )
+        dataframe_table = pd.concat(partition_tables, ignore_index=True)
+        data_extraction_logger.debug(f"Number of rows : {len(dataframe_table)}")
+        return dataframe_table
+
+    def iter_rds_table_partitions(
+        self,
+        table_name: str,
+        engine : Engine,
+        key_column : str,
+        partitions : int = 4,
+        columns = None,
+        where : str = None,
+        max_workers : int = 4
+    ):
+        """
+        Method to read a table from an RDS over several connections at the same time.
+        The range between the smallest and largest value of an integer key_column is split
+        into equal ranges, and each range is read over its own pooled connection.
+        Rows with a null key_column are read with the first range.
+
+        Each range is read in its own transaction, so the ranges are not a consistent
+        snapshot of a table which is being written to while it is read.
+
+        Parameters:
+        table_name : str
+        The name of the table from the source database
+
+        engine : Engine
+        The Engine object which represents either the source or target database
+
+        key_column : str
+        The name of an integer column, such as index or order_key, used to split the table
+
+        partitions : int = 4
+        The number of ranges the table is split into
+
+        columns : list | dict = None
+        The columns to read. Either a list of column names, or a dictionary of
+        each column name to the name it is read as. By default, every column is read
+
+        where : str = None
+        A SQL condition, such as "store_type <> 'Web Portal'", which rows must meet to be read.
+        By default, every row is read
+
+        max_workers : int = 4
+        The maximum number of ranges read at the same time. 
+        A range is only read once the caller has taken the range max_workers before it, 
+        so no more than max_workers ranges are held in memory
+
+        Yields:
+        partition_table : pd.DataFrame
+        A Pandas DataFrame for each range, in order of the key_column
+
+        """
+        if partitions < 1:
+            data_extraction_logger.error(f"Invalid number of partitions {partitions}")
+            raise ValueError("partitions must be a positive integer")
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+
+        quote = engine.dialect.identifier_preparer.quote
+        select_query = self._build_select_query(table_name, engine, columns, [where])
+
+        try:
+            with engine.connect() as connection:
+                minimum_key, maximum_key = connection.execute(
+                    text(
+                        self._build_select_query(
+                            table_name,
+                            engine,
+                            conditions=[where],
+                            select_list=f"MIN({quote(key_column)}), MAX({quote(key_column)})",
+                        )
+                    )
+                ).one()
+
+            if minimum_key is None:
+                # Either the table is empty or every key is null, so read it in one go
+                data_extraction_logger.info(f"No keys found in {table_name}.{key_column}")
+                with engine.connect() as connection:
+                    yield pd.read_sql_query(text(select_query), connection)
+                return
+
+            if not isinstance(minimum_key, int) or not isinstance(maximum_key, int):
+                raise ValueError(f"{table_name}.{key_column} must be an integer column")
+
+            # Split the keys into ranges of equal width, with no more ranges than there are keys
+            key_span = maximum_key - minimum_key + 1
+            partitions = min(partitions, key_span)
+            boundaries = [
+                minimum_key + key_span * partition_number // partitions
+                for partition_number in range(partitions + 1)
+            ]
+            partition_queries = []
+            for partition_number in range(partitions):
+                lower_bound, upper_bound = boundaries[partition_number], boundaries[partition_number + 1]
+                partition_condition = f"{quote(key_column)} >= :lower_bound AND {quote(key_column)} < :upper_bound"
+                if partition_number == 0:
+                    partition_condition = f"({partition_condition}) OR {quote(key_column)} IS NULL"
+                partition_queries.append(
+                    (
+                        self._build_select_query(table_name, engine, columns, [where, partition_condition]),
+                        {"lower_bound": lower_bound, "upper_bound": upper_bound},
+                    )
+                )
+
+            data_extraction_logger.info(
+                f"Reading {table_name} in {partitions} partitions of {key_column} between {minimum_key} and {maximum_key}"
+            )
+
+            def read_partition(partition_query):
+                query, params = partition_query
+                with engine.connect() as connection:
+                    partition_table = pd.read_sql_query(text(query), connection, params=params)
+                data_extraction_logger.debug(
+                    f"Partition {params['lower_bound']} to {params['upper_bound']} : {len(partition_table)} rows"
+                )
+                return partition_table
+
+            # Only max_workers partitions are submitted at a time, so at most that many finished partitions
+            # wait in memory for the caller, however many partitions the table is split into
+            with ThreadPoolExecutor(max_workers=min(max_workers, partitions)) as executor:
+                pending_partitions = deque()
+                for partition_query in partition_queries:
+                    if len(pending_partitions) == max_workers:
+                        yield pending_partitions.popleft().result()
+                    pending_partitions.append(executor.submit(read_partition, partition_query))
+                while pending_partitions:
+                    yield pending_partitions.popleft().result()
+
+            data_extraction_logger.info(f"Finished reading {table_name}")
+
+        except OperationalError as e:
+            # Handles connection query errors
+            data_extraction_logger.exception(
+                "Failed to read table, please ensure that the table_name is correct"
+            )
+            raise ValueError(f"Failed to read table '{table_name}': {e}")
+
+    def read_rds_table_with_copy(
+        self,
+        table_name: str,
+        engine : Engine,
+        schema_config : dict = None,
+        schema_table_name : str = None,
+        columns = None,
+        where : str = None
+    ):
+        """
+        Method to read a table from an RDS using COPY (SELECT ...) TO STDOUT.
+        The table is copied into an in-memory buffer as csv and parsed with pandas' C csv reader,
+        which avoids reflecting the table and building a Python object per row.
+
+        Parameters:
+        table_name : str
+        The name of the table from the source database
+
+        engine : Engine
+        The Engine object which represents either the source or target database
+
+        schema_config : dict = None
+        The contents of database_schema.yaml used to set the dtypes of the columns.
+        Columns which are not in the schema are typed from the types reported by the database
+
+        schema_table_name : str = None
+        The name of the table inside schema_config. By default, this is the table_name
+
+        columns : list | dict = None
+        The columns to read. Either a list of column names, or a dictionary of
+        each column name to the name it is read as. By default, every column is read
+
+        where : str = None
+        A SQL condition, such as "store_type <> 'Web Portal'", which rows must meet to be read.
+        By default, every row is read
+
+        Returns:
+        dataframe_table : pd.DataFrame
+        A Pandas DataFrame of the table
+
+        """
+        select_query = self._build_select_query(table_name, engine, columns, [where])
+
+        schema_columns = {}
+        if schema_config:
+            schema_columns = schema_config["schemas"]["tables"].get(
+                schema_table_name or table_name, {}
+            )
+
+        try:
+            data_extraction_logger.info(f"Copying {table_name} from the database")
+            data_extraction_logger.info(f"Using {engine}")
+            raw_connection = engine.raw_connection()
+            try:
+                with raw_connection.cursor() as cursor:
+                    # Read the column types of the table without fetching any rows
+                    cursor.execute(f"{select_query} LIMIT 0")
+                    column_type_codes = {
+                        column.name: column.type_code for column in cursor.description
+                    }
+                    copy_buffer = BytesIO()
+                    # NULLs are written as \N, as an empty field would be read back the same as an empty string
+                    cursor.copy_expert(
+                        f"COPY ({select_query}) TO STDOUT WITH (FORMAT csv, HEADER, NULL '{COPY_NULL_MARKER}')", copy_buffer
+                    )
+            finally:
+                raw_connection.close()
 
             data_extraction_logger.info(
-                f"Successfully connected to database via {connection}"
+                f"Copied {copy_buffer.tell()} bytes. Reading data into a dataframe"
+            )
+            column_dtypes, date_columns = self._get_column_dtypes(
+                column_type_codes, schema_columns
             )
+            copy_buffer.seek(0)
+            # Only the NULL marker is read as a null, so empty strings and strings such as 'NULL' are kept for the cleaners
+            dataframe_table = pd.read_csv(
+                copy_buffer, dtype=column_dtypes, keep_default_na=False, na_values=[COPY_NULL_MARKER]
+            )
+            for column in date_columns:
+                dataframe_table[column] = pd.to_datetime(dataframe_table[column])
 
-            dataframe_table = pd.read_sql_table(table_name, engine)
+            data_extraction_logger.debug(f"Number of rows : {len(dataframe_table)}")
             return dataframe_table
 
         except OperationalError as e:
@@ -85,9 +649,343 @@ class DataExtractor:
         except Exception as e:
             # Handles other exceptions
             data_extraction_logger.exception(
-                "An error occured while reading the table. Please view the traceback message"
+                "An error occured while copying the table. Please view the traceback message"
             )
-            raise Exception(f"Error occured while reading table '{table_name}' : {e}")
+            raise Exception(f"Error occured while copying table '{table_name}' : {e}")
+
+    @staticmethod
+    def get_projected_column_name(column_name : str, columns = None):
+        """
+        Method to get the name a column of the source table is read as under a projection
+
+        Parameters:
+        column_name : str
+        The name of the column in the source table
+
+        columns : list | dict = None
+        The projection, as passed to the RDS readers
+
+        Returns:
+        projected_column_name : str
+        The new name of the column if the projection renames it, otherwise the column_name
+        """
+        if isinstance(columns, dict):
+            return columns.get(column_name, column_name)
+        return column_name
+
+    @staticmethod
+    def _build_select_query(
+        table_name : str,
+        engine : Engine,
+        columns = None,
+        conditions : list = None,
+        select_list : str = None
+    ):
+        """
+        Utility method to build a SELECT statement which only reads the columns and rows needed
+
+        Parameters:
+        table_name : str
+        The name of the table
+
+        engine : Engine
+        The Engine used to quote the names of the table and columns
+
+        columns : list | dict = None
+        Either a list of column names, or a dictionary of each column name to the name it is read as.
+        By default, every column is read
+
+        conditions : list = None
+        SQL conditions which rows must meet to be read. Conditions which are None are ignored
+
+        select_list : str = None
+        A SQL select list used instead of the columns, e.g. "COUNT(*)"
+
+        Returns:
+        select_query : str
+        The SELECT statement
+        """
+        quote = engine.dialect.identifier_preparer.quote
+        if select_list is None:
+            if not columns:
+                select_list = "*"
+            elif isinstance(columns, dict):
+                select_list = ", ".join(
+                    quote(column) if column == alias else f"{quote(column)} AS {quote(alias)}"
+                    for column, alias in columns.items()
+                )
+            else:
+                select_list = ", ".join(quote(column) for column in columns)
+
+        select_query = f"SELECT {select_list} FROM {quote(table_name)}"
+        conditions = [condition for condition in conditions or [] if condition]
+        if len(conditions) == 1:
+            select_query += f" WHERE {conditions[0]}"
+        elif conditions:
+            select_query += " WHERE " + " AND ".join(f"({condition})" for condition in conditions)
+        return select_query
+
+    def _get_column_dtypes(self, column_type_codes : dict, schema_columns : dict):
+        """
+        Utility method to work out the pandas dtypes of a table's columns
+
+        Parameters:
+        column_type_codes : dict
+        A dictionary of column names to the PostgreSQL type OIDs reported by the database
+
+        schema_columns : dict
+        A dictionary of column names to the column types from database_schema.yaml.
+        These take priority over the type OIDs
+
+        Returns:
+        column_dtypes, date_columns : Tuple
+        A dictionary of column names to pandas dtypes, and a list of the date columns
+        """
+        column_dtypes = {}
+        date_columns = []
+        for column_name, type_code in column_type_codes.items():
+            if column_name in schema_columns:
+                column_type_name = schema_columns[column_name].split("(")[0].strip()
+                column_dtype = self.dtype_mapping.get(column_type_name, str)
+            else:
+                # Any type not in the mapping, such as text, is read as a string
+                column_dtype = self.postgres_oid_mapping.get(type_code, str)
+
+            if column_dtype is None:
+                date_columns.append(column_name)
+                column_dtype = str
+            column_dtypes[column_name] = column_dtype
+
+        data_extraction_logger.debug(f"Column dtypes : {column_dtypes}")
+        return column_dtypes, date_columns
+
+    def compact_dtypes(
+        self,
+        dataframe : pd.DataFrame,
+        schema_config : dict,
+        schema_table_name : str,
+        column_aliases : dict = None,
+        category_ratio : float = 0.5
+    ):
+        """
+        Method to convert the columns of an extracted DataFrame to compact dtypes,
+        using the column types of a table in database_schema.yaml
+
+        VARCHAR columns with few distinct values become categoricals,
+        other VARCHAR and UUID columns become Arrow-backed strings,
+        and integer columns are downcast to the smallest integer dtype which holds their values.
+        Columns whose values do not match their schema type yet, such as raw numbers stored as text,
+        are left for the cleaners.
+
+        Parameters:
+        dataframe : pd.DataFrame
+        The extracted DataFrame
+
+        schema_config : dict
+        The contents of database_schema.yaml
+
+        schema_table_name : str
+        The name of the table inside schema_config whose column types are used
+
+        column_aliases : dict = None
+        A dictionary of extracted column names to their names in the schema table,
+        for columns which are renamed by the cleaners, e.g. {"removed": "availability"}
+
+        category_ratio : float = 0.5
+        VARCHAR columns with fewer distinct values than this fraction of their values become categoricals
+
+        Returns:
+        dataframe : pd.DataFrame
+        The DataFrame with compact dtypes
+        """
+        schema_columns = schema_config["schemas"]["tables"].get(schema_table_name, {})
+        column_aliases = column_aliases or {}
+        memory_before = dataframe.memory_usage(deep=True).sum()
+
+        compact_columns = {}
+        for column_name in dataframe.columns:
+            column_type = schema_columns.get(column_aliases.get(column_name, column_name))
+            if column_type is None:
+                continue
+            column_type_name = column_type.split("(")[0].strip()
+            column = dataframe[column_name]
+
+            if column_type_name in ("VARCHAR", "UUID"):
+                # Only columns holding nothing but strings are converted
+                if pd.api.types.infer_dtype(column, skipna=True) != "string":
+                    continue
+                non_null_count = column.count()
+                if (
+                    column_type_name == "VARCHAR"
+                    and non_null_count
+                    and column.nunique() < category_ratio * non_null_count
+                ):
+                    compact_columns[column_name] = column.astype("category")
+                else:
+                    compact_columns[column_name] = column.astype("string[pyarrow]")
+
+            elif self.dtype_mapping.get(column_type_name) == "Int64":
+                compact_column = self._downcast_integers(column)
+                if compact_column is not None:
+                    compact_columns[column_name] = compact_column
+
+        if compact_columns:
+            dataframe = dataframe.assign(**compact_columns)
+        memory_after = dataframe.memory_usage(deep=True).sum()
+
+        memory_saved = memory_before - memory_after
+        saving_percentage = 100 * memory_saved / memory_before if memory_before else 0
+        data_extraction_logger.info(
+            f"Compacted {len(compact_columns)} columns of {schema_table_name} : "
+            f"{memory_before / 1024 ** 2:.2f} MB to {memory_after / 1024 ** 2:.2f} MB ({saving_percentage:.1f}% saved)"
+        )
+        data_extraction_logger.debug(f"Compact dtypes : {dataframe.dtypes.astype(str).to_dict()}")
+        print(f"{schema_table_name} : {saving_percentage:.1f}% less memory with compact dtypes")
+        return dataframe
+
+    @staticmethod
+    def _downcast_integers(column : pd.Series):
+        """
+        Utility method to downcast a column of whole numbers to the smallest integer dtype which holds them
+
+        Parameters:
+        column : pd.Series
+        The column to downcast
+
+        Returns:
+        compact_column : pd.Series
+        The downcast column, or None if the column holds values which are not whole numbers
+        """
+        if not pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+            return None
+        non_null_values = column.dropna()
+        if len(non_null_values) == 0 or not (non_null_values == non_null_values.round()).all():
+            return None
+
+        minimum_value, maximum_value = non_null_values.min(), non_null_values.max()
+        for integer_dtype in ("int8", "int16", "int32", "int64"):
+            integer_range = np.iinfo(integer_dtype)
+            if integer_range.min <= minimum_value and maximum_value <= integer_range.max:
+                # Columns with nulls use pandas' nullable integer dtypes
+                if column.isna().any():
+                    integer_dtype = integer_dtype.capitalize()
+                return column.astype(integer_dtype)
+        return None
+
+    def extract_with_cache(
+        self,
+        source_id : str,
+        fingerprint : str,
+        extract_function : Callable,
+        *args,
+        bypass_cache : bool = False,
+        **kwargs
+    ):
+        """
+        Method to extract a DataFrame, reusing the cached copy if its source is unchanged
+
+        Parameters:
+        source_id : str
+        The identity of the source, such as a url or a table name
+
+        fingerprint : str
+        A fingerprint of the source's content from one of the get_*_fingerprint methods.
+        If this is None, the source cannot be fingerprinted and is always extracted
+
+        extract_function : Callable
+        The method used to extract the source, e.g. read_s3_bucket_to_dataframe
+
+        *args, **kwargs
+        The arguments passed to the extract_function
+
+        bypass_cache : bool = False
+        If True, the source is always extracted and the cache is not read or written
+
+        Returns:
+        dataframe : pd.DataFrame
+        The extracted DataFrame
+        """
+        use_cache = self.cache is not None and fingerprint is not None and not bypass_cache
+        if use_cache:
+            dataframe = self.cache.get(source_id, fingerprint)
+            if dataframe is not None:
+                data_extraction_logger.info(f"Reusing cached extract of {source_id}")
+                return dataframe
+
+        data_extraction_logger.info(f"Extracting {source_id}")
+        dataframe = extract_function(*args, **kwargs)
+        if use_cache:
+            self.cache.put(source_id, fingerprint, dataframe)
+        return dataframe
+
+    def get_s3_fingerprint(self, s3_url : str):
+        """
+        Method to fingerprint an object in an s3_bucket using its ETag
+
+        Parameters:
+        s3_url : str
+        The url of the object, either as s3://bucket/key or https://bucket.s3.../key
+
+        Returns:
+        fingerprint : str
+        The ETag of the object
+        """
+        if s3_url.startswith("s3://"):
+            bucket_name, key = self._parse_s3_url(s3_url)
+        else:
+            bucket_name, key = self.parse_s3_url_json(s3_url)
+
+        s3_client = self._get_s3_client()
+        response = s3_client.head_object(Bucket=bucket_name, Key=key)
+        fingerprint = response["ETag"]
+        data_extraction_logger.debug(f"Fingerprint of {s3_url} : {fingerprint}")
+        return fingerprint
+
+    def get_http_fingerprint(self, url : str):
+        """
+        Method to fingerprint a file served over HTTP using its ETag or Last-Modified header
+
+        Parameters:
+        url : str
+        The url of the file
+
+        Returns:
+        fingerprint : str
+        The ETag or Last-Modified header, or None if the server sends neither
+        """
+        request = urllib.request.Request(url, method="HEAD")
+        with urllib.request.urlopen(request) as response:
+            fingerprint = response.headers.get("ETag") or response.headers.get("Last-Modified")
+        data_extraction_logger.debug(f"Fingerprint of {url} : {fingerprint}")
+        return fingerprint
+
+    def get_rds_fingerprint(self, table_name : str, engine : Engine, key_column : str = None):
+        """
+        Method to fingerprint a table in an RDS using its row count and largest key
+
+        Parameters:
+        table_name : str
+        The name of the table from the source database
+
+        engine : Engine
+        The Engine object which represents either the source or target database
+
+        key_column : str = None
+        The name of an increasing key column. By default, only the row count is used
+
+        Returns:
+        fingerprint : str
+        The row count and largest key of the table
+        """
+        quote = engine.dialect.identifier_preparer.quote
+        max_key = f"max({quote(key_column)})" if key_column else "NULL"
+        with engine.connect() as connection:
+            row_count, largest_key = connection.execute(
+                text(f"SELECT count(*), {max_key} FROM {quote(table_name)}")
+            ).one()
+        fingerprint = f"{row_count}:{largest_key}"
+        data_extraction_logger.debug(f"Fingerprint of {table_name} : {fingerprint}")
+        return fingerprint
 
     def retrieve_pdf_data(self, link_to_pdf: str):
         """
@@ -113,6 +1011,10 @@ class DataExtractor:
             raise ValueError("Invalid PDF Link")
 
         try:
+            if self.fetcher is not None:
+                # Read the stored copy of the pdf if it is unchanged
+                link_to_pdf, _ = self.fetcher.fetch(link_to_pdf)
+
             data_extraction_logger.info("Reading in PDF table")
             # Read in the pdf_table using tabula-py ensuring all pages are captured
             pdf_table = tabula.read_pdf(
@@ -155,7 +1057,193 @@ class DataExtractor:
             print(f"Error occured while retrieving PDF data: {str(e)}")
             raise Exception
 
-    def read_s3_bucket_to_dataframe(self, s3_url: str):
+    def retrieve_pdf_data_in_parallel(self, link_to_pdf : str, max_workers : int = 4):
+        """
+        Method to retrieve pdf data using tabula-py, reading the pages in parallel
+
+        Parameters:
+        link_to_pdf : str
+        The link to the pdf file, or a path to a local pdf file
+
+        max_workers : int = 4
+        The maximum number of page ranges read at the same time
+
+        Returns:
+        combined_table : DataFrame
+        The combined Pandas DataFrame, in page order
+        """
+        page_tables = dict(self.iter_pdf_pages(link_to_pdf, max_workers))
+        page_tables = [page_tables[page_number] for page_number in sorted(page_tables)]
+        page_tables = [page_table for page_table in page_tables if not page_table.empty]
+
+        if not page_tables:
+            data_extraction_logger.warning(
+                "No tables found inside the PDF. Empty DataFrame recieved"
+            )
+            print("No tables found in PDF")
+            return pd.DataFrame()
+
+        data_extraction_logger.info(f"Concatentating tables from {len(page_tables)} pages")
+        combined_table = pd.concat(page_tables, ignore_index=True)
+        data_extraction_logger.debug(f"Number of rows : {len(combined_table)}")
+        return combined_table
+
+    def iter_pdf_pages(self, link_to_pdf : str, max_workers : int = 4):
+        """
+        Method to read the pages of a pdf file in a thread pool, a contiguous range of pages per worker,
+        yielding the tables on each page as soon as its range has been read.
+
+        If the extractor has a cache, each page is cached by a hash of its content,
+        so pages which have not changed since the last run are not read again.
+
+        Parameters:
+        link_to_pdf : str
+        The link to the pdf file, or a path to a local pdf file
+
+        max_workers : int = 4
+        The maximum number of page ranges read at the same time.
+        If this is 1, the ranges are read one after another in this thread
+
+        Yields:
+        (page_number, page_table) : Tuple
+        The page number, starting from 1, and the tables on that page as a DataFrame.
+        Pages are yielded in the order they finish, not in page order
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+
+        is_local_file = os.path.isfile(link_to_pdf)
+        if not is_local_file and not self._is_valid_url(link_to_pdf):
+            data_extraction_logger.critical(
+                "Critical error. Please ensure that the PDF link is correct"
+            )
+            raise ValueError("Invalid PDF Link")
+
+        # Only a temporary download is removed once the pages have been read
+        is_temporary_file = False
+        if is_local_file:
+            pdf_file_path = link_to_pdf
+        elif self.fetcher is not None:
+            # Read the stored copy of the pdf if it is unchanged
+            pdf_file_path, _ = self.fetcher.fetch(link_to_pdf)
+        else:
+            # Download the pdf once rather than once for every page
+            data_extraction_logger.info(f"Downloading {link_to_pdf}")
+            with urllib.request.urlopen(link_to_pdf) as response, tempfile.NamedTemporaryFile(
+                suffix=".pdf", delete=False
+            ) as pdf_file:
+                shutil.copyfileobj(response, pdf_file)
+            pdf_file_path = pdf_file.name
+            is_temporary_file = True
+
+        try:
+            pdf_reader = pypdf.PdfReader(pdf_file_path)
+            data_extraction_logger.info(f"Found {len(pdf_reader.pages)} pages in {link_to_pdf}")
+
+            pages_to_read = {}
+            for page_number, page in enumerate(pdf_reader.pages, start=1):
+                page_contents = page.get_contents()
+                page_fingerprint = hashlib.sha256(
+                    page_contents.get_data() if page_contents is not None else b""
+                ).hexdigest()
+                page_source_id = f"{link_to_pdf}#page={page_number}"
+
+                page_table = (
+                    self.cache.get(page_source_id, page_fingerprint) if self.cache is not None else None
+                )
+                if page_table is not None:
+                    yield page_number, page_table
+                else:
+                    pages_to_read[page_number] = (page_source_id, page_fingerprint)
+
+            data_extraction_logger.info(
+                f"Reading {len(pages_to_read)} pages. {len(pdf_reader.pages) - len(pages_to_read)} pages were cached"
+            )
+            page_ranges = self._group_page_ranges(list(pages_to_read), max_workers)
+            if max_workers == 1:
+                page_tables = (
+                    page
+                    for first_page, last_page in page_ranges
+                    for page in _read_pdf_page_range(pdf_file_path, first_page, last_page).items()
+                )
+                yield from self._cache_pdf_pages(page_tables, pages_to_read)
+            else:
+                # tabula-py runs tabula-java in its own subprocess, so threads are enough to read the ranges at the same time.
+                # A process pool would fork this process while the pipeline threads hold the logging, boto3 and pool locks.
+                # tabula-py starts a JVM for each read, so each worker reads a whole range of pages
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [
+                        executor.submit(_read_pdf_page_range, pdf_file_path, first_page, last_page)
+                        for first_page, last_page in page_ranges
+                    ]
+                    page_tables = (
+                        page for future in as_completed(futures) for page in future.result().items()
+                    )
+                    yield from self._cache_pdf_pages(page_tables, pages_to_read)
+
+        except Exception as e:
+            data_extraction_logger.exception(
+                "An error occured while retrieving PDF data"
+            )
+            print(f"Error occured while retrieving PDF data: {str(e)}")
+            raise Exception
+        finally:
+            if is_temporary_file:
+                os.remove(pdf_file_path)
+
+    @staticmethod
+    def _group_page_ranges(page_numbers : list, max_workers : int):
+        """
+        Utility method to group the pages iter_pdf_pages has to read into contiguous ranges,
+        splitting long ranges so that there is about one range for each worker
+
+        Parameters:
+        page_numbers : list
+        The page numbers to read, in ascending order
+
+        max_workers : int
+        The number of workers the ranges are shared between
+
+        Returns:
+        page_ranges : list
+        A list of (first_page, last_page) tuples
+        """
+        if not page_numbers:
+            return []
+        range_length = -(-len(page_numbers) // max_workers)
+
+        page_ranges = []
+        first_page = previous_page = page_numbers[0]
+        for page_number in page_numbers[1:]:
+            # Start a new range at a gap left by a cached page, or once the range is long enough
+            if page_number != previous_page + 1 or page_number - first_page == range_length:
+                page_ranges.append((first_page, previous_page))
+                first_page = page_number
+            previous_page = page_number
+        page_ranges.append((first_page, previous_page))
+        return page_ranges
+
+    def _cache_pdf_pages(self, page_tables, pages_to_read : dict):
+        """
+        Utility method to cache each page read by iter_pdf_pages as it is yielded
+
+        Parameters:
+        page_tables : Iterable
+        The (page_number, page_table) tuples of the pages which have been read
+
+        pages_to_read : dict
+        A dictionary of each page number to its (source_id, fingerprint) in the cache
+
+        Yields:
+        (page_number, page_table) : Tuple
+        """
+        for page_number, page_table in page_tables:
+            data_extraction_logger.debug(f"Read page {page_number} : {len(page_table)} rows")
+            if self.cache is not None:
+                self.cache.put(*pages_to_read[page_number], page_table)
+            yield page_number, page_table
+
+    def read_s3_bucket_to_dataframe(self, s3_url: str, chunksize: int = None):
         """
         Method to read data from an s3_bucket into a Pandas Dataframe
 
@@ -163,11 +1251,19 @@ class DataExtractor:
         s3_url
         The url to the s3_bucket
 
+        chunksize : int = None
+        The number of rows in each chunk. If set, the object is parsed
+        a chunk at a time as it is downloaded
+
         Returns:
         dataframe: DataFrame
-        A pandas dataframe for the raw data from the S3 bucket
+        A pandas dataframe for the raw data from the S3 bucket,
+        or an iterator of DataFrames if chunksize is set
 
         """
+        if chunksize is not None and chunksize < 1:
+            raise ValueError("chunksize must be a positive integer")
+
         data_extraction_logger.info(f"Validating {s3_url}...")
         # Validation of the s3_url format
         if not self._validate_s3_url(s3_url):
@@ -177,11 +1273,8 @@ class DataExtractor:
             raise ValueError("Invalid S3 URL format")
         data_extraction_logger.info(f"s3_url {s3_url} successfully validated")
 
-        data_extraction_logger.info("Creating instance of s3_client using boto3")
-        # Make an instance of the boto3 object to use s3
-        s3_client = boto3.client("s3")
-        data_extraction_logger.debug("s3_client created succesfully")
-        data_extraction_logger.debug(s3_client)
+        # Use the shared instance of the boto3 object to use s3
+        s3_client = self._get_s3_client()
 
         try:
             # Assign the bucket_name and the key to a tuple which is the output of the previous function.
@@ -193,15 +1286,12 @@ class DataExtractor:
             # Use the get_object method to collect items in the bucket. Index it on the key.
             response = s3_client.get_object(Bucket=bucket_name, Key=key)
 
-            data_extraction_logger.info("Reading data from s3_bucket")
-            # Extract the data getting the values assigned to each key, then decode it using utf-8 encoding
-            data = response["Body"].read().decode("utf-8")
-
-            data_extraction_logger.info(
-                "Extracted data from s3_bucket. Reading data into a dataframe"
-            )
-            # Lastly, read the csv into pandas as a dataframe, then return the dataframe as an output.
-            dataframe = pd.read_csv(StringIO(data), delimiter=",")
+            data_extraction_logger.info("Reading data from s3_bucket into a dataframe")
+            # Parse the body as it streams in, rather than holding the raw bytes and the decoded text as well
+            dataframe = self._parse_s3_body(response["Body"], "csv", chunksize)
+            if chunksize is not None:
+                data_extraction_logger.info(f"Reading data in chunks of {chunksize} rows")
+                return dataframe
             data_extraction_logger.info("Successfully read data into a DataFrame")
             return dataframe
         except Exception as e:
@@ -211,6 +1301,135 @@ class DataExtractor:
             print(f"Error occurred while reading S3 bucket '{bucket_name}/{key}': {e}")
             raise Exception
 
+    def read_s3_prefix_to_dataframe(self, s3_url_prefix : str, max_workers : int = 8):
+        """
+        Method to read every .csv and .json object under an s3 prefix concurrently
+        into a single Pandas Dataframe, e.g. partitioned product exports
+
+        Parameters:
+        s3_url_prefix : str
+        The url of the prefix, e.g. s3://data-handling-public/products/
+
+        max_workers : int = 8
+        The maximum number of objects read at the same time
+
+        Returns:
+        dataframe : DataFrame
+        A pandas dataframe of every object under the prefix, concatenated in order of their keys
+
+        """
+        data_extraction_logger.info(f"Validating {s3_url_prefix}...")
+        if not self._validate_s3_url(s3_url_prefix):
+            data_extraction_logger.exception(
+                "Failed to validate S3 URL due to its format. Please check the format."
+            )
+            raise ValueError("Invalid S3 URL format")
+
+        bucket_name, prefix = self._parse_s3_url(s3_url_prefix)
+        s3_client = self._get_s3_client()
+
+        try:
+            data_extraction_logger.info(f"Listing objects in {bucket_name} under {prefix}")
+            paginator = s3_client.get_paginator("list_objects_v2")
+            keys = sorted(
+                s3_object["Key"]
+                for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+                for s3_object in page.get("Contents", [])
+                if s3_object["Key"].endswith((".csv", ".json"))
+            )
+            data_extraction_logger.info(f"Found {len(keys)} objects : {keys}")
+            if not keys:
+                data_extraction_logger.warning(f"No .csv or .json objects found under {s3_url_prefix}")
+                return pd.DataFrame()
+
+            # The client's connection pool lets each worker reuse its own connection
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+                dataframes = list(
+                    executor.map(lambda key: self._read_s3_object(bucket_name, key), keys)
+                )
+
+            dataframe = pd.concat(dataframes, ignore_index=True)
+            data_extraction_logger.info(f"Successfully read {len(keys)} objects into a DataFrame")
+            data_extraction_logger.debug(f"Number of rows : {len(dataframe)}")
+            return dataframe
+        except Exception as e:
+            data_extraction_logger.exception(
+                f"Error occurred while reading S3 prefix '{bucket_name}/{prefix}': {e}"
+            )
+            print(f"Error occurred while reading S3 prefix '{bucket_name}/{prefix}': {e}")
+            raise Exception
+
+    def _read_s3_object(self, bucket_name : str, key : str):
+        """
+        Utility method to read a single .csv or .json object from an s3_bucket into a Pandas Dataframe
+
+        Parameters:
+        bucket_name : str
+        The name of the bucket
+
+        key : str
+        The key of the object
+
+        Returns:
+        dataframe : DataFrame
+        A pandas dataframe of the object
+        """
+        data_extraction_logger.debug(f"Reading {bucket_name}/{key}")
+        response = self._get_s3_client().get_object(Bucket=bucket_name, Key=key)
+        file_type = "json" if key.endswith(".json") else "csv"
+        return self._parse_s3_body(response["Body"], file_type)
+
+    @staticmethod
+    def _parse_s3_body(body, file_type : str, chunksize : int = None):
+        """
+        Utility method to parse the streaming body of an s3 object straight into a Pandas Dataframe,
+        without reading and decoding the whole object first
+
+        Parameters:
+        body : StreamingBody
+        The body of the response from get_object
+
+        file_type : str
+        Either "csv" or "json"
+
+        chunksize : int = None
+        The number of rows in each chunk. Chunked .json objects must be newline-delimited
+
+        Returns:
+        dataframe : DataFrame
+        A pandas dataframe of the object, or an iterator of DataFrames if chunksize is set
+        """
+        if file_type == "json":
+            # The json reader works on text, so decode the stream as it is read
+            text_stream = TextIOWrapper(body, encoding="utf-8")
+            if chunksize is None:
+                return pd.read_json(text_stream)
+            return pd.read_json(text_stream, lines=True, chunksize=chunksize)
+        return pd.read_csv(body, delimiter=",", encoding="utf-8", chunksize=chunksize)
+
+    def _get_s3_client(self):
+        """
+        Utility method to get the s3_client shared by every S3 read.
+        The client is thread-safe, and its connection pool is sized so that
+        concurrent reads do not wait on each other for a connection
+
+        Returns:
+        s3_client : S3.Client
+        The shared boto3 client for s3
+        """
+        with self._s3_client_lock:
+            if self.s3_client is None:
+                data_extraction_logger.info("Creating instance of s3_client using boto3")
+                self.s3_client = boto3.client(
+                    "s3",
+                    config=Config(
+                        max_pool_connections=self.s3_max_pool_connections,
+                        retries={"max_attempts": 5, "mode": "standard"},
+                    ),
+                )
+                data_extraction_logger.debug(f"s3_client created succesfully : {self.s3_client}")
+        return self.s3_client
+
     def _validate_s3_url(self, s3_url: str) -> bool:
         """
         Validate the format of the S3 URL
@@ -294,7 +1513,7 @@ class DataExtractor:
             raise Exception
 
 
-    def read_json_from_s3(self, bucket_url: str):
+    def read_json_from_s3(self, bucket_url: str, chunksize: int = None):
         """
         Method to read in a .json file from an s3_bucket on AWS
 
@@ -302,18 +1521,23 @@ class DataExtractor:
         bucket_url : str
         The link to the bucket
 
+        chunksize : int = None
+        The number of rows in each chunk. If set, the .json file must be
+        newline-delimited, with one record per line
+
         Returns
         df: DataFrame
 
-        A pandas dataframe of the .json file
+        A pandas dataframe of the .json file, or an iterator of DataFrames if chunksize is set
 
         None if reading the .json from s3 throws an exception.
 
         """
-        data_extraction_logger.info("Creating instance of s3_client")
-        # Create an instance of the boto3 client for s3
-        s3_client = boto3.client("s3")
-        data_extraction_logger.debug(f"Starting session using : {s3_client}")
+        if chunksize is not None and chunksize < 1:
+            raise ValueError("chunksize must be a positive integer")
+
+        # Use the shared instance of the boto3 client for s3
+        s3_client = self._get_s3_client()
 
         data_extraction_logger.info(f"Validating s3_url : {bucket_url}")
         # Set the bucket_name and key of the bucket to the output of the method
@@ -322,13 +1546,20 @@ class DataExtractor:
         # Try to get the object from the s3_bucket
         try:
             data_extraction_logger.info(f"Getting objects from .json file : {key}")
-            response = s3_client.get_object(Bucket=bucket_name, Key=key)
-            # Get the body of the .json file and decode it with utf-8 encoding
-            json_data = response["Body"].read().decode("utf-8")
-
-            data_extraction_logger.info("Reading data into DataFrame")
-            # Lastly, read the json_data into a pandas dataframe and return it
-            df = pd.read_json(json_data)
+            if self.fetcher is not None:
+                # Read the stored copy of the .json file if it is unchanged
+                payload_file_path, _ = self.fetcher.fetch_s3_object(bucket_url, s3_client, bucket_name, key)
+                data_extraction_logger.info("Reading data into DataFrame")
+                df = pd.read_json(payload_file_path, lines=chunksize is not None, chunksize=chunksize)
+            else:
+                response = s3_client.get_object(Bucket=bucket_name, Key=key)
+
+                data_extraction_logger.info("Reading data into DataFrame")
+                # Lastly, parse the body of the .json file into a pandas dataframe and return it
+                df = self._parse_s3_body(response["Body"], "json", chunksize)
+            if chunksize is not None:
+                data_extraction_logger.info(f"Reading data in chunks of {chunksize} rows")
+                return df
             data_extraction_logger.info("Succesfully read data into DataFrame")
             data_extraction_logger.debug(f"Number of rows : {len(df)}")
             return df
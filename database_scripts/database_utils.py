@@ -3,11 +3,16 @@ from sqlalchemy import create_engine
 from sqlalchemy import inspect
 from sqlalchemy import text
 from sqlalchemy import MetaData, Table, Column, VARCHAR, DATE, FLOAT, SMALLINT, BOOLEAN, TIME, NUMERIC, TIMESTAMP, INTEGER, UUID, DATETIME, DECIMAL, BIGINT
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError
 from database_scripts.file_handler import get_absolute_file_path
+from database_scripts.schema_registry import SchemaRegistry, parse_column_type
+from database_scripts.sql_script_runner import SqlScriptRunner
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
 import pandas as pd
+import threading
 import os
 import logging
 
@@ -39,8 +44,44 @@ file_handler.setFormatter(format)
 database_utils_logger.addHandler(file_handler)
 
 
+class BulkLoadRebuildError(Exception):
+    """
+    Raised when the indexes or constraints dropped by DatabaseConnector.bulk_load() cannot all be rebuilt
+
+    Attributes:
+    failures : list
+    A list of (statement, error) tuples, one for each statement which failed
+    """
+    def __init__(self, failures : list):
+        self.failures = failures
+        failed_statements = "\n".join(f"{statement} : {error}" for statement, error in failures)
+        super().__init__(f"{len(failures)} indexes or constraints could not be rebuilt:\n{failed_statements}")
+
+
 class DatabaseConnector:
-    def __init__(self):
+    def __init__(self, copy_threshold : int = 10000, staged_index_columns : dict = None, merge_keys : dict = None, surrogate_keys : dict = None, pool_settings : dict = None):
+                # Frames with at least this many rows are loaded using COPY by default
+                self.copy_threshold = copy_threshold
+                # The settings of the connection pool of each engine, passed on to create_engine
+                self.pool_settings = {
+                    "pool_size": 5,
+                    "max_overflow": 10,
+                    "pool_pre_ping": True,
+                    "pool_recycle": 1800,
+                    **(pool_settings or {}),
+                }
+                # One pooled engine is kept for each connection string and isolation level
+                self._engines = {}
+                self._engines_lock = threading.Lock()
+                # The compiled SchemaRegistry of each schema_config, keyed by the id of the schema_config
+                self._schema_registries = {}
+                self._schema_registries_lock = threading.Lock()
+                # The columns indexed on the staging table of each table loaded with "staged_replace"
+                self.staged_index_columns = staged_index_columns or {}
+                # The natural key column of each table loaded with "merge"
+                self.merge_keys = merge_keys or {}
+                # The surrogate key column of each table loaded with "merge", which a merge never changes
+                self.surrogate_keys = surrogate_keys or {}
                 self.type_mapping =  {
             "BIGINT": BIGINT,
             "VARCHAR": VARCHAR,
@@ -180,17 +221,10 @@ class DatabaseConnector:
 
         # Lastly try to connect to the database using your connection string variable
         try:
-            database_utils_logger.info(
-                "Creating database engine using sqlaclhemy's create_engine"
-            )
-            database_engine = create_engine(
-                connection_string, isolation_level=isolation_level
-            )
-            database_utils_logger.info(
-                f"Database Engine : {database_engine} created attempting to connect"
-            )
-            database_engine.connect()
-            database_utils_logger.info("connection successful")
+            database_engine = self.get_engine(connection_string, isolation_level)
+            # Check out a connection to test the engine, then return it to the pool
+            with database_engine.connect():
+                database_utils_logger.info("connection successful")
             print("connection successful")
             return database_engine
         except OperationalError:
@@ -198,7 +232,75 @@ class DatabaseConnector:
                 "OperationalError detected. Error connecting to the database"
             )
             print("Error Connecting to the Database")
-            raise OperationalError
+            raise
+
+    def get_engine(self, connection_string : str, isolation_level : str = "AUTOCOMMIT"):
+        """
+        Method to get the pooled engine for a connection string. 
+        The engine is created on the first call, and the same engine is returned on every call after, 
+        so every pipeline shares one connection pool for each database
+
+        Parameters:
+        connection_string : str
+        The connection string of the database
+
+        isolation_level : str = AUTOCOMMIT
+        The level of isolation for the database transaction.
+        By default, this is set to AUTOCOMMIT
+
+        Returns:
+        database_engine : Engine
+        A database engine object
+        """
+        with self._engines_lock:
+            database_engine = self._engines.get((connection_string, isolation_level))
+            if database_engine is None:
+                database_utils_logger.info(
+                    "Creating database engine using sqlaclhemy's create_engine"
+                )
+                database_engine = create_engine(
+                    connection_string, isolation_level=isolation_level, **self.pool_settings
+                )
+                self._engines[(connection_string, isolation_level)] = database_engine
+                database_utils_logger.info(
+                    f"Database Engine : {database_engine} created with {self.pool_settings}"
+                )
+        return database_engine
+
+    @contextmanager
+    def get_connection(self, database_engine : Engine, isolation_level : str = None):
+        """
+        Method to check out a connection from the pool of an engine. 
+        The connection is returned to the pool when the with block ends, even if an error is raised
+
+        Parameters:
+        database_engine : Engine
+        The Engine object for the database
+
+        isolation_level : str = None
+        An optional isolation level for this connection only, 
+        e.g. READ COMMITTED to run a transaction on an AUTOCOMMIT engine. 
+        By default, the isolation level of the engine is used
+
+        Yields:
+        connection : Connection
+        A database connection
+        """
+        with database_engine.connect() as connection:
+            if isolation_level:
+                # The pool resets the isolation level when the connection is returned
+                connection.execution_options(isolation_level=isolation_level)
+            yield connection
+
+    def dispose_engines(self):
+        """
+        Method to close the connection pools of every engine created by get_engine()
+        """
+        with self._engines_lock:
+            for database_engine in self._engines.values():
+                database_engine.dispose()
+            database_utils_logger.info(f"Disposed of {len(self._engines)} database engines")
+            self._engines.clear()
 
     def list_db_tables(self, engine : Engine): # , config_file_name: str, database_name: str
         """
@@ -259,23 +361,7 @@ class DatabaseConnector:
                     A dictionary which matches the column type to an integer 
 
             """
-            # Split the desired column name by the first occurence of the '(' character
-            # NOTE: the *column_parameters will set everything else that is split to a list. 
-            column_type_name, *column_parameters = column_type.split('(')
-            # Strip the Whitespace from the column_name 
-            column_type_name = column_type_name.strip()
-            # For the column_parameters variable select the first element of the list,
-            # then remove the last character from the list. 
-            # Afterwards, apply the split method to split the rest of the string by ','s
-            # If the column_parameters variable is empty return an empty list
-            column_parameters = column_parameters[0][:-1].split(',') if column_parameters else []
-            # Map the variable to a SQLAlchemy Type
-            column_type_object = self.type_mapping[column_type_name]
-            # If condition for if column_parameters is not empty
-            if column_parameters:
-                # convert each value in the column_parameter variable to an integer
-                column_type_object = column_type_object(*map(int, column_parameters))
-            return column_type_object
+            return parse_column_type(column_type, self.type_mapping)
 
     def generate_table_schema(self, table_name : str, columns : dict):
         """
@@ -319,16 +405,58 @@ class DatabaseConnector:
         
         return table    
 
+    def load_schema(self, schema_file_path : str, compiled_file_path : str = None):
+        """
+        Method to load a database schema yaml file and compile it into a SchemaRegistry, 
+        which upload_to_db() then uses whenever it is passed the returned schema_config
+
+        Parameters:
+        schema_file_path : str
+        The path to database_schema.yaml
+
+        compiled_file_path : str = None
+        An optional path to save the compiled schema to, so that later runs skip parsing the yaml file
+
+        Returns:
+        schema_config : dict
+        The database schema
+        """
+        schema_registry = SchemaRegistry.from_yaml(schema_file_path, self.type_mapping, compiled_file_path)
+        with self._schema_registries_lock:
+            self._schema_registries[id(schema_registry.schema_config)] = schema_registry
+        return schema_registry.schema_config
+
+    def get_schema_registry(self, schema_config : dict):
+        """
+        Method to get the compiled SchemaRegistry of a database schema. 
+        The schema is compiled on the first call, and the same registry is returned on every call after
+
+        Parameters:
+        schema_config : dict
+        The database schema
+
+        Returns:
+        schema_registry : SchemaRegistry
+        """
+        with self._schema_registries_lock:
+            schema_registry = self._schema_registries.get(id(schema_config))
+            # The registry holds a reference to its schema_config, so the id cannot be reused by another dictionary
+            if schema_registry is None or schema_registry.schema_config is not schema_config:
+                schema_registry = SchemaRegistry(schema_config, self.type_mapping)
+                self._schema_registries[id(schema_config)] = schema_registry
+        return schema_registry
+
     def upload_to_db(
         self,
         dataframe: pd.DataFrame,
         connection : Engine,
         table_name: str,
-        table_condition : str = "append" or "replace" or "fail",
+        table_condition : str = "append" or "replace" or "fail" or "staged_replace" or "merge",
         mapping: dict = None,
         subset: list = None,
         additional_rows: list = None,
-        schema_config=None
+        schema_config=None,
+        load_method: str = None
     ):
         """
         Method to upload the table to the database
@@ -343,8 +471,10 @@ class DatabaseConnector:
         table_name : str
         The name of the table to be uploaded to the database
 
-        table_condition : str = "append" or "replace" or "fail" 
-        The table condition specified either append, replace or fail
+        table_condition : str = "append" or "replace" or "fail" or "staged_replace" or "merge"
+        The table condition specified either append, replace, fail, staged_replace or merge. 
+        staged_replace loads the table using staged_replace() so that readers never see a missing or half-written table. 
+        merge upserts the rows using merge_into_table(), keyed on the natural key of the table in merge_keys
 
         mapping : dict = None 
         An optional parameter to apply mapping to the dataframe. 
@@ -357,6 +487,10 @@ class DatabaseConnector:
         additional_rows : list = None 
         An optional parameter to add additional rows to the start of the dataframe. 
         By default, it is None 
+
+        load_method : str = None 
+        Either "copy" to stream the rows using COPY ... FROM STDIN, or "insert" to use INSERT statements. 
+        By default, it is None, in which case "copy" is used for dataframes of at least copy_threshold rows 
         """
         if mapping:
             # Apply the mapping to the specified column
@@ -381,20 +515,34 @@ class DatabaseConnector:
             dataframe = pd.concat(
                 [additional_rows_df, dataframe]
             ).reset_index(drop=True)
+        insert_method = self._get_insert_method(dataframe, load_method)
+
+        if table_condition == "merge" and table_name not in self.merge_keys:
+            database_utils_logger.error(f"No merge key configured for {table_name}")
+            raise ValueError(f"No merge key configured for {table_name}")
+
         try:
             database_utils_logger.info(
-                f"Attempting to upload table {table_name} to the database"
+                f"Attempting to upload table {table_name} to the database using {'copy' if insert_method else 'insert'}"
             )
+            column_dtypes = None
             if schema_config:
                 # Upload with a schema attached
-                column_types = schema_config["schemas"]["tables"][table_name]
-                table_schema = self.generate_table_schema(table_name, column_types)
-                dataframe.to_sql(table_name, con=connection, if_exists=table_condition, dtype={col.name: col.type for col in table_schema.columns}, index=False)
-                database_utils_logger.info("Table Uploaded")
+                column_dtypes = self.get_schema_registry(schema_config).get_dtypes(table_name)
+
+            if table_condition == "staged_replace":
+                self.staged_replace(
+                    dataframe, connection, table_name, column_dtypes, insert_method,
+                    self.staged_index_columns.get(table_name)
+                )
+            elif table_condition == "merge":
+                self.merge_into_table(
+                    dataframe, connection, table_name, self.merge_keys[table_name],
+                    column_dtypes, insert_method, self.surrogate_keys.get(table_name)
+                )
             else:
-                # Upload with no schema attached
-                dataframe.to_sql(table_name, con=connection, if_exists=table_condition, index=False)
-                database_utils_logger.info("Table Uploaded")
+                dataframe.to_sql(table_name, con=connection, if_exists=table_condition, dtype=column_dtypes, index=False, method=insert_method)
+            database_utils_logger.info("Table Uploaded")
 
         except:
             database_utils_logger.exception(
@@ -403,20 +551,1079 @@ class DatabaseConnector:
             print("Error uploading table to the database")
             raise Exception
         
+    def append_with_watermark(
+        self,
+        dataframe : pd.DataFrame,
+        database_engine : Engine,
+        table_name : str,
+        pipeline_name : str,
+        key_column : str,
+        watermark,
+        schema_config = None,
+        load_method : str = None
+    ):
+        """
+        Method to append a chunk of an incremental load to a table and move the watermark of its pipeline on 
+        in the same transaction. If the load stops between chunks, the next run starts after the last chunk 
+        which was committed, so no chunk is lost or appended twice
+
+        Parameters:
+        dataframe : pd.DataFrame
+        The chunk to append
+
+        database_engine : Engine
+        The Engine object for the target database
+
+        table_name : str
+        The name of the table to append to
+
+        pipeline_name : str
+        The name of the pipeline the watermark belongs to
+
+        key_column : str
+        The name of the column the watermark is taken from
+
+        watermark
+        The largest value of the key_column in the chunk
+
+        schema_config = None
+        The database schema the column types of the table are taken from
+
+        load_method : str = None
+        Either "copy" or "insert", as in upload_to_db()
+        """
+        insert_method = self._get_insert_method(dataframe, load_method)
+        column_dtypes = self.get_schema_registry(schema_config).get_dtypes(table_name) if schema_config else None
+
+        # The target engine is in AUTOCOMMIT, so switch this connection back to transactions
+        with self.get_connection(database_engine, "READ COMMITTED") as connection:
+            with connection.begin():
+                dataframe.to_sql(table_name, con=connection, if_exists="append", dtype=column_dtypes, index=False, method=insert_method)
+                self._save_watermark(connection, pipeline_name, key_column, watermark)
+        database_utils_logger.info(
+            f"{len(dataframe)} rows appended to {table_name} and the watermark for {pipeline_name} updated to {watermark}"
+        )
+
+    def _get_insert_method(self, dataframe : pd.DataFrame, load_method : str = None):
+        """
+        Utility method to choose the insertion method DataFrame.to_sql loads a dataframe with
+
+        Returns:
+        insert_method
+        COPY ... FROM STDIN, or None for pandas' standard INSERT statements
+        """
+        if load_method is None:
+            # Default to COPY for large dataframes
+            load_method = "copy" if len(dataframe) >= self.copy_threshold else "insert"
+
+        if load_method not in ("copy", "insert"):
+            database_utils_logger.error(f"Invalid load_method {load_method}")
+            raise ValueError("Invalid load_method. Only 'copy' or 'insert' are allowed.")
+
+        # None lets pandas fall back to its standard INSERT statements
+        return self._copy_from_stdin if load_method == "copy" else None
+
+    def staged_replace(
+        self,
+        dataframe : pd.DataFrame,
+        database_engine : Engine,
+        table_name : str,
+        dtype : dict = None,
+        insert_method = None,
+        index_columns : list = None,
+        set_logged : bool = True
+    ):
+        """
+        Method to replace a table without readers seeing it missing or half-written.
+        The dataframe is loaded into an UNLOGGED staging table, so the bulk insert skips the WAL,
+        and the indexes are built there. The staging table is made logged again and then renamed over the table
+        in a short transaction, so readers are only blocked for the swap itself.
+
+        Parameters:
+        dataframe : pd.DataFrame
+        The dataframe to load
+
+        database_engine : Engine
+        The Engine object for the target database
+
+        table_name : str
+        The name of the table to replace
+
+        dtype : dict = None
+        An optional dictionary of the SQLAlchemy type of each column
+
+        insert_method = None
+        The insertion method passed to DataFrame.to_sql. By default, INSERT statements are used
+
+        index_columns : list = None
+        An optional list of the columns to index before the swap
+
+        set_logged : bool = True
+        Whether to make the table logged again before the swap, so that it survives a crash. 
+        Set it to False to leave the table UNLOGGED, which skips writing the table to the WAL a second time, 
+        but empties the table if the database crashes and leaves it out of replicas
+        """
+        staging_table_name = f"{table_name}_staging"
+        quote = database_engine.dialect.identifier_preparer.quote
+        index_columns = index_columns or []
+
+        database_utils_logger.info(f"Loading {table_name} into {staging_table_name}")
+        with self.get_connection(database_engine) as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {quote(staging_table_name)}"))
+            # Let pandas create the empty table, so the column types match a normal replace
+            dataframe.head(0).to_sql(staging_table_name, con=connection, if_exists="fail", dtype=dtype, index=False)
+            # Switching an empty table to UNLOGGED is instant
+            connection.execute(text(f"ALTER TABLE {quote(staging_table_name)} SET UNLOGGED"))
+            dataframe.to_sql(staging_table_name, con=connection, if_exists="append", dtype=dtype, index=False, method=insert_method)
+
+            for column in index_columns:
+                connection.execute(text(
+                    f"CREATE INDEX {quote(f'ix_{staging_table_name}_{column}')} "
+                    f"ON {quote(staging_table_name)} ({quote(column)})"
+                ))
+            if set_logged:
+                # Rewrite the table into the WAL before it is swapped in, so it is not lost in a crash
+                connection.execute(text(f"ALTER TABLE {quote(staging_table_name)} SET LOGGED"))
+            connection.execute(text(f"ANALYZE {quote(staging_table_name)}"))
+            connection.commit()
+
+        database_utils_logger.info(f"Swapping {staging_table_name} in for {table_name}")
+        # The target engine is in AUTOCOMMIT, so switch this connection back to transactions for the swap
+        with self.get_connection(database_engine, "READ COMMITTED") as connection:
+            with connection.begin():
+                connection.execute(text(f"DROP TABLE IF EXISTS {quote(table_name)}"))
+                connection.execute(text(
+                    f"ALTER TABLE {quote(staging_table_name)} RENAME TO {quote(table_name)}"
+                ))
+                for column in index_columns:
+                    connection.execute(text(
+                        f"ALTER INDEX {quote(f'ix_{staging_table_name}_{column}')} "
+                        f"RENAME TO {quote(f'ix_{table_name}_{column}')}"
+                    ))
+        database_utils_logger.info(f"{table_name} replaced with {len(dataframe)} rows")
+
+    def merge_into_table(
+        self,
+        dataframe : pd.DataFrame,
+        database_engine : Engine,
+        table_name : str,
+        key_column : str,
+        dtype : dict = None,
+        insert_method = None,
+        surrogate_key : str = None
+    ):
+        """
+        Method to upsert a dataframe into a table, keyed on its natural key.
+        The rows are loaded into an UNLOGGED staging table and hashed on the server, the same way as promote_table() hashes them, 
+        so switching a table between the two does not rewrite every row. 
+        They are then merged with one UPDATE of the rows whose hash changed and one INSERT of the new keys. 
+        A rerun therefore costs in proportion to the rows which changed rather than the size of the table.
+
+        The table is created if it does not exist. A row_hash column and a unique index on the key_column 
+        are added to it if they are missing, so a table which already holds duplicate keys must be cleaned first. 
+        Rows with a NULL key, such as the Not Applicable and Unknown rows, are only inserted 
+        if the table does not already hold a row with the same surrogate key. 
+
+        The surrogate key of a row which is already in the table is never changed, as the fact table references it. 
+        It is left out of the row_hash, and new natural keys are numbered on from the largest surrogate key in the table, 
+        in the order of the surrogate keys of the dataframe. 
+
+        Parameters:
+        dataframe : pd.DataFrame
+        The dataframe to merge
+
+        database_engine : Engine
+        The Engine object for the target database
+
+        table_name : str
+        The name of the table to merge into
+
+        key_column : str
+        The natural key of the table, e.g. user_uuid
+
+        dtype : dict = None
+        An optional dictionary of the SQLAlchemy type of each column
+
+        insert_method = None
+        The insertion method passed to DataFrame.to_sql. By default, INSERT statements are used
+
+        surrogate_key : str = None
+        The surrogate key of the table, e.g. user_key. By default, every column is updated on a change
+
+        Returns:
+        merged_rows : int
+        The number of rows inserted or updated
+        """
+        staging_table_name = f"{table_name}_merge_staging"
+        quote = database_engine.dialect.identifier_preparer.quote
+
+        # A row can only be updated once by a statement, so keep the last row for each key
+        has_key = dataframe[key_column].notna()
+        staged_dataframe = pd.concat([
+            dataframe[~has_key],
+            dataframe[has_key].drop_duplicates(subset=[key_column], keep="last")
+        ])
+
+        quoted_staging_table = quote(staging_table_name)
+
+        database_utils_logger.info(f"Loading {len(staged_dataframe)} rows into {staging_table_name}")
+        with self.get_connection(database_engine) as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {quoted_staging_table}"))
+            staged_dataframe.head(0).to_sql(staging_table_name, con=connection, if_exists="fail", dtype=dtype, index=False)
+            connection.execute(text(f"ALTER TABLE {quoted_staging_table} SET UNLOGGED"))
+            staged_dataframe.to_sql(staging_table_name, con=connection, if_exists="append", dtype=dtype, index=False, method=insert_method)
+            connection.commit()
+
+        database_utils_logger.info(f"Merging {staging_table_name} into {table_name} on {key_column}")
+        with self.get_connection(database_engine, "READ COMMITTED") as connection:
+            with connection.begin():
+                if not inspect(connection).has_table(table_name):
+                    staged_dataframe.head(0).to_sql(table_name, con=connection, if_exists="fail", dtype=dtype, index=False)
+                merged_rows = self._merge_rows(
+                    connection, table_name, f"SELECT * FROM {quoted_staging_table}",
+                    list(staged_dataframe.columns), key_column, compute_row_hash=True, surrogate_key=surrogate_key
+                )
+                connection.execute(text(f"DROP TABLE {quoted_staging_table}"))
+
+        database_utils_logger.info(f"{merged_rows} of {len(staged_dataframe)} rows inserted or updated in {table_name}")
+        print(f"{merged_rows} of {len(staged_dataframe)} rows inserted or updated in {table_name}")
+        return merged_rows
+
+    def promote_table(
+        self,
+        database_engine : Engine,
+        source_table_name : str,
+        table_name : str,
+        table_condition : str = "append" or "replace" or "merge",
+        mapping : dict = None,
+        subset : list = None,
+        additional_rows : list = None,
+        schema_config = None
+    ):
+        """
+        Method to fill a table from a table already in the database, such as a dim_* table from its land_* table. 
+        The rows are copied with a single INSERT INTO ... SELECT on the server, along with the additional_rows, 
+        so the dataframe does not have to be uploaded a second time. 
+        The mapping, subset and additional_rows are applied the same way as in upload_to_db().
+
+        Parameters:
+        database_engine : Engine
+        The Engine object for the target database
+
+        source_table_name : str
+        The name of the table to copy the rows from, e.g. land_user_data
+
+        table_name : str
+        The name of the table to fill, e.g. dim_users
+
+        table_condition : str = "append" or "replace" or "merge"
+        The table condition specified either append, replace or merge. 
+        merge upserts the rows on the natural key of the table in merge_keys, the same way as merge_into_table()
+
+        mapping : dict = None 
+        An optional parameter to apply mapping to the availability column. 
+        By default, it is None 
+
+        subset : list = None 
+        An optional parameter to filter the rows by a list of country codes or currency codes. 
+        By defult, it is None 
+
+        additional_rows : list = None 
+        An optional parameter to add additional rows to the start of the table. 
+        By default, it is None 
+
+        schema_config = None
+        The database schema the column types of the table are taken from. 
+        By default, the column types of the source table are used
+
+        Returns:
+        promoted_rows : int
+        The number of rows inserted or updated
+        """
+        if table_condition not in ("append", "replace", "merge"):
+            database_utils_logger.error(f"Invalid table_condition {table_condition}")
+            raise ValueError("Invalid table_condition. Only 'append', 'replace' or 'merge' are allowed.")
+        if table_condition == "merge" and table_name not in self.merge_keys:
+            database_utils_logger.error(f"No merge key configured for {table_name}")
+            raise ValueError(f"No merge key configured for {table_name}")
+
+        database_utils_logger.info(f"Promoting {source_table_name} to {table_name} using {table_condition}")
+        with self.get_connection(database_engine, "READ COMMITTED") as connection:
+            with connection.begin():
+                source_columns = inspect(connection).get_columns(source_table_name)
+                # Take the column types from the schema if there is one, otherwise from the source table
+                column_types = {column["name"]: column["type"] for column in source_columns}
+                if schema_config:
+                    schema_dtypes = self.get_schema_registry(schema_config).get_dtypes(table_name)
+                    column_types.update({
+                        name: column_type for name, column_type in schema_dtypes.items() if name in column_types
+                    })
+                table = Table(table_name, MetaData(), *(Column(name, column_type) for name, column_type in column_types.items()))
+
+                if table_condition == "replace":
+                    table.drop(connection, checkfirst=True)
+                table.create(connection, checkfirst=True)
+
+                promotion_query, parameters = self._build_promotion_query(
+                    connection.dialect, source_table_name, table, mapping, subset, additional_rows
+                )
+                column_names = list(column_types)
+                if table_condition == "merge":
+                    promoted_rows = self._merge_rows(
+                        connection, table_name, promotion_query, column_names, self.merge_keys[table_name],
+                        parameters, compute_row_hash=True, surrogate_key=self.surrogate_keys.get(table_name)
+                    )
+                else:
+                    quote = connection.dialect.identifier_preparer.quote
+                    quoted_columns = ", ".join(quote(column) for column in column_names)
+                    promoted_rows = connection.execute(text(
+                        f"INSERT INTO {quote(table_name)} ({quoted_columns}) "
+                        f"SELECT {quoted_columns} FROM ({promotion_query}) AS promoted"
+                    ), parameters).rowcount
+
+        database_utils_logger.info(f"{promoted_rows} rows promoted from {source_table_name} to {table_name}")
+        print(f"{promoted_rows} rows promoted from {source_table_name} to {table_name}")
+        return promoted_rows
+
+    @staticmethod
+    def _build_promotion_query(
+        dialect, source_table_name : str, table : Table, mapping : dict = None, subset : list = None, additional_rows : list = None
+    ):
+        """
+        Utility method to build the SELECT which promote_table() inserts from. 
+        The additional_rows come first, followed by the rows of the source table, 
+        with every column cast to its type in the target table
+
+        Returns:
+        (promotion_query, parameters) : Tuple
+        The SELECT statement and its bound parameters
+        """
+        quote = dialect.identifier_preparer.quote
+        column_names = [column.name for column in table.columns]
+        column_types = {column.name: column.type.compile(dialect=dialect) for column in table.columns}
+        parameters = {}
+
+        selects = []
+        for row_number, row in enumerate(additional_rows or []):
+            row_columns = []
+            for column_number, column in enumerate(column_names):
+                if column in row:
+                    parameters[f"row_{row_number}_{column_number}"] = row[column]
+                    row_columns.append(f"CAST(:row_{row_number}_{column_number} AS {column_types[column]}) AS {quote(column)}")
+                else:
+                    row_columns.append(f"CAST(NULL AS {column_types[column]}) AS {quote(column)}")
+            selects.append(f"SELECT {', '.join(row_columns)}")
+
+        source_columns = []
+        for column in column_names:
+            column_expression = quote(column)
+            if mapping and column == "availability":
+                # Values missing from the mapping become NULL, the same as Series.map
+                cases = []
+                for mapping_number, (source_value, target_value) in enumerate(mapping.items()):
+                    parameters[f"map_from_{mapping_number}"] = source_value
+                    parameters[f"map_to_{mapping_number}"] = target_value
+                    cases.append(f"WHEN :map_from_{mapping_number} THEN :map_to_{mapping_number}")
+                column_expression = f"CASE {column_expression} {' '.join(cases)} END"
+            source_columns.append(f"CAST({column_expression} AS {column_types[column]}) AS {quote(column)}")
+        source_select = f"SELECT {', '.join(source_columns)} FROM {quote(source_table_name)}"
+
+        if subset:
+            # Filter on the country_code column, or the currency_code column if there is no country_code
+            subset_column = "country_code" if "country_code" in column_names else "currency_code"
+            subset_parameters = []
+            for subset_number, value in enumerate(subset):
+                parameters[f"subset_{subset_number}"] = value
+                subset_parameters.append(f":subset_{subset_number}")
+            source_select += f" WHERE {quote(subset_column)} IN ({', '.join(subset_parameters)})"
+        selects.append(source_select)
+
+        return " UNION ALL ".join(selects), parameters
+
+    def _merge_rows(
+        self, connection, table_name : str, source_query : str, column_names : list, key_column : str,
+        parameters : dict = None, compute_row_hash : bool = False, surrogate_key : str = None
+    ):
+        """
+        Utility method to upsert the rows of a SELECT into a table on its natural key, 
+        only updating the rows whose row_hash changed. 
+        If compute_row_hash is True, the row_hash is computed on the server, 
+        otherwise the SELECT must return a row_hash column. 
+        Without a surrogate_key, which row is kept for a duplicated key is undefined. 
+        The surrogate_key of existing rows is never updated, and new natural keys are numbered on from the largest one
+
+        Returns:
+        merged_rows : int
+        The number of rows inserted or updated
+        """
+        quote = connection.dialect.identifier_preparer.quote
+        quoted_table = quote(table_name)
+        quoted_key = quote(key_column)
+        quoted_columns = ", ".join(quote(column) for column in column_names + ["row_hash"])
+        if compute_row_hash:
+            # Hash the row on the server, using the first 64 bits of its md5
+            row = ", ".join(quote(column) for column in column_names if column != surrogate_key)
+            source_query = (
+                f"SELECT *, ('x' || substr(md5(ROW({row})::text), 1, 16))::bit(64)::bigint AS row_hash "
+                f"FROM ({source_query}) AS unhashed"
+            )
+
+        if "row_hash" not in {column["name"] for column in inspect(connection).get_columns(table_name)}:
+            connection.execute(text(f"ALTER TABLE {quoted_table} ADD COLUMN row_hash BIGINT"))
+        connection.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {quote(f'ux_{table_name}_{key_column}')} "
+            f"ON {quoted_table} ({quoted_key})"
+        ))
+
+        # Keep one row for each key, as a row of the table can only be updated once.
+        # The surrogate keys of the source are positional, so the row with the largest one is the last row, as in merge_into_table()
+        row_order = f" ORDER BY {quote(surrogate_key)} DESC" if surrogate_key else ""
+        deduplicated_query = (
+            f"SELECT * FROM ("
+            f"SELECT staged.*, ROW_NUMBER() OVER (PARTITION BY {quoted_key}{row_order}) AS merge_row_number "
+            f"FROM ({source_query}) AS staged WHERE {quoted_key} IS NOT NULL"
+            f") AS ranked WHERE merge_row_number = 1"
+        )
+
+        update_columns = ", ".join(
+            f"{quote(column)} = deduplicated.{quote(column)}"
+            for column in column_names + ["row_hash"] if column not in (key_column, surrogate_key)
+        )
+        merged_rows = connection.execute(text(
+            f"""
+            UPDATE {quoted_table}
+            SET {update_columns}
+            FROM ({deduplicated_query}) AS deduplicated
+            WHERE {quoted_table}.{quoted_key} = deduplicated.{quoted_key}
+            AND {quoted_table}.row_hash IS DISTINCT FROM deduplicated.row_hash
+            """
+        ), parameters).rowcount
+
+        if surrogate_key:
+            staged_surrogate_key = f"deduplicated.{quote(surrogate_key)}"
+            # Number the new natural keys on from the largest surrogate key, so no existing key moves.
+            # The -1 and 0 sentinel rows keep their keys
+            new_surrogate_key = (
+                f"CASE WHEN {staged_surrogate_key} <= 0 THEN {staged_surrogate_key} "
+                f"ELSE (SELECT COALESCE(MAX({quote(surrogate_key)}), 0) FROM {quoted_table}) + ROW_NUMBER() OVER ("
+                f"PARTITION BY CASE WHEN {staged_surrogate_key} <= 0 THEN 0 ELSE 1 END ORDER BY {staged_surrogate_key}"
+                f") END"
+            )
+            insert_columns = ", ".join(
+                new_surrogate_key if column == surrogate_key else f"deduplicated.{quote(column)}"
+                for column in column_names + ["row_hash"]
+            )
+            quoted_surrogate_key = quote(surrogate_key)
+            null_key_match = f"target.{quoted_surrogate_key} = staged.{quoted_surrogate_key}"
+        else:
+            insert_columns = ", ".join(f"deduplicated.{quote(column)}" for column in column_names + ["row_hash"])
+            null_key_match = "target.row_hash = staged.row_hash"
+
+        merged_rows += connection.execute(text(
+            f"""
+            INSERT INTO {quoted_table} ({quoted_columns})
+            SELECT {insert_columns}
+            FROM ({deduplicated_query}) AS deduplicated
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {quoted_table} AS target WHERE target.{quoted_key} = deduplicated.{quoted_key}
+            )
+            """
+        ), parameters).rowcount
+        # Rows without a natural key, such as the Not Applicable and Unknown rows, are matched on their surrogate key
+        merged_rows += connection.execute(text(
+            f"""
+            INSERT INTO {quoted_table} ({quoted_columns})
+            SELECT {quoted_columns} FROM ({source_query}) AS staged
+            WHERE staged.{quoted_key} IS NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM {quoted_table} AS target
+                WHERE target.{quoted_key} IS NULL AND {null_key_match}
+            )
+            """
+        ), parameters).rowcount
+        return merged_rows
+
+    @staticmethod
+    def _copy_from_stdin(table, connection, keys : list, data_iter):
+        """
+        Insertion method for DataFrame.to_sql which streams rows into
+        PostgreSQL using COPY ... FROM STDIN instead of INSERT statements
+
+        Parameters:
+        table : SQLTable
+        The pandas SQLTable being written to
+
+        connection : Connection
+        The SQLAlchemy connection used by to_sql
+
+        keys : list
+        The names of the columns being inserted
+
+        data_iter : iterable
+        An iterable of the rows to be inserted
+
+        Returns:
+        rowcount : int
+        The number of rows copied into the table
+        """
+        # Write the rows into an in-memory csv buffer.
+        # COPY reads an unquoted empty field as NULL and a quoted one as an empty string,
+        # so every value is quoted and only None values are written as bare empty fields
+        csv_buffer = StringIO()
+        csv_buffer.writelines(
+            ",".join("" if value is None else '"' + str(value).replace('"', '""') + '"' for value in row) + "\n"
+            for row in data_iter
+        )
+        csv_buffer.seek(0)
+
+        quote = connection.dialect.identifier_preparer.quote
+        table_name = quote(table.name)
+        if table.schema:
+            table_name = f"{quote(table.schema)}.{table_name}"
+        column_names = ", ".join(quote(key) for key in keys)
+
+        database_utils_logger.debug(f"Copying rows into {table_name}")
+        # Use the raw DBAPI cursor as COPY is not supported through SQLAlchemy
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table_name} ({column_names}) FROM STDIN WITH CSV", csv_buffer
+            )
+            return cursor.rowcount
+
+    @contextmanager
+    def bulk_load(self, database_engine : Engine, table_names : list, max_workers : int = 4, keep_unique_indexes : bool = True):
+        """
+        Method to drop the indexes and constraints of tables while they are loaded, then rebuild them once afterwards, 
+        so that each inserted row does not pay for index maintenance and foreign key checks. 
+        Use it as a context manager around the loads:
+
+            with connector.bulk_load(target_engine, ["orders_table"]):
+                connector.upload_to_db(...)
+
+        Foreign keys on other tables which reference the tables are dropped too, as they depend on the primary keys. 
+        The indexes and primary or unique constraints of different tables are rebuilt in parallel, followed by the foreign keys. 
+        Every statement is attempted, and a BulkLoadRebuildError listing each failed statement is raised at the end
+
+        Parameters:
+        database_engine : Engine
+        The Engine object for the target database
+
+        table_names : list
+        The names of the tables being loaded
+
+        max_workers : int = 4
+        The maximum number of tables rebuilt at the same time
+
+        keep_unique_indexes : bool = True
+        Whether to leave unique indexes which are not constraints in place, 
+        as the merge table_condition keeps its keys unique with them
+
+        Yields:
+        table_definitions : list
+        A dictionary for each dropped index or constraint, with its table_name, name, kind and definition
+        """
+        table_definitions = self._get_table_definitions(database_engine, table_names, keep_unique_indexes)
+        database_utils_logger.info(f"Dropping {len(table_definitions)} indexes and constraints on {table_names}")
+        with self.get_connection(database_engine, "READ COMMITTED") as connection:
+            with connection.begin():
+                # Foreign keys go first, as they depend on the primary keys they reference
+                for kind in ("foreign_key", "constraint", "index"):
+                    for table_definition in table_definitions:
+                        if table_definition["kind"] == kind:
+                            connection.execute(text(self._drop_statement(connection.dialect, table_definition)))
+
+        try:
+            yield table_definitions
+        except BaseException:
+            # Put the indexes and constraints back before letting the load error through
+            self._rebuild_table_definitions(database_engine, table_definitions, max_workers)
+            raise
+
+        failures = self._rebuild_table_definitions(database_engine, table_definitions, max_workers)
+        if failures:
+            raise BulkLoadRebuildError(failures)
+
+    def _get_table_definitions(self, database_engine : Engine, table_names : list, keep_unique_indexes : bool = True):
+        """
+        Utility method to read the definitions of the indexes and constraints of tables from the PostgreSQL catalog
+
+        Returns:
+        table_definitions : list
+        A dictionary for each index or constraint, with its table_name, name, kind and definition
+        """
+        with self.get_connection(database_engine) as connection:
+            constraints = connection.execute(text(
+                """
+                SELECT relation.relname AS table_name, con.conname AS name,
+                    CASE WHEN con.contype = 'f' THEN 'foreign_key' ELSE 'constraint' END AS kind,
+                    pg_get_constraintdef(con.oid) AS definition
+                FROM pg_constraint AS con
+                JOIN pg_class AS relation ON relation.oid = con.conrelid
+                JOIN pg_namespace AS namespace ON namespace.oid = relation.relnamespace
+                LEFT JOIN pg_class AS referenced ON referenced.oid = con.confrelid
+                WHERE namespace.nspname = current_schema()
+                AND con.contype IN ('p', 'u', 'f')
+                AND (relation.relname = ANY(:table_names) OR referenced.relname = ANY(:table_names))
+                ORDER BY relation.relname, con.conname
+                """
+            ), {"table_names": list(table_names)}).mappings().all()
+
+            # Indexes which back a constraint are dropped and rebuilt along with the constraint
+            indexes = connection.execute(text(
+                """
+                SELECT relation.relname AS table_name, index_relation.relname AS name,
+                    'index' AS kind, pg_get_indexdef(ind.indexrelid) AS definition, ind.indisunique AS is_unique
+                FROM pg_index AS ind
+                JOIN pg_class AS index_relation ON index_relation.oid = ind.indexrelid
+                JOIN pg_class AS relation ON relation.oid = ind.indrelid
+                JOIN pg_namespace AS namespace ON namespace.oid = relation.relnamespace
+                WHERE namespace.nspname = current_schema()
+                AND relation.relname = ANY(:table_names)
+                AND NOT EXISTS (
+                    SELECT 1 FROM pg_constraint AS con
+                    WHERE con.conindid = ind.indexrelid AND con.conrelid = ind.indrelid
+                )
+                ORDER BY relation.relname, index_relation.relname
+                """
+            ), {"table_names": list(table_names)}).mappings().all()
+
+        table_definitions = [dict(constraint) for constraint in constraints]
+        for index in indexes:
+            if keep_unique_indexes and index["is_unique"]:
+                continue
+            table_definitions.append(
+                {key: value for key, value in index.items() if key != "is_unique"}
+            )
+        return table_definitions
+
+    def _rebuild_table_definitions(self, database_engine : Engine, table_definitions : list, max_workers : int = 4):
+        """
+        Utility method to rebuild dropped indexes and constraints. 
+        The tables are rebuilt in parallel, with the statements for each table run one after another
+
+        Returns:
+        failures : list
+        A list of (statement, error) tuples, one for each statement which failed
+        """
+        failures = []
+
+        def rebuild_table(statements):
+            table_failures = []
+            for statement in statements:
+                try:
+                    with self.get_connection(database_engine) as connection:
+                        with connection.begin():
+                            connection.execute(text(statement))
+                    database_utils_logger.info(f"Rebuilt : {statement}")
+                except Exception as e:
+                    database_utils_logger.exception(f"Failed to rebuild : {statement}")
+                    table_failures.append((statement, e))
+            return table_failures
+
+        # The foreign keys need the primary keys they reference, so they are rebuilt last
+        for kinds in (("index", "constraint"), ("foreign_key",)):
+            statements_by_table = {}
+            for table_definition in table_definitions:
+                if table_definition["kind"] in kinds:
+                    statements_by_table.setdefault(table_definition["table_name"], []).append(
+                        self._create_statement(database_engine.dialect, table_definition)
+                    )
+            if not statements_by_table:
+                continue
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(statements_by_table))) as executor:
+                for table_failures in executor.map(rebuild_table, statements_by_table.values()):
+                    failures.extend(table_failures)
+
+        if failures:
+            print(f"{len(failures)} indexes or constraints could not be rebuilt. Please view the logs")
+        database_utils_logger.info(
+            f"Rebuilt {len(table_definitions) - len(failures)} of {len(table_definitions)} indexes and constraints"
+        )
+        return failures
+
+    @staticmethod
+    def _drop_statement(dialect, table_definition : dict):
+        """
+        Utility method to create the statement which drops an index or constraint
+        """
+        quote = dialect.identifier_preparer.quote
+        if table_definition["kind"] == "index":
+            return f"DROP INDEX IF EXISTS {quote(table_definition['name'])}"
+        return (
+            f"ALTER TABLE {quote(table_definition['table_name'])} "
+            f"DROP CONSTRAINT IF EXISTS {quote(table_definition['name'])}"
+        )
+
+    @staticmethod
+    def _create_statement(dialect, table_definition : dict):
+        """
+        Utility method to create the statement which rebuilds an index or constraint
+        """
+        quote = dialect.identifier_preparer.quote
+        if table_definition["kind"] == "index":
+            # pg_get_indexdef returns the full CREATE INDEX statement
+            return table_definition["definition"]
+        return (
+            f"ALTER TABLE {quote(table_definition['table_name'])} "
+            f"ADD CONSTRAINT {quote(table_definition['name'])} {table_definition['definition']}"
+        )
+
+    def get_watermark(self, database_engine : Engine, pipeline_name : str):
+        """
+        Method to read the watermark of a pipeline from the ctrl_watermarks table.
+        The table is created if it does not exist yet.
+
+        Parameters:
+        database_engine : Engine
+        The Engine object for the target database
+
+        pipeline_name : str
+        The name of the pipeline the watermark belongs to
+
+        Returns:
+        watermark : str
+        The last value of the key_column loaded by the pipeline, or None if it has not been loaded yet
+        """
+        with database_engine.begin() as connection:
+            connection.execute(text(
+                """
+                CREATE TABLE IF NOT EXISTS ctrl_watermarks (
+                    pipeline_name VARCHAR(255) PRIMARY KEY,
+                    key_column VARCHAR(255) NOT NULL,
+                    watermark VARCHAR(255) NOT NULL,
+                    last_updated TIMESTAMP NOT NULL DEFAULT now()
+                )
+                """
+            ))
+            watermark = connection.execute(
+                text("SELECT watermark FROM ctrl_watermarks WHERE pipeline_name = :pipeline_name"),
+                {"pipeline_name": pipeline_name},
+            ).scalar()
+
+        database_utils_logger.info(f"Watermark for {pipeline_name} : {watermark}")
+        return watermark
+
+    def update_watermark(
+        self, database_engine : Engine, pipeline_name : str, key_column : str, watermark
+    ):
+        """
+        Method to save the watermark of a pipeline to the ctrl_watermarks table
+
+        Parameters:
+        database_engine : Engine
+        The Engine object for the target database
+
+        pipeline_name : str
+        The name of the pipeline the watermark belongs to
+
+        key_column : str
+        The name of the column the watermark is taken from
+
+        watermark
+        The largest value of the key_column which has been loaded
+        """
+        with database_engine.begin() as connection:
+            self._save_watermark(connection, pipeline_name, key_column, watermark)
+        database_utils_logger.info(f"Watermark for {pipeline_name} updated to {watermark}")
+
+    @staticmethod
+    def _save_watermark(connection, pipeline_name : str, key_column : str, watermark):
+        """
+        Utility method to upsert the watermark of a pipeline on a connection, 
+        so that it can share a transaction with the rows it covers
+        """
+        connection.execute(
+            text(
+                """
+                INSERT INTO ctrl_watermarks (pipeline_name, key_column, watermark, last_updated)
+                VALUES (:pipeline_name, :key_column, :watermark, now())
+                ON CONFLICT (pipeline_name) DO UPDATE
+                SET key_column = EXCLUDED.key_column,
+                    watermark = EXCLUDED.watermark,
+                    last_updated = EXCLUDED.last_updated
+                """
+            ),
+            {"pipeline_name": pipeline_name, "key_column": key_column, "watermark": str(watermark)},
+        )
+
+    def load_key_maps(self, database_engine : Engine, foreign_keys : list):
+        """
+        Method to read the natural key to surrogate key map of each dimension table,
+        so that the foreign keys of a fact table can be resolved before it is loaded.
+        Each dimension table is read once, however many foreign keys use it.
+
+        Parameters:
+        database_engine : Engine
+        The Engine object for the target database
+
+        foreign_keys : list
+        A list of dictionaries with the target_column, dimension_table, dimension_key
+        and dimension_value of each foreign key, as in the loading.foreign_keys config
+
+        Returns:
+        key_maps : dict
+        A dictionary of each target_column to a Series of the dimension_value, indexed by the dimension_key.
+        The natural keys are strings, and the sentinel rows and rows without a natural key are left out
+        """
+        # Group the columns needed from each dimension table, so that each table is read once
+        dimension_columns = {}
+        for foreign_key in foreign_keys:
+            columns = dimension_columns.setdefault(foreign_key["dimension_table"], [])
+            for column in (foreign_key["dimension_key"], foreign_key["dimension_value"]):
+                if column not in columns:
+                    columns.append(column)
+
+        dimension_tables = {}
+        with database_engine.connect() as connection:
+            quote = connection.dialect.identifier_preparer.quote
+            for dimension_table, columns in dimension_columns.items():
+                dimension_tables[dimension_table] = pd.read_sql_query(
+                    text(f"SELECT {', '.join(quote(column) for column in columns)} FROM {quote(dimension_table)}"),
+                    connection,
+                )
+                database_utils_logger.info(
+                    f"Read {len(dimension_tables[dimension_table])} rows of {dimension_table} for key resolution"
+                )
+
+        key_maps = {}
+        for foreign_key in foreign_keys:
+            dimension_dataframe = dimension_tables[foreign_key["dimension_table"]]
+            dimension_key = foreign_key["dimension_key"]
+            dimension_value = foreign_key["dimension_value"]
+            dimension_dataframe = dimension_dataframe[dimension_dataframe[dimension_key].notna()]
+            if dimension_value.endswith("_key"):
+                # The -1 and 0 sentinel rows are not real members of the dimension
+                dimension_dataframe = dimension_dataframe[dimension_dataframe[dimension_value] > 0]
+            # Natural keys are compared as strings, as the natural key columns of the orders table are strings
+            key_map = pd.Series(
+                dimension_dataframe[dimension_value].to_numpy(),
+                index=dimension_dataframe[dimension_key].astype(str),
+            )
+            # A lookup needs each natural key once. Keep the last row, as a merge does
+            key_maps[foreign_key["target_column"]] = key_map[~key_map.index.duplicated(keep="last")]
+        return key_maps
+
+    def create_schema_indexes(self, database_engine : Engine, schema_config : dict, table_names : list = None):
+        """
+        Method to create the indexes declared in the indexes section of database_schema.yaml.
+        An index is not created if the table already has an index which starts with the same column,
+        e.g. the unique index a merge creates on the natural key
+
+        Parameters:
+        database_engine : Engine
+        The Engine object for the target database
+
+        schema_config : dict
+        The database schema, as returned by load_schema()
+
+        table_names : list = None
+        The tables to create the indexes of. By default, every table with indexes in the schema
+
+        Returns:
+        created_indexes : list
+        The names of the indexes which were created
+        """
+        schema_registry = self.get_schema_registry(schema_config)
+        if table_names is None:
+            table_names = list(schema_config["schemas"].get("indexes", {}))
+
+        created_indexes = []
+        with self.get_connection(database_engine, "READ COMMITTED") as connection:
+            with connection.begin():
+                inspector = inspect(connection)
+                for table_name in table_names:
+                    indexes = schema_registry.get_indexes(table_name)
+                    if not indexes:
+                        continue
+                    indexed_columns = {
+                        existing_index["column_names"][0]
+                        for existing_index in inspector.get_indexes(table_name)
+                        if existing_index["column_names"]
+                    }
+                    for index in indexes:
+                        column_name = index.columns[0].name
+                        if column_name in indexed_columns:
+                            database_utils_logger.info(f"{table_name}.{column_name} is already indexed. Skipping {index.name}")
+                            continue
+                        index.create(connection)
+                        indexed_columns.add(column_name)
+                        created_indexes.append(index.name)
+                    # Refresh the statistics so that the planner can use the new indexes
+                    connection.execute(text(f"ANALYZE {connection.dialect.identifier_preparer.quote(table_name)}"))
+
+        database_utils_logger.info(f"Created the indexes {created_indexes}")
+        return created_indexes
+
+    def update_foreign_keys(
+        self,
+        database_engine : Engine,
+        table_name : str,
+        key_column : str,
+        foreign_keys : list,
+        unknown_key : int = 0,
+        not_applicable_key : int = -1,
+        explain_file_path : str = None,
+    ):
+        """
+        Method to fill every foreign key of a fact table in a single UPDATE, 
+        joining the fact table to all of its dimension tables at once.
+        This is the in-database counterpart of DataCleaning.resolve_foreign_keys, 
+        for fact tables which were loaded without their keys
+
+        Parameters:
+        database_engine : Engine
+        The Engine object for the target database
+
+        table_name : str
+        The name of the fact table, e.g. orders_table
+
+        key_column : str
+        A unique column of the fact table, which the resolved rows are joined back on
+
+        foreign_keys : list
+        A list of dictionaries with the target_column, source_column, dimension_table,
+        dimension_key and dimension_value of each foreign key, as in the loading.foreign_keys config
+
+        unknown_key : int = 0
+        The key given to rows whose natural key is not in the dimension table
+
+        not_applicable_key : int = -1
+        The key given to rows without a natural key
+
+        explain_file_path : str = None
+        An optional file to save the EXPLAIN output of the UPDATE to, before it is run
+
+        Returns:
+        rowcount : int
+        The number of rows of the fact table which were updated
+        """
+        with self.get_connection(database_engine, "READ COMMITTED") as connection:
+            update_query = text(
+                self._build_key_resolution_query(connection.dialect, table_name, key_column, foreign_keys)
+            )
+            parameters = {"unknown_key": unknown_key, "not_applicable_key": not_applicable_key}
+
+            with connection.begin():
+                if explain_file_path:
+                    self.explain(connection, update_query, parameters, explain_file_path)
+                rowcount = connection.execute(update_query, parameters).rowcount
+
+        database_utils_logger.info(f"Resolved the foreign keys of {rowcount} rows of {table_name}")
+        print(f"Resolved the foreign keys of {rowcount} rows of {table_name}")
+        return rowcount
+
+    def explain(self, connection, statement, parameters : dict = None, explain_file_path : str = None):
+        """
+        Method to get the query plan of a statement without running it
+
+        Parameters:
+        connection : Connection
+        A connection to the database
+
+        statement : TextClause
+        The statement to explain
+
+        parameters : dict = None
+        The bound parameters of the statement
+
+        explain_file_path : str = None
+        An optional file to save the query plan to, e.g. for the benchmarks
+
+        Returns:
+        query_plan : str
+        The output of EXPLAIN, one line of the plan per line
+        """
+        explain_statement = text(f"EXPLAIN {statement.text}")
+        query_plan = "\n".join(
+            str(row[0]) for row in connection.execute(explain_statement, parameters or {})
+        )
+        database_utils_logger.debug(query_plan)
+
+        if explain_file_path:
+            os.makedirs(os.path.dirname(os.path.abspath(explain_file_path)), exist_ok=True)
+            with open(explain_file_path, "w") as explain_file:
+                explain_file.write(f"{statement.text}\n\n{query_plan}\n")
+            database_utils_logger.info(f"Saved the query plan to {explain_file_path}")
+        return query_plan
+
+    @staticmethod
+    def _build_key_resolution_query(dialect, table_name : str, key_column : str, foreign_keys : list):
+        """
+        Utility method to build the UPDATE which update_foreign_keys() runs.
+        Each dimension table is LEFT JOINed once on its natural key, without casts, so that the natural key indexes can be used. 
+        A foreign key whose source_column is resolved by an earlier foreign key joins on that value, 
+        e.g. the currency_key on the country_code of the store.
+        Unmatched rows are given :unknown_key, and rows without a natural key :not_applicable_key
+
+        Returns:
+        update_query : str
+        """
+        quote = dialect.identifier_preparer.quote
+        joins = {}
+        resolved_expressions = {}
+        select_columns = [f"source.{quote(key_column)}"]
+
+        for foreign_key in foreign_keys:
+            target_column = foreign_key["target_column"]
+            dimension_value = foreign_key["dimension_value"]
+            # Look up columns resolved earlier in this statement, rather than their values before the update
+            source_expression = resolved_expressions.get(
+                foreign_key["source_column"], f"source.{quote(foreign_key['source_column'])}"
+            )
+
+            join_signature = (foreign_key["dimension_table"], foreign_key["dimension_key"], source_expression)
+            if join_signature not in joins:
+                dimension_alias = f"dimension_{len(joins)}"
+                join_condition = f"{dimension_alias}.{quote(foreign_key['dimension_key'])} = {source_expression}"
+                if dimension_value.endswith("_key"):
+                    # The -1 and 0 sentinel rows are not real members of the dimension
+                    join_condition += f" AND {dimension_alias}.{quote(dimension_value)} > 0"
+                joins[join_signature] = (
+                    dimension_alias,
+                    f"LEFT JOIN {quote(foreign_key['dimension_table'])} AS {dimension_alias} ON {join_condition}",
+                )
+            dimension_alias = joins[join_signature][0]
+
+            value_expression = f"{dimension_alias}.{quote(dimension_value)}"
+            resolved_expressions[target_column] = value_expression
+            if target_column.endswith("_key"):
+                value_expression = (
+                    f"COALESCE({value_expression}, CASE WHEN {source_expression} IS NULL "
+                    f"THEN :not_applicable_key ELSE :unknown_key END)"
+                )
+            select_columns.append(f"{value_expression} AS {quote(target_column)}")
+
+        target_columns = [quote(foreign_key["target_column"]) for foreign_key in foreign_keys]
+        set_clause = ", ".join(f"{column} = resolved.{column}" for column in target_columns)
+        select_clause = ",\n        ".join(select_columns)
+        join_clause = "\n    ".join(join for _, join in joins.values())
+        # Rows which already have the right keys are not rewritten
+        changed_condition = "\n    OR ".join(
+            f"target.{column} IS DISTINCT FROM resolved.{column}" for column in target_columns
+        )
+
+        return (
+            f"UPDATE {quote(table_name)} AS target\n"
+            f"SET {set_clause}\n"
+            f"FROM (\n"
+            f"    SELECT {select_clause}\n"
+            f"    FROM {quote(table_name)} AS source\n"
+            f"    {join_clause}\n"
+            f") AS resolved\n"
+            f"WHERE target.{quote(key_column)} = resolved.{quote(key_column)}\n"
+            f"AND ({changed_condition})"
+        )
+
     def create_database(self, database_name: str, connection_string : str):
         # Create the database with the provided database_name and database_username
-        
-        connection = create_engine(connection_string)
-        database_engine = connection.connect()
-        if database_engine:
-            # Disable transactional behavior
-            database_engine.execution_options(isolation_level="AUTOCOMMIT")
-
+        # CREATE DATABASE cannot run inside a transaction, so use an AUTOCOMMIT engine
+        database_engine = self.get_engine(connection_string, "AUTOCOMMIT")
+        with self.get_connection(database_engine) as connection:
             # Check if the database exists
             check_db_stmt = text(
-                f"SELECT 1 FROM pg_database WHERE datname = '{database_name}'"
+                "SELECT 1 FROM pg_database WHERE datname = :database_name"
             )
-            result = database_engine.execute(check_db_stmt)
+            result = connection.execute(check_db_stmt, {"database_name": database_name})
 
             if result.scalar():
                 # Database already exists, so skip database creation
@@ -428,48 +1635,65 @@ class DatabaseConnector:
                 )
             else:
                 # Create a new database
-                create_db_stmt = text(f"CREATE DATABASE {database_name}")
-                database_engine.execute(create_db_stmt)
+                quote = connection.dialect.identifier_preparer.quote
+                create_db_stmt = text(f"CREATE DATABASE {quote(database_name)}")
+                connection.execute(create_db_stmt)
                 print(f"Database '{database_name}' created successfully.")
                 database_utils_logger.info(
                     f"Database '{database_name}' created successfully."
                 )
-
-            # Close the connection
-            database_engine.close()
-        else:
-            print("Connection to the database failed.")
-            database_utils_logger.error("Connection to the database failed.")
    
-    def alter_and_update(self, sql_file_path: str, database_engine : Engine):
-        # Create a session object using sessionmaker
-        sql_session = sessionmaker(bind=database_engine)
-        session = sql_session()
+    def alter_and_update(self, sql_file_path: str, database_engine : Engine, max_workers : int = 4):
+        '''
+        Method to run the statements of a .sql file against the database, recording the
+        duration and rowcount of each statement. Statements marked with -- @parallel run
+        at the same time on separate pooled connections
 
-        try:
-            with open(sql_file_path, "r") as file:
-                sql_statement = file.read()
-                print(sql_statement)
-            database_utils_logger.info(sql_statement)
-            database_utils_logger.info("Executing and committing sql_statement")
-            session.execute(text(sql_statement))
-            session.commit()
-            database_utils_logger.info(
-                "SQL statement submitted to database. Please verify."
+        Parameters:
+
+        sql_file_path : str
+
+        The path to the .sql file
+
+        database_engine : Engine
+
+        The engine of the database
+
+        max_workers : int = 4
+
+        The maximum number of statements which run at the same time
+
+        Returns:
+
+        statement_results : list
+
+        A list of dictionaries with the name, sql, status, rowcount and duration of each statement
+        '''
+        sql_script_runner = SqlScriptRunner(max_workers)
+        statement_results = sql_script_runner.run(sql_file_path, database_engine)
+
+        for statement_result in statement_results:
+            print(
+                f"{statement_result['name']} : {statement_result['status']}, "
+                f"{statement_result['rowcount']} rows, {(statement_result['duration'] or 0):.2f}s"
             )
-            print("SQL statement submitted to database. Please verify.")
-        except:
-            database_utils_logger.exception(
-                f"Error when running sql_statement. The sql statement submitted was {sql_statement}"
+
+        failed_statements = [
+            statement_result["name"] for statement_result in statement_results
+            if statement_result["status"] != "succeeded"
+        ]
+        if failed_statements:
+            database_utils_logger.error(
+                f"Error when running {sql_file_path}. The statements {failed_statements} did not succeed"
             )
             print(
-                f"Error when running sql_statement. The sql statement submitted was {sql_statement}"
+                f"Error when running {sql_file_path}. The statements {failed_statements} did not succeed"
             )
-            raise Exception
+            raise Exception(f"The statements {failed_statements} in {sql_file_path} did not succeed")
 
-        finally:
-            database_utils_logger.info("Closing Session")
-            session.close()
+        database_utils_logger.info(f"{sql_file_path} submitted to database. Please verify.")
+        print("SQL statement submitted to database. Please verify.")
+        return statement_results
 
 if __name__ == "__main__":
     yaml_file_path = "../credentials/db_creds.yaml"
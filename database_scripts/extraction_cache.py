@@ -0,0 +1,178 @@
+from database_scripts.file_handler import get_absolute_file_path
+import pandas as pd
+import hashlib
+import os
+import logging
+
+
+"""
+LOG CREATION
+"""
+log_filename = get_absolute_file_path(
+    "extraction_cache.log", "logs"
+)  # "logs/extraction_cache.log"
+if not os.path.exists(log_filename):
+    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
+
+extraction_cache_logger = logging.getLogger(__name__)
+
+# Set the default level as DEBUG
+extraction_cache_logger.setLevel(logging.DEBUG)
+
+# Format the logs by time, filename, function_name, level_name and the message
+format = logging.Formatter(
+    "%(asctime)s:%(filename)s:%(funcName)s:%(levelname)s:%(message)s"
+)
+file_handler = logging.FileHandler(log_filename)
+
+# Set the formatter to the variable format
+
+file_handler.setFormatter(format)
+
+extraction_cache_logger.addHandler(file_handler)
+
+
+class ExtractionCache:
+    '''
+    A class which caches extracted DataFrames on local disk as Parquet files.
+
+    Each entry is keyed by the identity of its source, such as a url or table name,
+    and a fingerprint of the source's content, such as an S3 ETag.
+    When the source changes, so does its fingerprint, so a stale entry is never reused.
+    The least recently used entries are evicted once the cache grows past max_size_bytes.
+
+    Attributes
+
+    cache_directory: The directory the Parquet files are stored in
+
+    max_size_bytes: The maximum total size of the cache
+
+    Methods
+
+    get()
+    put()
+    evict()
+    '''
+    def __init__(self, cache_directory : str, max_size_bytes : int = 2 * 1024 ** 3):
+        self.cache_directory = cache_directory
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+    def get(self, source_id : str, fingerprint : str):
+        '''
+        Method to read a DataFrame from the cache
+
+        Parameters:
+
+        source_id : str
+
+        The identity of the source, such as a url or a table name
+
+        fingerprint : str
+
+        A fingerprint of the source's content
+
+        Returns:
+
+        dataframe : pd.DataFrame
+
+        The cached DataFrame, or None if the source is not in the cache
+        '''
+        cache_file_path = self._get_cache_file_path(source_id, fingerprint)
+        try:
+            dataframe = pd.read_parquet(cache_file_path)
+        except FileNotFoundError:
+            extraction_cache_logger.info(f"Cache miss for {source_id} ({fingerprint})")
+            return None
+
+        # Mark the entry as recently used so it is evicted last
+        os.utime(cache_file_path)
+        extraction_cache_logger.info(f"Cache hit for {source_id} ({fingerprint})")
+        return dataframe
+
+    def put(self, source_id : str, fingerprint : str, dataframe : pd.DataFrame):
+        '''
+        Method to write a DataFrame to the cache
+
+        Parameters:
+
+        source_id : str
+
+        The identity of the source, such as a url or a table name
+
+        fingerprint : str
+
+        A fingerprint of the source's content
+
+        dataframe : pd.DataFrame
+
+        The DataFrame extracted from the source
+
+        Returns:
+
+        bool : True if the DataFrame was cached, False otherwise
+        '''
+        cache_file_path = self._get_cache_file_path(source_id, fingerprint)
+        # Write to a temporary file first so that readers never see a partial file
+        temporary_file_path = f"{cache_file_path}.{os.getpid()}.tmp"
+        try:
+            dataframe.to_parquet(temporary_file_path)
+            os.replace(temporary_file_path, cache_file_path)
+        except Exception:
+            # Raw extracts can hold columns of mixed types which Parquet cannot store
+            extraction_cache_logger.warning(
+                f"Unable to cache {source_id}. The source will be extracted again next run",
+                exc_info=True,
+            )
+            if os.path.exists(temporary_file_path):
+                os.remove(temporary_file_path)
+            return False
+
+        extraction_cache_logger.info(f"Cached {source_id} ({fingerprint})")
+        self.evict()
+        return True
+
+    def evict(self):
+        '''
+        Method to remove the least recently used entries until the cache fits within max_size_bytes
+
+        Returns:
+
+        evicted_files : list
+
+        The names of the files removed from the cache
+        '''
+        cache_files = []
+        for file_name in os.listdir(self.cache_directory):
+            if not file_name.endswith(".parquet"):
+                continue
+            file_path = os.path.join(self.cache_directory, file_name)
+            try:
+                file_stats = os.stat(file_path)
+            except FileNotFoundError:
+                # Another pipeline evicted the file first
+                continue
+            cache_files.append((file_stats.st_mtime, file_stats.st_size, file_name))
+
+        cache_size = sum(file_size for _, file_size, _ in cache_files)
+        evicted_files = []
+        for _, file_size, file_name in sorted(cache_files):
+            if cache_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_directory, file_name))
+            except FileNotFoundError:
+                pass
+            cache_size -= file_size
+            evicted_files.append(file_name)
+
+        if evicted_files:
+            extraction_cache_logger.info(f"Evicted {evicted_files} from the cache")
+        return evicted_files
+
+    def _get_cache_file_path(self, source_id : str, fingerprint : str):
+        '''
+        Utility method to get the path of the Parquet file for a cache entry
+        '''
+        cache_key = hashlib.sha256(f"{source_id}\n{fingerprint}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_directory, f"{cache_key}.parquet")
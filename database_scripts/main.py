@@ -3,6 +3,9 @@ from database_scripts.database_utils import DatabaseConnector
 from database_scripts.data_extraction import DataExtractor
 from database_scripts.data_cleaning import DataCleaning 
 from database_scripts.currency_rate_extraction import CurrencyExtractor
+from database_scripts.pipeline_scheduler import PipelineScheduler
+from database_scripts.extraction_cache import ExtractionCache
+from database_scripts.conditional_fetcher import ConditionalFetcher
 # Built-in python module imports 
 import logging 
 import os 
@@ -12,9 +15,6 @@ Opening configuration files
 
 """
 
-with open('../config/database_schema.yaml') as schema_file:
-    db_schema = yaml.safe_load(schema_file)
-
 with open('../config/main_config.yaml') as config_file:
     main_config = yaml.safe_load(config_file)
 
@@ -55,11 +55,49 @@ target_database_name = main_config['databases']['target_database'] # 'sales_data
 
 
 
+# Local cache of extracted source data, reused while the sources are unchanged
+extraction_cache = None
+if main_config['cache']['enabled']:
+    extraction_cache = ExtractionCache(
+        main_config['cache']['directory'] # "../cache"
+        , main_config['cache']['max_size_mb'] * 1024 ** 2
+    )
+bypass_cache = main_config['cache']['bypass']
+rds_key_columns = main_config['cache']['rds_key_columns']
+
+# Local copies of downloaded files, so that unchanged http and s3 sources are not downloaded again
+conditional_fetcher = None
+if main_config['cache']['enabled'] and not bypass_cache:
+    conditional_fetcher = ConditionalFetcher(
+        main_config['cache']['http_directory'] # "../cache/http"
+    )
+# Skipped pipelines leave their tables as they are, so this is only for runs which do not rebuild the database
+skip_unchanged_sources = conditional_fetcher is not None and main_config['cache']['skip_unchanged_sources']
+
+# The raw and land tables are either replaced in place, or loaded into a staging table and swapped in
+replace_operation = main_config['table_operations'][main_config['loading']['replace_mode']]
+
+# The dimension tables are either appended to, or merged on their natural keys
+dimension_operation = main_config['table_operations'][main_config['loading']['dimension_mode']]
+
+# The foreign keys of the orders table are either resolved before it is loaded, or updated from loading.foreign_keys by connector.update_foreign_keys
+resolve_foreign_keys = main_config['loading']['resolve_foreign_keys']
+
 # Instianting Classes 
-connector = DatabaseConnector()
-extractor = DataExtractor()
+connector = DatabaseConnector(
+    staged_index_columns=main_config['loading']['staged_index_columns']
+    , merge_keys=main_config['loading']['merge_keys']
+    , surrogate_keys=main_config['loading']['surrogate_keys']
+    , pool_settings=main_config['database_pool']
+)
+# Compile the database schema once, reusing the compiled copy from the last run if the schema is unchanged
+db_schema = connector.load_schema(
+    main_config['filepaths']['schema']['database_schema'] # "../config/database_schema.yaml"
+    , main_config['filepaths']['schema']['compiled_schema'] # "../cache/database_schema.pickle"
+)
+extractor = DataExtractor(extraction_cache, fetcher=conditional_fetcher)
 cleaner = DataCleaning() 
-currency_extractor = CurrencyExtractor(currency_url) 
+currency_extractor = CurrencyExtractor(currency_url, conditional_fetcher) 
 
 # Create the target database 
 target_database_conn_string = connector.create_connection_string(target_database_creds_file, True, new_db_name=source_database_name)
@@ -74,10 +112,71 @@ source_engine = connector.initialise_database_connection(source_database_creds_f
 target_engine = connector.initialise_database_connection(target_database_creds_file, connect_to_database=True, new_db_name=target_database_name)
 
 
+def fingerprint_source(fingerprint_function, *args):
+    # Sources are only fingerprinted when the cache is in use
+    if extraction_cache is None or bypass_cache:
+        return None
+    return fingerprint_function(*args)
+
+
+def get_table_projection(source_table_name):
+    # The columns and row filter read from a source table, or None to read all of them
+    table_projection = main_config['extraction']['table_projections'].get(source_table_name) or {}
+    return table_projection.get('columns'), table_projection.get('where')
+
+
+def rds_source_id(source_table_name):
+    # Projected reads of a table are cached separately from full reads of it
+    columns, where = get_table_projection(source_table_name)
+    if columns or where:
+        return f"{source_database_name}.{source_table_name}?columns={columns}&where={where}"
+    return f"{source_database_name}.{source_table_name}"
+
+
+def compact_source(source_name, dataframe):
+    # Convert an extracted source to the compact dtypes planned for it from database_schema.yaml
+    dtype_plan = main_config['extraction']['dtype_plans'].get(source_name)
+    if dtype_plan is None:
+        return dataframe
+    return extractor.compact_dtypes(
+        dataframe
+        , db_schema
+        , dtype_plan['schema_table']
+        , dtype_plan.get('column_aliases')
+    )
+
+
+def source_already_loaded(pipeline_name, url):
+    # A pipeline can skip cleaning and loading if it has already loaded this version of its source
+    if skip_unchanged_sources and conditional_fetcher.is_processed(pipeline_name, url):
+        main_logger.info(f"{url} is unchanged since {pipeline_name} last loaded it. Skipping")
+        print(f"{url} is unchanged. Skipping {pipeline_name}")
+        return True
+    return False
+
+
+def mark_source_loaded(pipeline_name, url):
+    # Record the version of the source which the pipeline has loaded
+    if conditional_fetcher is not None:
+        conditional_fetcher.mark_processed(pipeline_name, url)
+
+
 def user_data_pipeline():
     # Extract User Data From RDS 
-    user_table = extractor.read_rds_table(main_config['databases']['source_table_names'][0], source_engine)
+    source_table_name = main_config['databases']['source_table_names'][0] # "legacy_users"
+    columns, where = get_table_projection(source_table_name)
+    user_table = extractor.extract_with_cache(
+        rds_source_id(source_table_name)
+        , fingerprint_source(extractor.get_rds_fingerprint, source_table_name, source_engine, rds_key_columns.get(source_table_name))
+        , extractor.read_rds_table
+        , source_table_name
+        , source_engine
+        , columns=columns
+        , where=where
+        , bypass_cache=bypass_cache
+    )
 
+    user_table = compact_source("legacy_users", user_table)
     print(user_table)
     cleaned_user_table = cleaner.clean_user_data(source_engine, user_table, main_config['databases']['source_table_names'][0])
     print(cleaned_user_table)
@@ -88,22 +187,22 @@ def user_data_pipeline():
         user_table
         ,target_engine
         ,main_config['databases']['target_table_names'][0] # raw_user_data
-        ,main_config['table_operations']['replace']
+        ,replace_operation
         
     )
     connector.upload_to_db(
         cleaned_user_table
         , target_engine
         , main_config['databases']['target_table_names'][1] # land_user_data
-        , main_config['table_operations']['replace']
+        , replace_operation
         , schema_config=db_schema
         )
 
-    connector.upload_to_db(
-        cleaned_user_table
-        , target_engine
+    connector.promote_table(
+        target_engine
+        , main_config['databases']['target_table_names'][1] # land_user_data
         , main_config['databases']['target_table_names'][2] # dim_users
-        , main_config['table_operations']['append']
+        , dimension_operation
         , additional_rows=new_user_rows
         , schema_config=db_schema
     )
@@ -111,7 +210,19 @@ def user_data_pipeline():
 
 def store_data_pipeline():
     # Extract the source data from the RDS 
-    raw_store_details_table = extractor.read_rds_table(main_config['databases']['source_table_names'][1], source_engine)
+    source_table_name = main_config['databases']['source_table_names'][1] # "legacy_store_details"
+    columns, where = get_table_projection(source_table_name)
+    raw_store_details_table = extractor.extract_with_cache(
+        rds_source_id(source_table_name)
+        , fingerprint_source(extractor.get_rds_fingerprint, source_table_name, source_engine, rds_key_columns.get(source_table_name))
+        , extractor.read_rds_table
+        , source_table_name
+        , source_engine
+        , columns=columns
+        , where=where
+        , bypass_cache=bypass_cache
+    )
+    raw_store_details_table = compact_source("legacy_store_details", raw_store_details_table)
     print(raw_store_details_table)
     # Clean the raw_data 
     cleaned_store_data_table = cleaner.clean_store_data(source_engine, raw_store_details_table, main_config['databases']['source_table_names'][1])
@@ -124,29 +235,39 @@ def store_data_pipeline():
         raw_store_details_table
         ,target_engine
         ,main_config['databases']['target_table_names'][3] # raw_store_data
-        ,main_config['table_operations']['replace']   
+        ,replace_operation   
     )
     
     connector.upload_to_db(
         cleaned_store_data_table
         , target_engine
         , main_config['databases']['target_table_names'][4] # 'land_store_data'
-        , main_config['table_operations']['replace']
+        , replace_operation
         , schema_config=db_schema
     )
 
-    connector.upload_to_db(
-        cleaned_store_data_table
-        , target_engine
+    connector.promote_table(
+        target_engine
+        , main_config['databases']['target_table_names'][4] # "land_store_data"
         , main_config['databases']['target_table_names'][5] # "dim_store_details"
-        , main_config['table_operations']['append']
+        , dimension_operation
         , additional_rows=new_store_rows
         , schema_config=db_schema
     )
 
 def card_details_pipeline():
-    raw_card_details_table = extractor.retrieve_pdf_data(main_config['urls']['pdf_file'])
+    raw_card_details_table = extractor.extract_with_cache(
+        main_config['urls']['pdf_file']
+        , fingerprint_source(extractor.get_http_fingerprint, main_config['urls']['pdf_file'])
+        , extractor.retrieve_pdf_data_in_parallel
+        , main_config['urls']['pdf_file']
+        , main_config['extraction']['pdf_max_workers']
+        , bypass_cache=bypass_cache
+    )
+    raw_card_details_table = compact_source("card_details", raw_card_details_table)
     print(raw_card_details_table)
+    if source_already_loaded("card_details_pipeline", main_config['urls']['pdf_file']):
+        return
 
     cleaned_card_details_table = cleaner.clean_card_details(raw_card_details_table)
     print(cleaned_card_details_table)
@@ -158,29 +279,37 @@ def card_details_pipeline():
         raw_card_details_table
         ,target_engine
         , main_config['databases']['target_table_names'][6] # 'raw_card_data'
-        ,main_config['table_operations']['replace']   
+        ,replace_operation   
     )
     
     connector.upload_to_db(
         cleaned_card_details_table
         , target_engine
         , main_config['databases']['target_table_names'][7] # 'land_card_data'
-        , main_config['table_operations']['replace']
+        , replace_operation
         , schema_config=db_schema
     )
 
-    connector.upload_to_db(
-        cleaned_card_details_table
-        , target_engine
+    connector.promote_table(
+        target_engine
+        , main_config['databases']['target_table_names'][7] # "land_card_data"
         , main_config['databases']['target_table_names'][8] # "dim_card_details"
-        , main_config['table_operations']['append']
+        , dimension_operation
         , additional_rows=new_card_details_row_additions
         , schema_config=db_schema
     )
+    mark_source_loaded("card_details_pipeline", main_config['urls']['pdf_file'])
 
 def product_details_pipeline(): 
     # Extract the raw products table from the S3 bucket 
-    raw_product_details_table = extractor.read_s3_bucket_to_dataframe(main_config['urls']['s3_csv_file'])
+    raw_product_details_table = extractor.extract_with_cache(
+        main_config['urls']['s3_csv_file']
+        , fingerprint_source(extractor.get_s3_fingerprint, main_config['urls']['s3_csv_file'])
+        , extractor.read_s3_bucket_to_dataframe
+        , main_config['urls']['s3_csv_file']
+        , bypass_cache=bypass_cache
+    )
+    raw_product_details_table = compact_source("products", raw_product_details_table)
     print(raw_product_details_table)
     # Apply the cleaning method to the raw products table 
     cleaned_product_details_table = cleaner.clean_product_table(raw_product_details_table)
@@ -193,22 +322,22 @@ def product_details_pipeline():
         raw_product_details_table
         ,target_engine
         , main_config['databases']['target_table_names'][9] # 'raw_product_data'
-        ,main_config['table_operations']['replace']   
+        ,replace_operation   
     )
     
     connector.upload_to_db(
         cleaned_product_details_table
         , target_engine
         , main_config['databases']['target_table_names'][10]
-        ,main_config['table_operations']['replace']
+        ,replace_operation
         , schema_config=db_schema
     )
 
-    connector.upload_to_db(
-        cleaned_product_details_table
-        , target_engine
+    connector.promote_table(
+        target_engine
+        , main_config['databases']['target_table_names'][10] # "land_product_data"
         , main_config['databases']['target_table_names'][11] #"dim_product"
-        , main_config['table_operations']['append']
+        , dimension_operation
         , mapping=main_config['databases']['boolean_mapping']
         , additional_rows=new_product_rows
         , schema_config=db_schema
@@ -216,7 +345,16 @@ def product_details_pipeline():
 
 def time_events_pipeline():
     # Reading the raw_time_event_table from s3
-    raw_time_event_table = extractor.read_json_from_s3(main_config['urls']['s3_json_file'])
+    raw_time_event_table = extractor.extract_with_cache(
+        main_config['urls']['s3_json_file']
+        , fingerprint_source(extractor.get_s3_fingerprint, main_config['urls']['s3_json_file'])
+        , extractor.read_json_from_s3
+        , main_config['urls']['s3_json_file']
+        , bypass_cache=bypass_cache
+    )
+    if source_already_loaded("time_events_pipeline", main_config['urls']['s3_json_file']):
+        return
+    raw_time_event_table = compact_source("date_details", raw_time_event_table)
     # Applying cleaning method to raw_time_events_table
     print(raw_time_event_table)
     cleaned_time_event_table = cleaner.clean_time_event_table(raw_time_event_table)
@@ -227,41 +365,115 @@ def time_events_pipeline():
         raw_time_event_table
         , target_engine
         , main_config['databases']['target_table_names'][12] # 'raw_time_event_data'
-        , main_config['table_operations']['replace']   
+        , replace_operation   
     )
     
     connector.upload_to_db(
         cleaned_time_event_table
         , target_engine
         , main_config['databases']['target_table_names'][13] # "land_date_times"
-        , main_config['table_operations']['replace']
+        , replace_operation
         , schema_config=db_schema
     )
 
-    connector.upload_to_db(
-        cleaned_time_event_table
-        , target_engine
+    connector.promote_table(
+        target_engine
+        , main_config['databases']['target_table_names'][13] # "land_date_times"
         , main_config['databases']['target_table_names'][14] # "dim_date_times"
-        , main_config['table_operations']['append']
+        , dimension_operation
         , additional_rows=new_time_event_rows
         , schema_config=db_schema
     )
+    mark_source_loaded("time_events_pipeline", main_config['urls']['s3_json_file'])
 
 def orders_table_pipeline():
-    raw_orders_table = extractor.read_rds_table(main_config['databases']['target_table_names'][-1], source_engine)
-    print(raw_orders_table)
-    cleaned_orders_table = cleaner.clean_orders_table(source_engine, raw_orders_table, main_config['databases']['target_table_names'][-1])
-    print(cleaned_orders_table)
+    orders_table_mode = main_config['extraction']['orders_table_mode']
+    key_column = main_config['extraction']['incremental_key_column'] # "level_0"
+    # Only read the columns and rows of the source orders table which are needed
+    columns, where = get_table_projection(main_config['databases']['source_table_names'][2])
+    # The key column is read under its new name if the projection renames it
+    watermark_column = extractor.get_projected_column_name(key_column, columns)
+
+    if orders_table_mode == "copy":
+        # Copy the whole source orders table in a single COPY ... TO STDOUT
+        raw_orders_chunks = [
+            extractor.read_rds_table_with_copy(
+                main_config['databases']['source_table_names'][2] # "orders_table"
+                , source_engine
+                , schema_config=db_schema
+                , columns=columns
+                , where=where
+            )
+        ]
+    elif orders_table_mode == "incremental":
+        # Only extract the orders past the watermark from the previous run
+        watermark = connector.get_watermark(target_engine, "orders_table_pipeline")
+        raw_orders_chunks = extractor.read_rds_table_incremental(
+            main_config['databases']['source_table_names'][2] # "orders_table"
+            , source_engine
+            , key_column
+            , watermark
+            , main_config['extraction']['chunk_size']
+            , columns=columns
+            , where=where
+        )
+    elif orders_table_mode == "partitioned":
+        # Read ranges of the source orders table over several connections at the same time
+        raw_orders_chunks = extractor.iter_rds_table_partitions(
+            main_config['databases']['source_table_names'][2] # "orders_table"
+            , source_engine
+            , main_config['extraction']['partition_key_column'] # "level_0"
+            , main_config['extraction']['partitions']
+            , columns=columns
+            , where=where
+        )
+    else:
+        # Stream the source orders table in chunks so that memory stays bounded by the chunk size
+        raw_orders_chunks = extractor.read_rds_table_in_chunks(
+            main_config['databases']['source_table_names'][2] # "orders_table"
+            , source_engine
+            , main_config['extraction']['chunk_size']
+            , columns=columns
+            , where=where
+        )
 
-    # Uploading tables to database 
-    connector.upload_to_db(
-        cleaned_orders_table
-        , target_engine
-        , main_config['databases']['target_table_names'][-1] # "orders_table"
-        , main_config['table_operations']['append']
-        , schema_config=db_schema
-    )
-    pass     
+    if resolve_foreign_keys:
+        # Read the key maps of the dimension tables once, rather than for every chunk
+        key_maps = connector.load_key_maps(target_engine, main_config['loading']['foreign_keys'])
+
+    for raw_orders_chunk in raw_orders_chunks:
+        print(f"Number of rows in chunk : {len(raw_orders_chunk)}")
+        raw_orders_chunk = compact_source("orders_table", raw_orders_chunk)
+        chunk_watermark = raw_orders_chunk[watermark_column].max() if orders_table_mode == "incremental" else None
+        cleaned_orders_chunk = cleaner.clean_orders_table(source_engine, raw_orders_chunk, main_config['databases']['target_table_names'][-1])
+        if resolve_foreign_keys:
+            # Fill the foreign keys before the upload, so that the orders table is only written once
+            cleaned_orders_chunk = cleaner.resolve_foreign_keys(
+                cleaned_orders_chunk
+                , key_maps
+                , main_config['loading']['foreign_keys']
+            )
+
+        if orders_table_mode == "incremental":
+            # Append the chunk and move the watermark on in one transaction, so a chunk is never loaded twice
+            connector.append_with_watermark(
+                cleaned_orders_chunk
+                , target_engine
+                , main_config['databases']['target_table_names'][-1] # "orders_table"
+                , "orders_table_pipeline"
+                , key_column
+                , chunk_watermark
+                , schema_config=db_schema
+            )
+        else:
+            # Uploading each chunk to the database 
+            connector.upload_to_db(
+                cleaned_orders_chunk
+                , target_engine
+                , main_config['databases']['target_table_names'][-1] # "orders_table"
+                , main_config['table_operations']['append']
+                , schema_config=db_schema
+            )
 
 def currency_data_pipeline():
     raw_currency_data = extractor.read_json_local(json_source_file)
@@ -275,15 +487,15 @@ def currency_data_pipeline():
         cleaned_currency_table
         , target_engine
         , main_config['databases']['target_table_names'][15] # "land_currency_data"
-        ,main_config['table_operations']['replace']
+        ,replace_operation
         , schema_config=db_schema
     )
 
-    connector.upload_to_db(
-        cleaned_currency_table
-        , target_engine
+    connector.promote_table(
+        target_engine
+        , main_config['databases']['target_table_names'][15] # "land_currency_data"
         , main_config['databases']['target_table_names'][16] # "dim_currency"
-        , main_config['table_operations']['append']
+        , dimension_operation
         , additional_rows=new_currency_rows
         , subset=main_config['currency_subset'] # ["US", "GB", "DE"]
         , schema_config=db_schema
@@ -291,6 +503,8 @@ def currency_data_pipeline():
 
 def currency_conversion_pipeline():
         html_data = currency_extractor.read_html_data()
+        if source_already_loaded("currency_conversion_pipeline", currency_url):
+            return
         first_table = currency_extractor.html_to_dataframe(html_data, 0)
         second_table = currency_extractor.html_to_dataframe(html_data, 1)
 
@@ -309,32 +523,38 @@ def currency_conversion_pipeline():
         cleaned_currency_conversion_table
         , target_engine
         , main_config['databases']['target_table_names'][17] # "land_currency_conversion_data"
-        , main_config['table_operations']['replace']
+        , replace_operation
         , schema_config=db_schema
     )
         
-        connector.upload_to_db(
-            cleaned_currency_conversion_table
-            , target_engine
+        connector.promote_table(
+            target_engine
+            , main_config['databases']['target_table_names'][17] # "land_currency_conversion_data"
             , main_config['databases']['target_table_names'][18] # "dim_currency_conversion"
-            , main_config['table_operations']['append']
+            , dimension_operation
             , additional_rows=new_currency_rows
             , subset=main_config['currency_conversion_subset']
             , schema_config=db_schema
     )
+        mark_source_loaded("currency_conversion_pipeline", currency_url)
 
 def alter_and_update_database():
 
+    # Indexing the natural keys of the dimension tables, which the foreign keys are resolved on
+    connector.create_schema_indexes(target_engine, db_schema)
+
     # # Adding logic to populate the weight class column in the dim_products_table
     connector.alter_and_update(
         main_config['filepaths']['sql_scripts']['add_weight_class_column'] #'../sales_data/DML/add_weight_class_column_script.sql'
         ,target_engine
+        ,main_config['scheduler']['sql_workers']
     )
 
     # Adding primary keys to tables 
     connector.alter_and_update(
         main_config['filepaths']['sql_scripts']['add_primary_keys'] # '../sales_data/DDL/add_primary_keys.sql'
         ,target_engine
+        ,main_config['scheduler']['sql_workers']
         )
 
     # Adding foreign key constraints to tables 
@@ -342,27 +562,69 @@ def alter_and_update_database():
         # '../sales_data/DML/foreign_key_constraints.sql'
         main_config['filepaths']['sql_scripts']['foreign_key_constraints'] # '../sales_data/DDL/foreign_key_constraints.sql'
         ,target_engine
+        ,main_config['scheduler']['sql_workers']
     )
 
-    # Mapping foreign keys to empty key columns in fact table and dim_currency table
+    if not resolve_foreign_keys:
+        # Mapping foreign keys to empty key columns in fact table in a single pass over all of the dimension tables
+        connector.update_foreign_keys(
+            target_engine
+            , main_config['databases']['target_table_names'][-1] # "orders_table"
+            , main_config['loading']['fact_key_column'] # "order_key"
+            , main_config['loading']['foreign_keys']
+            , explain_file_path=main_config['filepaths']['benchmarks']['key_resolution_plan']
+        )
+
+    # Mapping the currency conversion keys to the dim_currency table
     connector.alter_and_update(
-        main_config['filepaths']['sql_scripts']['update_foreign_keys'] # '../sales_data/DML/update_foreign_keys.sql'
+        main_config['filepaths']['sql_scripts']['update_dim_currency_foreign_keys'] # '../sales_data/DML/update_dim_currency_table_foreign_keys.sql'
         ,target_engine
+        ,main_config['scheduler']['sql_workers']
     )
 
     # Creating views based on database post-load
     connector.alter_and_update(
         main_config['filepaths']['sql_scripts']['create_views'] # '../sales_data/DDL/create_views.sql'
         ,target_engine
+        ,main_config['scheduler']['sql_workers']
     )        
 
 if __name__ == "__main__":
-    user_data_pipeline()
-    store_data_pipeline()
-    product_details_pipeline()
-    card_details_pipeline() 
-    time_events_pipeline() 
-    orders_table_pipeline()
-    currency_data_pipeline() 
-    currency_conversion_pipeline() 
-    alter_and_update_database()
+    # The dimension pipelines are independent of each other, so they run concurrently
+    scheduler = PipelineScheduler(main_config['scheduler']['max_workers'])
+    dimension_pipelines = [
+        "user_data_pipeline",
+        "store_data_pipeline",
+        "product_details_pipeline",
+        "card_details_pipeline",
+        "time_events_pipeline",
+    ]
+    if resolve_foreign_keys:
+        # The currency keys of the orders are looked up from the dim_currency table
+        dimension_pipelines.append("currency_data_pipeline")
+    scheduler.add_pipeline("user_data_pipeline", user_data_pipeline)
+    scheduler.add_pipeline("store_data_pipeline", store_data_pipeline)
+    scheduler.add_pipeline("product_details_pipeline", product_details_pipeline)
+    scheduler.add_pipeline("card_details_pipeline", card_details_pipeline)
+    scheduler.add_pipeline("time_events_pipeline", time_events_pipeline)
+    scheduler.add_pipeline("currency_data_pipeline", currency_data_pipeline)
+    scheduler.add_pipeline("currency_conversion_pipeline", currency_conversion_pipeline)
+    # The orders table is loaded once the dimensions it references are in place
+    scheduler.add_pipeline("orders_table_pipeline", orders_table_pipeline, dependencies=dimension_pipelines)
+    try:
+        # Drop the indexes and constraints of the loaded tables during the loads, and rebuild them once afterwards
+        with connector.bulk_load(
+            target_engine
+            , main_config['loading']['bulk_load_tables']
+            , main_config['loading']['rebuild_workers']
+        ):
+            pipeline_statuses = scheduler.run()
+        # The sql scripts need every table to be loaded
+        if all(status == "succeeded" for status in pipeline_statuses.values()):
+            alter_and_update_database()
+        else:
+            main_logger.warning("Skipping alter_and_update_database as not every pipeline succeeded")
+            print("Skipping alter_and_update_database as not every pipeline succeeded")
+    finally:
+        # Close the pooled connections to both databases
+        connector.dispose_engines()
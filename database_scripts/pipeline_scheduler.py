@@ -0,0 +1,193 @@
+from database_scripts.file_handler import get_absolute_file_path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable
+import time
+import os
+import logging
+
+
+"""
+LOG CREATION
+"""
+log_filename = get_absolute_file_path(
+    "pipeline_scheduler.log", "logs"
+)  # "logs/pipeline_scheduler.log"
+if not os.path.exists(log_filename):
+    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
+
+pipeline_scheduler_logger = logging.getLogger(__name__)
+
+# Set the default level as DEBUG
+pipeline_scheduler_logger.setLevel(logging.DEBUG)
+
+# Format the logs by time, filename, function_name, level_name and the message
+format = logging.Formatter(
+    "%(asctime)s:%(filename)s:%(funcName)s:%(levelname)s:%(message)s"
+)
+file_handler = logging.FileHandler(log_filename)
+
+# Set the formatter to the variable format
+
+file_handler.setFormatter(format)
+
+pipeline_scheduler_logger.addHandler(file_handler)
+
+
+class PipelineScheduler:
+    '''
+    A class which runs ETL pipelines concurrently on a thread pool.
+
+    A pipeline only starts once every pipeline it depends on has succeeded.
+    If a pipeline fails, the pipelines which depend on it are skipped,
+    while every other pipeline carries on running.
+
+    Attributes
+
+    max_workers: The maximum number of pipelines which run at the same time
+
+    Methods
+
+    add_pipeline()
+    run()
+    '''
+    def __init__(self, max_workers : int = 4):
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        self.max_workers = max_workers
+        self.pipelines = {}
+
+    def add_pipeline(
+        self, pipeline_name : str, pipeline_function : Callable, dependencies : list = None
+    ):
+        '''
+        Method to add a pipeline to the scheduler
+
+        Parameters:
+
+        pipeline_name : str
+
+        The name of the pipeline
+
+        pipeline_function : Callable
+
+        The function which runs the pipeline. It is called without any arguments
+
+        dependencies : list = None
+
+        The names of the pipelines which must succeed before this pipeline starts
+        '''
+        if pipeline_name in self.pipelines:
+            raise ValueError(f"Pipeline '{pipeline_name}' has already been added")
+        self.pipelines[pipeline_name] = (pipeline_function, list(dependencies or []))
+        pipeline_scheduler_logger.debug(
+            f"Added pipeline {pipeline_name} with dependencies {dependencies}"
+        )
+
+    def run(self):
+        '''
+        Method to run every pipeline added to the scheduler
+
+        Returns:
+
+        pipeline_statuses : dict
+
+        A dictionary of each pipeline name to "succeeded", "failed" or "skipped"
+        '''
+        self._validate_dependencies()
+
+        pipeline_statuses = {}
+        pending_pipelines = dict(self.pipelines)
+        running_pipelines = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending_pipelines or running_pipelines:
+                for pipeline_name, (pipeline_function, dependencies) in list(pending_pipelines.items()):
+                    dependency_statuses = [pipeline_statuses.get(dependency) for dependency in dependencies]
+
+                    if any(status in ("failed", "skipped") for status in dependency_statuses):
+                        # Skip the pipeline as one of its inputs is missing
+                        pipeline_scheduler_logger.warning(
+                            f"Skipping {pipeline_name} as one of {dependencies} did not succeed"
+                        )
+                        print(f"Skipping {pipeline_name} as one of its dependencies did not succeed")
+                        pipeline_statuses[pipeline_name] = "skipped"
+                        del pending_pipelines[pipeline_name]
+
+                    elif all(status == "succeeded" for status in dependency_statuses):
+                        pipeline_scheduler_logger.info(f"Starting {pipeline_name}")
+                        future = executor.submit(self._run_pipeline, pipeline_name, pipeline_function)
+                        running_pipelines[future] = pipeline_name
+                        del pending_pipelines[pipeline_name]
+
+                if not running_pipelines:
+                    # Skipping pipelines can make more pipelines skippable
+                    continue
+
+                # Wait for at least one pipeline to finish before checking what can run next
+                finished_futures, _ = wait(running_pipelines, return_when=FIRST_COMPLETED)
+                for future in finished_futures:
+                    pipeline_name = running_pipelines.pop(future)
+                    pipeline_statuses[pipeline_name] = "succeeded" if future.result() else "failed"
+
+        pipeline_scheduler_logger.info(f"Pipeline statuses : {pipeline_statuses}")
+        print(f"Pipeline statuses : {pipeline_statuses}")
+        return pipeline_statuses
+
+    def _run_pipeline(self, pipeline_name : str, pipeline_function : Callable):
+        '''
+        Utility method to run a single pipeline, isolating any failure
+
+        Parameters:
+
+        pipeline_name : str
+
+        The name of the pipeline
+
+        pipeline_function : Callable
+
+        The function which runs the pipeline
+
+        Returns:
+
+        bool : True if the pipeline succeeded, False otherwise
+        '''
+        start_time = time.perf_counter()
+        try:
+            pipeline_function()
+        except Exception:
+            pipeline_scheduler_logger.exception(f"Pipeline {pipeline_name} failed")
+            print(f"Pipeline {pipeline_name} failed. Please view the logs")
+            return False
+
+        duration = time.perf_counter() - start_time
+        pipeline_scheduler_logger.info(f"Pipeline {pipeline_name} succeeded in {duration:.2f}s")
+        return True
+
+    def _validate_dependencies(self):
+        '''
+        Utility method to check that every dependency exists and that there are no cycles
+        '''
+        for pipeline_name, (_, dependencies) in self.pipelines.items():
+            for dependency in dependencies:
+                if dependency not in self.pipelines:
+                    pipeline_scheduler_logger.error(
+                        f"Unknown dependency {dependency} for {pipeline_name}"
+                    )
+                    raise ValueError(f"Unknown dependency '{dependency}' for pipeline '{pipeline_name}'")
+
+        # Repeatedly remove the pipelines whose dependencies have all been removed
+        remaining_pipelines = {
+            pipeline_name: set(dependencies) for pipeline_name, (_, dependencies) in self.pipelines.items()
+        }
+        while remaining_pipelines:
+            ready_pipelines = [
+                pipeline_name for pipeline_name, dependencies in remaining_pipelines.items()
+                if not dependencies & remaining_pipelines.keys()
+            ]
+            if not ready_pipelines:
+                pipeline_scheduler_logger.error(
+                    f"Circular dependency between {list(remaining_pipelines)}"
+                )
+                raise ValueError(f"Circular dependency between pipelines {list(remaining_pipelines)}")
+            for pipeline_name in ready_pipelines:
+                del remaining_pipelines[pipeline_name]
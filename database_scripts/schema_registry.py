@@ -0,0 +1,257 @@
+from database_scripts.file_handler import get_absolute_file_path
+from sqlalchemy import MetaData, Table, Column, Index
+import hashlib
+import pickle
+import yaml
+import os
+import logging
+
+
+"""
+LOG CREATION
+"""
+log_filename = get_absolute_file_path(
+    "schema_registry.log", "logs"
+)  # "logs/schema_registry.log"
+if not os.path.exists(log_filename):
+    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
+
+schema_registry_logger = logging.getLogger(__name__)
+
+# Set the default level as DEBUG
+schema_registry_logger.setLevel(logging.DEBUG)
+
+# Format the logs by time, filename, function_name, level_name and the message
+format = logging.Formatter(
+    "%(asctime)s:%(filename)s:%(funcName)s:%(levelname)s:%(message)s"
+)
+file_handler = logging.FileHandler(log_filename)
+
+# Set the formatter to the variable format
+
+file_handler.setFormatter(format)
+
+schema_registry_logger.addHandler(file_handler)
+
+
+def parse_column_type(column_type : str, type_mapping : dict):
+    """
+    Function to parse a column type from a string, e.g. VARCHAR(255)
+
+    Parameters
+    ----------
+
+        column_type : str
+
+            The type of column in a string format
+
+        type_mapping : dict
+
+            A dictionary of each type name to its SQLAlchemy type
+
+    Returns
+    -------
+
+        column_type_object
+
+            The SQLAlchemy type of the column
+    """
+    # Split the desired column name by the first occurence of the '(' character
+    # NOTE: the *column_parameters will set everything else that is split to a list.
+    column_type_name, *column_parameters = column_type.split('(')
+    # Strip the Whitespace from the column_name
+    column_type_name = column_type_name.strip()
+    # For the column_parameters variable select the first element of the list,
+    # then remove the last character from the list.
+    # Afterwards, apply the split method to split the rest of the string by ','s
+    # If the column_parameters variable is empty return an empty list
+    column_parameters = column_parameters[0][:-1].split(',') if column_parameters else []
+    # Map the variable to a SQLAlchemy Type
+    column_type_object = type_mapping[column_type_name]
+    # If condition for if column_parameters is not empty
+    if column_parameters:
+        # convert each value in the column_parameter variable to an integer
+        column_type_object = column_type_object(*map(int, column_parameters))
+    return column_type_object
+
+
+class SchemaRegistry:
+    '''
+    A class which compiles the tables of database_schema.yaml into SQLAlchemy Table objects once,
+    so that uploads reuse them instead of parsing the column types on every call.
+
+    Every table is compiled when the registry is created and never changed after,
+    so the registry can be shared between threads.
+
+    Attributes
+
+    schema_config: The database schema, as loaded from database_schema.yaml
+
+    metadata: The MetaData holding the compiled Table objects
+
+    Methods
+
+    from_yaml()
+    get_table()
+    get_dtypes()
+    get_indexes()
+    save()
+    '''
+    def __init__(self, schema_config : dict, type_mapping : dict, metadata : MetaData = None):
+        self.schema_config = schema_config
+        if metadata is None:
+            metadata = self._compile(schema_config, type_mapping)
+        self.metadata = metadata
+        # The dtype maps passed to DataFrame.to_sql are built once for each table
+        self._dtypes = {
+            table_name: {column.name: column.type for column in table.columns}
+            for table_name, table in self.metadata.tables.items()
+        }
+
+    @classmethod
+    def from_yaml(cls, schema_file_path : str, type_mapping : dict, compiled_file_path : str = None):
+        '''
+        Method to create a SchemaRegistry from a database schema yaml file.
+        If a compiled_file_path is given, the compiled registry is saved there, and loaded
+        on the next run instead of parsing the yaml file, as long as the yaml file and the type_mapping are unchanged
+
+        Parameters:
+
+        schema_file_path : str
+
+        The path to database_schema.yaml
+
+        type_mapping : dict
+
+        A dictionary of each type name to its SQLAlchemy type
+
+        compiled_file_path : str = None
+
+        An optional path to save the compiled registry to
+
+        Returns:
+
+        schema_registry : SchemaRegistry
+        '''
+        with open(schema_file_path, "rb") as schema_file:
+            schema_bytes = schema_file.read()
+        # The compiled registry is only reused if it was built from the same yaml file and the same type mapping,
+        # as the type mapping decides the SQLAlchemy type of every column
+        schema_hash = hashlib.sha256(
+            schema_bytes + repr(sorted(type_mapping.items())).encode()
+        ).hexdigest()
+
+        if compiled_file_path and os.path.exists(compiled_file_path):
+            try:
+                with open(compiled_file_path, "rb") as compiled_file:
+                    compiled_schema = pickle.load(compiled_file)
+                if compiled_schema["schema_hash"] == schema_hash:
+                    schema_registry_logger.info(f"Loaded the compiled schema from {compiled_file_path}")
+                    return cls(compiled_schema["schema_config"], type_mapping, compiled_schema["metadata"])
+                schema_registry_logger.info(f"{schema_file_path} has changed. Compiling the schema again")
+            except (pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+                schema_registry_logger.warning(f"{compiled_file_path} is corrupt. Compiling the schema again")
+
+        schema_registry = cls(yaml.safe_load(schema_bytes), type_mapping)
+        if compiled_file_path:
+            schema_registry.save(compiled_file_path, schema_hash)
+        return schema_registry
+
+    def get_table(self, table_name : str):
+        '''
+        Method to get the compiled Table object of a table
+
+        Parameters:
+
+        table_name : str
+
+        The name of the table in the database schema
+
+        Returns:
+
+        table : Table
+        '''
+        return self.metadata.tables[table_name]
+
+    def get_dtypes(self, table_name : str):
+        '''
+        Method to get the SQLAlchemy type of each column of a table, in the form DataFrame.to_sql expects
+
+        Parameters:
+
+        table_name : str
+
+        The name of the table in the database schema
+
+        Returns:
+
+        dtypes : dict
+
+        A dictionary of each column name to its SQLAlchemy type
+        '''
+        return self._dtypes[table_name]
+
+    def get_indexes(self, table_name : str):
+        '''
+        Method to get the indexes declared for a table in the indexes section of the database schema
+
+        Parameters:
+
+        table_name : str
+
+        The name of the table in the database schema
+
+        Returns:
+
+        indexes : list
+
+        A list of the table's Index objects, sorted by name
+        '''
+        return sorted(self.metadata.tables[table_name].indexes, key=lambda index: index.name)
+
+    def save(self, compiled_file_path : str, schema_hash : str):
+        '''
+        Method to save the compiled registry to a file
+
+        Parameters:
+
+        compiled_file_path : str
+
+        The path to save the compiled registry to
+
+        schema_hash : str
+
+        The sha256 of the yaml file the registry was compiled from
+        '''
+        os.makedirs(os.path.dirname(os.path.abspath(compiled_file_path)), exist_ok=True)
+        # Write to a temporary file first so that a partial file is never loaded
+        temporary_file_path = f"{compiled_file_path}.{os.getpid()}.tmp"
+        with open(temporary_file_path, "wb") as compiled_file:
+            pickle.dump(
+                {"schema_hash": schema_hash, "schema_config": self.schema_config, "metadata": self.metadata},
+                compiled_file,
+            )
+        os.replace(temporary_file_path, compiled_file_path)
+        schema_registry_logger.info(f"Saved the compiled schema to {compiled_file_path}")
+
+    @staticmethod
+    def _compile(schema_config : dict, type_mapping : dict):
+        '''
+        Utility method to compile every table of the database schema into one MetaData
+        '''
+        metadata = MetaData()
+        for table_name, columns in schema_config["schemas"]["tables"].items():
+            Table(
+                table_name,
+                metadata,
+                *(
+                    Column(column_name, parse_column_type(column_type, type_mapping))
+                    for column_name, column_type in columns.items()
+                ),
+            )
+        # Indexes are named ix_<table>_<column>, as the indexes of staged_replace are
+        for table_name, column_names in schema_config["schemas"].get("indexes", {}).items():
+            for column_name in column_names:
+                Index(f"ix_{table_name}_{column_name}", metadata.tables[table_name].c[column_name])
+        schema_registry_logger.info(f"Compiled {len(metadata.tables)} tables")
+        return metadata
@@ -0,0 +1,302 @@
+from database_scripts.file_handler import get_absolute_file_path
+from database_scripts.pipeline_scheduler import PipelineScheduler
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+import time
+import re
+import os
+import logging
+
+
+"""
+LOG CREATION
+"""
+log_filename = get_absolute_file_path(
+    "sql_script_runner.log", "logs"
+)  # "logs/sql_script_runner.log"
+if not os.path.exists(log_filename):
+    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
+
+sql_script_runner_logger = logging.getLogger(__name__)
+
+# Set the default level as DEBUG
+sql_script_runner_logger.setLevel(logging.DEBUG)
+
+# Format the logs by time, filename, function_name, level_name and the message
+format = logging.Formatter(
+    "%(asctime)s:%(filename)s:%(funcName)s:%(levelname)s:%(message)s"
+)
+file_handler = logging.FileHandler(log_filename)
+
+# Set the formatter to the variable format
+
+file_handler.setFormatter(format)
+
+sql_script_runner_logger.addHandler(file_handler)
+
+# Matches a directive comment, e.g. "-- @name card_keys" or "-- @depends card_keys, date_keys"
+DIRECTIVE_PATTERN = re.compile(r"^\s*--\s*@(\w+)[ \t]*(.*?)\s*$", re.MULTILINE)
+
+# Matches the opening tag of a dollar quoted string, e.g. $$ or $body$
+DOLLAR_QUOTE_PATTERN = re.compile(r"\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$")
+
+
+class SqlScriptRunner:
+    '''
+    A class which splits a .sql file into statements and runs each statement on its own pooled connection,
+    recording how long each statement took and how many rows it affected.
+
+    By default, the statements run one after another in the order of the file.
+    Comments directly above a statement change when it runs:
+
+        -- @name <name>             names the statement in the logs and for @depends
+        -- @parallel                runs the statement at the same time as the @parallel statements next to it
+        -- @depends <name>, <name>  runs the statement once the named statements succeed, instead of after the statement above it.
+                                    An empty @depends runs the statement straight away
+
+    If a statement fails, the statements which depend on it are skipped and every other statement carries on running.
+
+    Attributes
+
+    max_workers: The maximum number of statements which run at the same time
+
+    Methods
+
+    split_statements()
+    run()
+    '''
+    def __init__(self, max_workers : int = 4):
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        self.max_workers = max_workers
+
+    @staticmethod
+    def split_statements(sql_script : str):
+        '''
+        Method to split a sql script into its statements.
+        Semicolons inside quotes, dollar quotes and comments do not end a statement
+
+        Parameters:
+
+        sql_script : str
+
+        The contents of a .sql file
+
+        Returns:
+
+        statements : list
+
+        A list of dictionaries with the name, sql, parallel flag and dependencies of each statement
+        '''
+        statements = []
+        statement_start = 0
+        position = 0
+        script_length = len(sql_script)
+
+        while position < script_length:
+            character = sql_script[position]
+
+            if sql_script.startswith("--", position):
+                # Line comments run to the end of the line
+                line_end = sql_script.find("\n", position)
+                position = script_length if line_end == -1 else line_end + 1
+                continue
+
+            if sql_script.startswith("/*", position):
+                comment_end = sql_script.find("*/", position + 2)
+                position = script_length if comment_end == -1 else comment_end + 2
+                continue
+
+            if character in ("'", '"'):
+                # Quotes are escaped by doubling them, so the loop carries on past a doubled quote
+                position += 1
+                while position < script_length:
+                    if sql_script[position] == character:
+                        if sql_script.startswith(character * 2, position):
+                            position += 2
+                            continue
+                        break
+                    position += 1
+                position += 1
+                continue
+
+            if character == "$":
+                dollar_quote = DOLLAR_QUOTE_PATTERN.match(sql_script, position)
+                if dollar_quote:
+                    quote_end = sql_script.find(dollar_quote.group(), dollar_quote.end())
+                    position = script_length if quote_end == -1 else quote_end + len(dollar_quote.group())
+                    continue
+
+            if character == ";":
+                SqlScriptRunner._add_statement(statements, sql_script[statement_start:position])
+                statement_start = position + 1
+
+            position += 1
+
+        # The last statement of a file does not need a semicolon
+        SqlScriptRunner._add_statement(statements, sql_script[statement_start:])
+        SqlScriptRunner._resolve_dependencies(statements)
+        return statements
+
+    def run(self, sql_file_path : str, database_engine : Engine):
+        '''
+        Method to run every statement of a .sql file
+
+        Parameters:
+
+        sql_file_path : str
+
+        The path to the .sql file
+
+        database_engine : Engine
+
+        The engine of the database. Each statement checks out its own connection from the engine's pool
+
+        Returns:
+
+        statement_results : list
+
+        A list of dictionaries, in the order of the file, with the name, sql, status,
+        rowcount and duration in seconds of each statement.
+        The status is "succeeded", "failed" or "skipped"
+        '''
+        with open(sql_file_path, "r") as file:
+            statements = self.split_statements(file.read())
+        sql_script_runner_logger.info(f"Running {len(statements)} statements from {sql_file_path}")
+
+        statement_results = {
+            statement["name"]: {
+                "name": statement["name"],
+                "sql": statement["sql"],
+                "status": None,
+                "rowcount": None,
+                "duration": None,
+            }
+            for statement in statements
+        }
+
+        scheduler = PipelineScheduler(self.max_workers)
+        for statement in statements:
+            scheduler.add_pipeline(
+                statement["name"],
+                lambda statement=statement: self._execute_statement(
+                    database_engine, statement, statement_results[statement["name"]]
+                ),
+                statement["dependencies"],
+            )
+
+        for statement_name, status in scheduler.run().items():
+            statement_results[statement_name]["status"] = status
+
+        total_duration = sum(result["duration"] or 0 for result in statement_results.values())
+        sql_script_runner_logger.info(
+            f"Finished {sql_file_path}. The statements took {total_duration:.2f}s in total"
+        )
+        return list(statement_results.values())
+
+    @staticmethod
+    def _execute_statement(database_engine : Engine, statement : dict, statement_result : dict):
+        '''
+        Utility method to run a single statement in its own transaction and record its rowcount and duration
+
+        Parameters:
+
+        database_engine : Engine
+
+        The engine of the database
+
+        statement : dict
+
+        The statement, as returned by split_statements()
+
+        statement_result : dict
+
+        The dictionary the rowcount and duration are recorded in
+        '''
+        sql_script_runner_logger.debug(statement["sql"])
+        start_time = time.perf_counter()
+        try:
+            with database_engine.begin() as connection:
+                result = connection.execute(text(statement["sql"]))
+                # DDL statements do not affect any rows, which the driver reports as -1
+                statement_result["rowcount"] = result.rowcount
+        finally:
+            statement_result["duration"] = time.perf_counter() - start_time
+
+        sql_script_runner_logger.info(
+            f"{statement['name']} affected {statement_result['rowcount']} rows in {statement_result['duration']:.2f}s"
+        )
+
+    @staticmethod
+    def _add_statement(statements : list, statement_text : str):
+        '''
+        Utility method to add a statement to the list of statements, reading the directives in the comments above it
+
+        Parameters:
+
+        statements : list
+
+        The list of statements found so far
+
+        statement_text : str
+
+        The text between two semicolons
+        '''
+        # Skip the leading comments and blank lines to find where the statement itself starts
+        sql_lines = statement_text.splitlines()
+        header_lines = []
+        while sql_lines and (not sql_lines[0].strip() or sql_lines[0].lstrip().startswith("--")):
+            header_lines.append(sql_lines.pop(0))
+        sql = "\n".join(sql_lines).strip()
+        if not sql:
+            return
+
+        directives = {
+            name.lower(): value for name, value in DIRECTIVE_PATTERN.findall("\n".join(header_lines))
+        }
+
+        statement_name = directives.get("name") or f"statement_{len(statements) + 1}"
+        if any(statement["name"] == statement_name for statement in statements):
+            raise ValueError(f"Statement '{statement_name}' appears more than once")
+
+        statements.append({
+            "name": statement_name,
+            "sql": sql,
+            "parallel": "parallel" in directives,
+            # None means the statement runs after the statements above it
+            "dependencies": (
+                [dependency.strip() for dependency in directives["depends"].split(",") if dependency.strip()]
+                if "depends" in directives else None
+            ),
+        })
+
+    @staticmethod
+    def _resolve_dependencies(statements : list):
+        '''
+        Utility method to work out the dependencies of the statements without a @depends directive.
+        A statement runs after the statement above it, and consecutive @parallel statements all run
+        after the statement above the first of them. The statement after a group of @parallel statements
+        runs once all of them have finished
+
+        Parameters:
+
+        statements : list
+
+        The list of statements, in the order of the file
+        '''
+        previous_statements = []
+        parallel_group = []
+        for statement in statements:
+            if statement["parallel"]:
+                if not parallel_group:
+                    # The group starts after whatever the previous statement had to wait for
+                    group_dependencies = list(previous_statements)
+                parallel_group.append(statement["name"])
+                if statement["dependencies"] is None:
+                    statement["dependencies"] = group_dependencies
+                previous_statements = list(parallel_group)
+            else:
+                parallel_group = []
+                if statement["dependencies"] is None:
+                    statement["dependencies"] = list(previous_statements)
+                previous_statements = [statement["name"]]
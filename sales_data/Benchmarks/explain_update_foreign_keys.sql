@@ -0,0 +1,37 @@
+-- Query plan of the single pass foreign key resolution DatabaseConnector.update_foreign_keys generates from loading.foreign_keys.
+-- EXPLAIN ANALYZE runs the UPDATE, so it is rolled back to leave the orders_table as it was.
+-- Run the file in a single session, e.g. psql -f explain_update_foreign_keys.sql
+-- When loading.resolve_foreign_keys is off, main.py saves the plan of the statement it runs to filepaths.benchmarks.key_resolution_plan
+
+BEGIN;
+
+EXPLAIN (ANALYZE, BUFFERS, VERBOSE)
+UPDATE orders_table AS target
+SET card_key = resolved.card_key, date_key = resolved.date_key, product_key = resolved.product_key, store_key = resolved.store_key, user_key = resolved.user_key, country_code = resolved.country_code, currency_key = resolved.currency_key
+FROM (
+    SELECT source.order_key,
+        COALESCE(dimension_0.card_key, CASE WHEN source.card_number IS NULL THEN -1 ELSE 0 END) AS card_key,
+        COALESCE(dimension_1.date_key, CASE WHEN source.date_uuid IS NULL THEN -1 ELSE 0 END) AS date_key,
+        COALESCE(dimension_2.product_key, CASE WHEN source.product_code IS NULL THEN -1 ELSE 0 END) AS product_key,
+        COALESCE(dimension_3.store_key, CASE WHEN source.store_code IS NULL THEN -1 ELSE 0 END) AS store_key,
+        COALESCE(dimension_4.user_key, CASE WHEN source.user_uuid IS NULL THEN -1 ELSE 0 END) AS user_key,
+        dimension_3.country_code AS country_code,
+        COALESCE(dimension_5.currency_key, CASE WHEN dimension_3.country_code IS NULL THEN -1 ELSE 0 END) AS currency_key
+    FROM orders_table AS source
+    LEFT JOIN dim_card_details AS dimension_0 ON dimension_0.card_number = source.card_number AND dimension_0.card_key > 0
+    LEFT JOIN dim_date_times AS dimension_1 ON dimension_1.date_uuid = source.date_uuid AND dimension_1.date_key > 0
+    LEFT JOIN dim_product AS dimension_2 ON dimension_2.product_code = source.product_code AND dimension_2.product_key > 0
+    LEFT JOIN dim_store_details AS dimension_3 ON dimension_3.store_code = source.store_code AND dimension_3.store_key > 0
+    LEFT JOIN dim_users AS dimension_4 ON dimension_4.user_uuid = source.user_uuid AND dimension_4.user_key > 0
+    LEFT JOIN dim_currency AS dimension_5 ON dimension_5.country_code = dimension_3.country_code AND dimension_5.currency_key > 0
+) AS resolved
+WHERE target.order_key = resolved.order_key
+AND (target.card_key IS DISTINCT FROM resolved.card_key
+    OR target.date_key IS DISTINCT FROM resolved.date_key
+    OR target.product_key IS DISTINCT FROM resolved.product_key
+    OR target.store_key IS DISTINCT FROM resolved.store_key
+    OR target.user_key IS DISTINCT FROM resolved.user_key
+    OR target.country_code IS DISTINCT FROM resolved.country_code
+    OR target.currency_key IS DISTINCT FROM resolved.currency_key);
+
+ROLLBACK;
@@ -1,23 +1,41 @@
+-- The primary keys are on different tables, so they are added at the same time
+
+-- @name dim_card_details_primary_key
+-- @parallel
 ALTER TABLE dim_card_details
     ADD PRIMARY KEY (card_key);
 	
+-- @name dim_date_times_primary_key
+-- @parallel
 ALTER TABLE dim_date_times
     ADD PRIMARY KEY (date_key);
 	
+-- @name dim_product_primary_key
+-- @parallel
 ALTER TABLE dim_product
     ADD PRIMARY KEY (product_key);
 
+-- @name dim_store_details_primary_key
+-- @parallel
 ALTER TABLE dim_store_details
     ADD PRIMARY KEY (store_key);
 
+-- @name dim_users_primary_key
+-- @parallel
 ALTER TABLE dim_users
     ADD PRIMARY KEY (user_key);
 
+-- @name dim_currency_primary_key
+-- @parallel
 ALTER TABLE dim_currency
     ADD PRIMARY KEY (currency_key);
     
+-- @name orders_table_primary_key
+-- @parallel
 ALTER TABLE orders_table
     ADD PRIMARY KEY (order_key);
 
+-- @name dim_currency_conversion_primary_key
+-- @parallel
 ALTER TABLE dim_currency_conversion
     ADD PRIMARY KEY (currency_conversion_key);
\ No newline at end of file
@@ -1,3 +1,7 @@
+-- Each view only reads the loaded tables, so the views are created at the same time
+
+-- @name create_customer_sales_ranked_view
+-- @depends
 CREATE OR REPLACE VIEW public.customer_sales_ranked_view
  AS
  SELECT du.first_name,
@@ -13,10 +17,14 @@ CREATE OR REPLACE VIEW public.customer_sales_ranked_view
      JOIN dim_users du ON o.user_key = du.user_key
   ORDER BY (round((x.product_price * o.product_quantity::double precision)::numeric, 2)) DESC;
 
+-- @name customer_sales_ranked_view_owner
+-- @depends create_customer_sales_ranked_view
 ALTER TABLE public.customer_sales_ranked_view
     OWNER TO postgres;
 
 
+-- @name create_store_sales_breakdown_germany
+-- @depends
 CREATE OR REPLACE VIEW public.store_sales_breakdown_germany
  AS
  SELECT ds.store_type,
@@ -34,11 +42,15 @@ CREATE OR REPLACE VIEW public.store_sales_breakdown_germany
   GROUP BY ds.store_type, ds.country_code, ds.city, ds.store_address, dt.day, dt.month, dt.year
   ORDER BY (round(sum(dp.product_price * o.product_quantity::double precision)::numeric, 2)) DESC;
 
+-- @name store_sales_breakdown_germany_owner
+-- @depends create_store_sales_breakdown_germany
 ALTER TABLE public.store_sales_breakdown_germany
     OWNER TO postgres;
 
 
 
+-- @name create_store_sales_breakdown
+-- @depends
 CREATE OR REPLACE VIEW public.store_sales_breakdown
  AS
  SELECT ds.store_type,
@@ -57,10 +69,14 @@ CREATE OR REPLACE VIEW public.store_sales_breakdown
   GROUP BY ds.store_type, dp.product_price, o.product_quantity, ds.city, ds.region, dt.day, dt.month, dt.year, dt.time_period
   ORDER BY (round((sum(dp.product_price * o.product_quantity::double precision) / sum(sum(dp.product_price * o.product_quantity::double precision)) OVER ())::numeric * 100::numeric, 2)) DESC;
 
+-- @name store_sales_breakdown_owner
+-- @depends create_store_sales_breakdown
 ALTER TABLE public.store_sales_breakdown
     OWNER TO postgres;
 
 
+-- @name create_store_view
+-- @depends
 CREATE OR REPLACE VIEW public.store_view
  AS
  SELECT dim_store_details.store_code,
@@ -80,5 +96,7 @@ CREATE OR REPLACE VIEW public.store_view
    FROM dim_store_details
   WHERE dim_store_details.country_code::text = ANY (ARRAY['GB'::character varying, 'DE'::character varying, 'US'::character varying]::text[]);
 
+-- @name store_view_owner
+-- @depends create_store_view
 ALTER TABLE public.store_view
     OWNER TO postgres;
@@ -0,0 +1,14 @@
+-- Table: public.ctrl_watermarks
+-- Stores the high-water mark of each incremental pipeline.
+-- Created automatically by DatabaseConnector.get_watermark
+
+CREATE TABLE IF NOT EXISTS public.ctrl_watermarks
+(
+    pipeline_name character varying(255) COLLATE pg_catalog."default" NOT NULL,
+    key_column character varying(255) COLLATE pg_catalog."default" NOT NULL,
+    watermark character varying(255) COLLATE pg_catalog."default" NOT NULL,
+    last_updated timestamp without time zone NOT NULL DEFAULT now(),
+    CONSTRAINT ctrl_watermarks_pkey PRIMARY KEY (pipeline_name)
+)
+
+TABLESPACE pg_default;
@@ -0,0 +1,136 @@
+import unittest
+import time
+import pandas as pd
+from unittest.mock import MagicMock
+from database_scripts.async_data_extraction import AsyncDataExtractor
+
+
+class TestAsyncDataExtractor(unittest.TestCase):
+
+    def setUp(self):
+        self.test_extractor = MagicMock()
+        self.test_async_extractor = AsyncDataExtractor(
+            self.test_extractor, max_concurrency=4, timeout=5, retries=3, retry_delay=0.01
+        )
+
+    def test_extract_all_concurrently(self):
+        def slow_read(url, *args):
+            time.sleep(0.5)
+            return pd.DataFrame({'url': [url]})
+
+        self.test_extractor.read_s3_bucket_to_dataframe.side_effect = slow_read
+        self.test_extractor.read_json_from_s3.side_effect = slow_read
+        self.test_extractor.retrieve_pdf_data_in_parallel.side_effect = slow_read
+        test_currency_extractor = MagicMock(url='https://www.x-rates.com')
+        test_currency_extractor.read_html_data.side_effect = lambda: time.sleep(0.5)
+        test_currency_extractor.html_to_dataframe.side_effect = lambda html, index_number: pd.DataFrame({'index': [index_number]})
+
+        start_time = time.perf_counter()
+        extracted_sources = self.test_async_extractor.run(lambda async_extractor: {
+            'products': async_extractor.read_s3_bucket_to_dataframe('s3://data-handling-public/products.csv'),
+            'date_details': async_extractor.read_json_from_s3('https://data-handling-public.s3.eu-west-1.amazonaws.com/date_details.json'),
+            'card_details': async_extractor.retrieve_pdf_data('https://data-handling-public.s3.eu-west-1.amazonaws.com/card_details.pdf'),
+            'currency_rates': async_extractor.read_html_tables(test_currency_extractor, [0, 1]),
+        })
+        elapsed_time = time.perf_counter() - start_time
+
+        # Testing if the sources are extracted at the same time rather than one after another
+        self.assertLess(elapsed_time, 1.5)
+        self.assertEqual(list(extracted_sources), ['products', 'date_details', 'card_details', 'currency_rates'])
+        self.assertEqual(extracted_sources['products']['url'][0], 's3://data-handling-public/products.csv')
+        self.assertEqual([table['index'][0] for table in extracted_sources['currency_rates']], [0, 1])
+
+    def test_max_concurrency(self):
+        self.test_async_extractor.max_concurrency = 2
+        running = []
+        peak = []
+
+        def tracked_read(url):
+            running.append(url)
+            peak.append(len(running))
+            time.sleep(0.1)
+            running.remove(url)
+            return pd.DataFrame()
+
+        self.test_extractor.read_s3_bucket_to_dataframe.side_effect = tracked_read
+        self.test_async_extractor.run(lambda async_extractor: {
+            f'source_{number}': async_extractor.read_s3_bucket_to_dataframe(f's3://bucket/source_{number}.csv')
+            for number in range(6)
+        })
+        self.assertLessEqual(max(peak), 2)
+
+    def test_retries(self):
+        self.test_extractor.read_json_from_s3.side_effect = [
+            Exception(), Exception(), pd.DataFrame({'month': ['9']})
+        ]
+        extracted_sources = self.test_async_extractor.run(lambda async_extractor: {
+            'date_details': async_extractor.read_json_from_s3('https://bucket.s3.eu-west-1.amazonaws.com/date_details.json')
+        })
+        self.assertEqual(extracted_sources['date_details']['month'][0], '9')
+        self.assertEqual(self.test_extractor.read_json_from_s3.call_count, 3)
+
+        # Testing if the error is returned once every attempt has failed
+        self.test_extractor.read_json_from_s3.reset_mock()
+        self.test_extractor.read_json_from_s3.side_effect = ConnectionError('unreachable')
+        extracted_sources = self.test_async_extractor.run(lambda async_extractor: {
+            'date_details': async_extractor.read_json_from_s3('https://bucket.s3.eu-west-1.amazonaws.com/date_details.json')
+        })
+        self.assertIsInstance(extracted_sources['date_details'], ConnectionError)
+        self.assertEqual(self.test_extractor.read_json_from_s3.call_count, 3)
+
+        # Testing if invalid arguments are not retried
+        self.test_extractor.read_json_from_s3.reset_mock()
+        self.test_extractor.read_json_from_s3.side_effect = ValueError('Invalid URL')
+        extracted_sources = self.test_async_extractor.run(lambda async_extractor: {
+            'date_details': async_extractor.read_json_from_s3('not a url')
+        })
+        self.assertIsInstance(extracted_sources['date_details'], ValueError)
+        self.assertEqual(self.test_extractor.read_json_from_s3.call_count, 1)
+
+    def test_timeout(self):
+        self.test_async_extractor.timeout = 0.1
+        self.test_async_extractor.retries = 1
+        self.test_extractor.read_s3_bucket_to_dataframe.side_effect = lambda url: time.sleep(0.5)
+        self.test_extractor.read_json_from_s3.return_value = pd.DataFrame({'month': ['9']})
+
+        extracted_sources = self.test_async_extractor.run(lambda async_extractor: {
+            'products': async_extractor.read_s3_bucket_to_dataframe('s3://bucket/products.csv'),
+            'date_details': async_extractor.read_json_from_s3('https://bucket.s3.eu-west-1.amazonaws.com/date_details.json'),
+        })
+        # Testing if a source which times out does not stop the other sources
+        self.assertIsInstance(extracted_sources['products'], TimeoutError)
+        self.assertEqual(extracted_sources['date_details']['month'][0], '9')
+
+    def test_timeout_late_result(self):
+        self.test_async_extractor.max_concurrency = 1
+        self.test_async_extractor.timeout = 0.2
+        self.test_async_extractor.retries = 2
+        running = []
+        peak = []
+
+        def tracked_read(url):
+            running.append(url)
+            peak.append(len(running))
+            time.sleep(0.3)
+            running.remove(url)
+            return pd.DataFrame({'url': [url]})
+
+        self.test_extractor.read_s3_bucket_to_dataframe.side_effect = tracked_read
+        extracted_sources = self.test_async_extractor.run(lambda async_extractor: {
+            'products': async_extractor.read_s3_bucket_to_dataframe('s3://bucket/products.csv'),
+            'users': async_extractor.read_s3_bucket_to_dataframe('s3://bucket/users.csv'),
+        })
+        # Testing if a thread which finishes after the timeout keeps its slot and its result is used, rather than downloading again
+        self.assertEqual(max(peak), 1)
+        self.assertEqual(self.test_extractor.read_s3_bucket_to_dataframe.call_count, 2)
+        self.assertEqual(extracted_sources['products']['url'][0], 's3://bucket/products.csv')
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            AsyncDataExtractor(self.test_extractor, max_concurrency=0)
+        with self.assertRaises(ValueError):
+            AsyncDataExtractor(self.test_extractor, retries=0)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=[''], verbosity=2, exit=False)
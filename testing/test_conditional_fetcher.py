@@ -0,0 +1,130 @@
+import unittest
+import tempfile
+import shutil
+import threading
+import os
+import boto3
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from moto import mock_aws
+from database_scripts.conditional_fetcher import ConditionalFetcher
+
+
+class ConditionalRequestHandler(BaseHTTPRequestHandler):
+    # The payload served, with an ETag which changes along with it
+    payload = b'card_number,expiry_date\n30060773296197,09/26\n'
+    etag = '"etag-1"'
+    full_responses = 0
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        type(self).full_responses += 1
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestConditionalFetcher(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('127.0.0.1', 0), ConditionalRequestHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.test_url = f'http://127.0.0.1:{cls.server.server_port}/card_details.csv'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.test_fetcher = ConditionalFetcher(self.cache_directory)
+        ConditionalRequestHandler.payload = b'card_number,expiry_date\n30060773296197,09/26\n'
+        ConditionalRequestHandler.etag = '"etag-1"'
+        ConditionalRequestHandler.full_responses = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+
+    def test_fetch(self):
+        payload_file_path, changed = self.test_fetcher.fetch(self.test_url)
+        self.assertTrue(changed)
+        with open(payload_file_path, 'rb') as payload_file:
+            self.assertEqual(payload_file.read(), ConditionalRequestHandler.payload)
+
+        # Testing if an unchanged source returns the stored payload without downloading it again
+        self.assertEqual(self.test_fetcher.fetch(self.test_url), (payload_file_path, False))
+        self.assertEqual(ConditionalRequestHandler.full_responses, 1)
+
+        # Testing if the stored headers are kept between runs
+        self.assertEqual(ConditionalFetcher(self.cache_directory).fetch(self.test_url), (payload_file_path, False))
+
+        # Testing if a changed source is downloaded again
+        ConditionalRequestHandler.payload = b'card_number,expiry_date\n4252720361802860591,10/23\n'
+        ConditionalRequestHandler.etag = '"etag-2"'
+        payload_file_path, changed = self.test_fetcher.fetch(self.test_url)
+        self.assertTrue(changed)
+        with open(payload_file_path, 'rb') as payload_file:
+            self.assertEqual(payload_file.read(), ConditionalRequestHandler.payload)
+        self.assertEqual(self.test_fetcher.get_version(self.test_url), '"etag-2"')
+
+    def test_fetch_missing_payload(self):
+        payload_file_path, _ = self.test_fetcher.fetch(self.test_url)
+        os.remove(payload_file_path)
+
+        # Testing if the source is downloaded in full when the stored payload has been removed
+        self.assertEqual(self.test_fetcher.fetch(self.test_url), (payload_file_path, True))
+        self.assertEqual(ConditionalRequestHandler.full_responses, 2)
+
+    def test_processed(self):
+        self.test_fetcher.fetch(self.test_url)
+        self.assertFalse(self.test_fetcher.is_processed('card_details_pipeline', self.test_url))
+
+        self.test_fetcher.mark_processed('card_details_pipeline', self.test_url)
+        self.assertTrue(self.test_fetcher.is_processed('card_details_pipeline', self.test_url))
+        # Testing if each pipeline keeps its own record
+        self.assertFalse(self.test_fetcher.is_processed('time_events_pipeline', self.test_url))
+
+        # Testing if a new version of the source has not been processed
+        ConditionalRequestHandler.etag = '"etag-2"'
+        self.test_fetcher.fetch(self.test_url)
+        self.assertFalse(self.test_fetcher.is_processed('card_details_pipeline', self.test_url))
+
+    @mock_aws
+    def test_fetch_s3_object(self):
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+        s3_client = boto3.client('s3', region_name='eu-west-1')
+        s3_client.create_bucket(Bucket='test-bucket', CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'})
+        s3_client.put_object(Bucket='test-bucket', Key='date_details.json', Body=b'{"month":{"0":"9"}}')
+        test_url = 'https://test-bucket.s3.eu-west-1.amazonaws.com/date_details.json'
+
+        payload_file_path, changed = self.test_fetcher.fetch_s3_object(test_url, s3_client, 'test-bucket', 'date_details.json')
+        self.assertTrue(changed)
+        with open(payload_file_path, 'rb') as payload_file:
+            self.assertEqual(payload_file.read(), b'{"month":{"0":"9"}}')
+
+        # Testing if an unchanged object is not downloaded again
+        self.assertEqual(
+            self.test_fetcher.fetch_s3_object(test_url, s3_client, 'test-bucket', 'date_details.json'),
+            (payload_file_path, False)
+        )
+
+        # Testing if a changed object is downloaded again
+        s3_client.put_object(Bucket='test-bucket', Key='date_details.json', Body=b'{"month":{"0":"2"}}')
+        self.assertEqual(
+            self.test_fetcher.fetch_s3_object(test_url, s3_client, 'test-bucket', 'date_details.json'),
+            (payload_file_path, True)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main(argv=[''], verbosity=2, exit=False)
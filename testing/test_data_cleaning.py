@@ -336,5 +336,121 @@ class TestDataCleaning(unittest.TestCase):
         pass
 
 
+class TestDataFrameCleaning(unittest.TestCase):
+    # Tests of the cleaning methods which only need a DataFrame, so they run without the source and target databases
+
+    def setUp(self):
+        self.test_data_cleaner = DataCleaning()
+
+        # Variables for convert_to_kg tests 
+        self.list_of_weights = [
+            '0.08kg', '420g', '1.68kg', '0.718kg', '600ml', '0.504kg', '480g', '8 x 150g', '6oz',
+        ]
+        self.list_of_invalid_weights = ['110lbs', '10 Gallons', '10ms']
+
+        # Variables for convert_to_date tests 
+        self.list_of_dates = ['2013-10-14','2010-07-17','2000-06-15','2017-01-20','2006 September 03']
+
+    def test_convert_to_kg_vectorised(self):
+
+        test_weights = pd.Series(self.list_of_weights + self.list_of_invalid_weights + ['77g .', '12 x 1.5g'])
+
+        converted_weights = self.test_data_cleaner.convert_to_kg_vectorised(test_weights)
+
+        # Asserting if each weight matches the output of the convert_to_kg method
+        expected_output = [self.test_data_cleaner.convert_to_kg(weight) for weight in test_weights]
+        self.assertEqual(len(converted_weights), len(expected_output))
+        for converted_weight, expected_weight in zip(converted_weights, expected_output):
+            if expected_weight is None:
+                self.assertTrue(pd.isna(converted_weight))
+            else:
+                self.assertEqual(converted_weight, expected_weight)
+
+    def test_clean_dates_vectorised(self):
+
+        test_dates = pd.Series(self.list_of_dates + ['NULL', '2001/12/01', 'Not a date'])
+
+        formatted_dates = self.test_data_cleaner.clean_dates_vectorised(test_dates)
+
+        # Asserting if each date matches the output of the clean_dates method
+        expected_output = [self.test_data_cleaner.clean_dates(date) for date in test_dates]
+        self.assertEqual(len(formatted_dates), len(expected_output))
+        for formatted_date, expected_date in zip(formatted_dates, expected_output):
+            if pd.isna(expected_date):
+                self.assertTrue(pd.isna(formatted_date))
+            else:
+                self.assertEqual(formatted_date, expected_date)
+
+    def test_resolve_foreign_keys(self):
+        orders_data = pd.DataFrame({
+            'card_number': ['4971858637664481', '999', None],
+            'store_code': ['WEB-1388012W', 'BL-8387506C', 'XX-0000000X'],
+            'card_key': [None, None, None],
+            'store_key': [None, None, None],
+            'currency_key': [None, None, None],
+            'country_code': [None, None, None],
+        })
+        foreign_keys = [
+            {'target_column': 'card_key', 'source_column': 'card_number'},
+            {'target_column': 'store_key', 'source_column': 'store_code'},
+            {'target_column': 'country_code', 'source_column': 'store_code'},
+            {'target_column': 'currency_key', 'source_column': 'country_code'},
+        ]
+        key_maps = {
+            'card_key': pd.Series([1], index=['4971858637664481']),
+            'store_key': pd.Series([1, 2], index=['WEB-1388012W', 'BL-8387506C']),
+            'country_code': pd.Series(['GB', 'DE'], index=['WEB-1388012W', 'BL-8387506C']),
+            'currency_key': pd.Series([2, 3], index=['GB', 'DE']),
+        }
+
+        resolved_orders = self.test_data_cleaner.resolve_foreign_keys(orders_data, key_maps, foreign_keys)
+
+        # Unmatched natural keys are given the Unknown key 0, and missing natural keys the Not Applicable key -1
+        self.assertEqual(resolved_orders['card_key'].tolist(), [1, 0, -1])
+        self.assertEqual(resolved_orders['store_key'].tolist(), [1, 2, 0])
+        self.assertEqual(resolved_orders['card_key'].dtype, 'int64')
+        # The currency_key is looked up from the country_code resolved before it
+        self.assertEqual(resolved_orders['country_code'].tolist()[:2], ['GB', 'DE'])
+        self.assertTrue(pd.isna(resolved_orders['country_code'][2]))
+        self.assertEqual(resolved_orders['currency_key'].tolist(), [2, 3, -1])
+
+    def test_clean_card_details_keeps_compact_dtypes(self):
+        # Card details extracted with the card_provider column as a categorical
+        card_details_data = pd.DataFrame({
+            'card_number': ['30060773296197', '349624180933183', 'NULL', '4252720361802860591'] * 10,
+            'expiry_date': ['09/26', '10/23', 'NULL', '01/30'] * 10,
+            'card_provider': ['Diners Club / Carte Blanche', 'American Express', 'NULL', 'VISA 16 digit'] * 10,
+            'date_payment_confirmed': ['2015-11-25', '2001-06-18', 'NULL', '2000 December 26'] * 10,
+        })
+        card_details_data['card_provider'] = card_details_data['card_provider'].astype('category')
+
+        cleaned_card_details = self.test_data_cleaner.clean_card_details(card_details_data)
+
+        # Testing if the rows are cleaned without losing the categorical dtype
+        self.assertEqual(len(cleaned_card_details), 30)
+        self.assertEqual(cleaned_card_details['card_provider'].dtype, 'category')
+        self.assertNotIn('NULL', cleaned_card_details['card_provider'].tolist())
+
+    def test_clean_projected_orders_table(self):
+        # Orders read with only the needed columns, already renamed by the extractor
+        projected_orders_data = pd.DataFrame({
+            'order_key': [0, 1],
+            'date_uuid': ['9476f17e-5d6a-4117-874d-9cdb38ca1fa6', '0423a395-a04d-4e4a-bd0f-d237cbd5a295'],
+            'user_uuid': ['93caf182-e4e9-4c6e-bebb-60a1a9dcf9b8', '8fe96c3a-d62d-4eb5-b313-cf12d9126a49'],
+            'card_number': ['30060773296197', '349624180933183'],
+            'store_code': ['BL-8387506C', 'WEB-1388012W'],
+            'product_code': ['R7-3126933h', 'C2-7287916l'],
+            'product_quantity': [3, 2],
+        })
+
+        cleaned_orders_data = self.test_data_cleaner.clean_orders_table(None, projected_orders_data, 'orders_table')
+
+        expected_columns  = ['order_key','date_uuid','user_uuid','card_key','date_key','product_key',
+                            'store_key','user_key','currency_key','card_number','store_code','product_code',
+                            'product_quantity', 'country_code']
+        self.assertEqual(cleaned_orders_data.columns.tolist(), expected_columns)
+        self.assertEqual(cleaned_orders_data['store_code'].tolist(), ['BL-8387506C', 'WEB-1388012W'])
+
+
 if __name__ == "__main__":
     unittest.main(argv=[''], verbosity=2, exit=False)
\ No newline at end of file
@@ -1,13 +1,20 @@
 import unittest
 from unittest import mock
 from unittest.mock import patch, MagicMock 
+from io import BytesIO
 from sqlalchemy.exc import OperationalError, DBAPIError
 from sqlalchemy import create_engine
 import pandas as pd 
 from database_scripts.data_extraction import DataExtractor
+from database_scripts.extraction_cache import ExtractionCache
 from database_scripts.database_utils import DatabaseConnector
 from database_scripts.file_handler import get_absolute_file_path
+from moto import mock_aws
 import tabula 
+import pypdf
+from pypdf.generic import ContentStream
+import tempfile
+import boto3
 import os 
 
 
@@ -39,10 +46,210 @@ class TestDatabaseExtraction(unittest.TestCase):
         test_read = self.test_extractor.read_rds_table(self.table_name, self.test_source_database_engine)
         # Testing if a dataframe is returned
         self.assertIsInstance(test_read, pd.DataFrame)
-        #TODO: Add another test to raise an error below 
+        #TODO: Add another test to raise an error below
+
+    def test_read_rds_table_in_chunks(self):
+
+        test_chunks = list(self.test_extractor.read_rds_table_in_chunks(self.table_name, self.test_source_database_engine, chunksize=1000))
+        # Testing if every chunk is a dataframe no larger than the chunksize
+        for test_chunk in test_chunks:
+            self.assertIsInstance(test_chunk, pd.DataFrame)
+            self.assertLessEqual(len(test_chunk), 1000)
+
+        # Testing if the chunks add up to the full table
+        test_read = self.test_extractor.read_rds_table(self.table_name, self.test_source_database_engine)
+        self.assertEqual(sum(len(test_chunk) for test_chunk in test_chunks), len(test_read))
+
+        # Testing if an invalid chunksize raises a ValueError
+        with self.assertRaises(ValueError):
+            next(self.test_extractor.read_rds_table_in_chunks(self.table_name, self.test_source_database_engine, chunksize=0))
 
-     
     
+    @patch('database_scripts.data_extraction.pd.read_sql_query')
+    def test_mock_read_rds_table_incremental(self, mock_read_sql_query):
+        mock_engine = MagicMock()
+        mock_engine.dialect.identifier_preparer.quote.side_effect = lambda name: f'"{name}"'
+        mock_read_sql_query.return_value = iter([pd.DataFrame({'level_0': [11, 12]}), pd.DataFrame({'level_0': [13]})])
+
+        test_chunks = list(self.test_extractor.read_rds_table_incremental('orders_table', mock_engine, 'level_0', watermark='10', chunksize=2))
+
+        # Assert that only the rows past the watermark are read, in order of the key column
+        query, _ = mock_read_sql_query.call_args[0]
+        self.assertEqual(str(query), 'SELECT * FROM "orders_table" WHERE "level_0" > :watermark ORDER BY "level_0"')
+        self.assertEqual(mock_read_sql_query.call_args.kwargs['params'], {'watermark': '10'})
+        self.assertEqual([len(test_chunk) for test_chunk in test_chunks], [2, 1])
+
+        # Without a watermark every row is read
+        mock_read_sql_query.return_value = iter([])
+        list(self.test_extractor.read_rds_table_incremental('orders_table', mock_engine, 'level_0'))
+        query, _ = mock_read_sql_query.call_args[0]
+        self.assertEqual(str(query), 'SELECT * FROM "orders_table" ORDER BY "level_0"')
+
+    @patch('database_scripts.data_extraction.pd.read_sql_query')
+    def test_mock_read_rds_table_incremental_with_projection(self, mock_read_sql_query):
+        mock_engine = MagicMock()
+        mock_engine.dialect.identifier_preparer.quote.side_effect = lambda name: f'"{name}"'
+        # The chunks hold the key column under the name the projection gives it
+        mock_read_sql_query.return_value = iter([pd.DataFrame({'order_key': [11, 12]})])
+        columns = {'level_0': 'order_key', 'product_quantity': 'product_quantity'}
+
+        test_chunks = list(self.test_extractor.read_rds_table_incremental(
+            'orders_table', mock_engine, 'level_0', watermark='10', chunksize=2, columns=columns
+        ))
+
+        # Assert that the rows are filtered and ordered on the source column, and the renamed chunks are yielded
+        query, _ = mock_read_sql_query.call_args[0]
+        self.assertEqual(
+            str(query),
+            'SELECT "level_0" AS "order_key", "product_quantity" FROM "orders_table" WHERE "level_0" > :watermark ORDER BY "level_0"'
+        )
+        self.assertEqual(test_chunks[0]['order_key'].tolist(), [11, 12])
+        self.assertEqual(self.test_extractor.get_projected_column_name('level_0', columns), 'order_key')
+        self.assertEqual(self.test_extractor.get_projected_column_name('level_0', ['level_0']), 'level_0')
+
+    def test_read_rds_table_partitioned(self):
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            # A file based database lets each partition be read over its own connection
+            test_engine = create_engine(f"sqlite:///{os.path.join(temporary_directory, 'orders.db')}")
+            test_orders_table = pd.DataFrame({
+                'level_0': pd.array([None, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10], dtype='Int64'),
+                'product_quantity': [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5],
+            })
+            test_orders_table.to_sql('orders_table', test_engine, index=False)
+
+            # Testing if the keys are split into equal ranges, with the null key read in the first range
+            partition_tables = list(self.test_extractor.iter_rds_table_partitions('orders_table', test_engine, 'level_0', 3))
+            self.assertEqual([len(partition_table) for partition_table in partition_tables], [4, 3, 4])
+
+            # Testing if every row is read once, however many partitions are asked for
+            for partitions in [1, 4, 20]:
+                result = self.test_extractor.read_rds_table_partitioned('orders_table', test_engine, 'level_0', partitions)
+                self.assertEqual(len(result), 11)
+                self.assertEqual(result['product_quantity'].sum(), test_orders_table['product_quantity'].sum())
+
+            # Testing if only max_workers partitions are read ahead of the caller
+            with patch('database_scripts.data_extraction.pd.read_sql_query', wraps=pd.read_sql_query) as mock_read_sql_query:
+                partition_iterator = self.test_extractor.iter_rds_table_partitions('orders_table', test_engine, 'level_0', 10, max_workers=2)
+                next(partition_iterator)
+                self.assertLessEqual(mock_read_sql_query.call_count, 2)
+                self.assertEqual(len(list(partition_iterator)), 9)
+
+            with self.assertRaises(ValueError):
+                self.test_extractor.read_rds_table_partitioned('orders_table', test_engine, 'level_0', 0)
+            with self.assertRaises(ValueError):
+                self.test_extractor.read_rds_table_partitioned('orders_table', test_engine, 'level_0', 4, max_workers=0)
+            test_engine.dispose()
+
+    def test_read_rds_table_with_projection(self):
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            test_engine = create_engine(f"sqlite:///{os.path.join(temporary_directory, 'stores.db')}")
+            pd.DataFrame({
+                'index': [0, 1, 2],
+                'address': ['Flat 72W Sally Isle', None, 'Studio 8 Mendoza'],
+                'lat': [None, None, None],
+                'store_type': ['Local', 'Web Portal', 'Super Store'],
+            }).to_sql('legacy_store_details', test_engine, index=False)
+
+            # Testing if only the projected columns are read, under their new names, and only the rows matching the filter
+            result = self.test_extractor.read_rds_table(
+                'legacy_store_details', test_engine, columns={'index': 'store_key', 'store_type': 'store_type'}, where="store_type <> 'Web Portal'"
+            )
+            self.assertEqual(result.columns.tolist(), ['store_key', 'store_type'])
+            self.assertEqual(result['store_key'].tolist(), [0, 2])
+
+            # Testing if the filter is combined with the conditions of the other readers
+            select_query = self.test_extractor._build_select_query(
+                'legacy_store_details', test_engine, ['index', 'address'], ['address IS NOT NULL', '"index" > :watermark']
+            )
+            self.assertEqual(
+                select_query,
+                'SELECT "index", address FROM legacy_store_details WHERE (address IS NOT NULL) AND ("index" > :watermark)'
+            )
+            test_engine.dispose()
+
+    def test_compact_dtypes(self):
+        test_schema_config = {'schemas': {'tables': {'land_product_data': {
+            'product_key': 'BIGINT',
+            'category': 'VARCHAR(50)',
+            'uuid': 'UUID',
+            'availability': 'VARCHAR(30)',
+            'product_price': 'FLOAT',
+            'weight_class': 'VARCHAR(50)',
+        }}}}
+        test_products_table = pd.DataFrame({
+            'product_key': [1.0, 2.0, None, 4.0] * 250,
+            'category': ['toys-and-games', 'diy', 'homeware', 'diy'] * 250,
+            'uuid': [f'83dc0a69-f96f-4c34-bcb7-{number:012d}' for number in range(1000)],
+            'removed': ['Still_avaliable', 'Removed', 'Still_avaliable', 'Still_avaliable'] * 250,
+            'product_price': ['£39.99', '£9.99', '£4.50', '£17.99'] * 250,
+            'weight_class': [1, 'Light', 'Heavy', 'Light'] * 250,
+        })
+
+        result = self.test_extractor.compact_dtypes(
+            test_products_table, test_schema_config, 'land_product_data', column_aliases={'removed': 'availability'}
+        )
+
+        # Testing if low-cardinality strings become categoricals and unique strings become Arrow strings
+        self.assertEqual(result['category'].dtype, 'category')
+        self.assertEqual(result['removed'].dtype, 'category')
+        self.assertEqual(result['uuid'].dtype, pd.StringDtype('pyarrow'))
+        # Testing if whole numbers are downcast, keeping their nulls
+        self.assertEqual(result['product_key'].dtype, 'Int8')
+        self.assertTrue(result['product_key'].isna().iloc[2])
+        # Testing if columns which do not match their schema type yet are left as they are
+        self.assertEqual(result['product_price'].dtype, test_products_table['product_price'].dtype)
+        self.assertEqual(result['weight_class'].dtype, object)
+
+        self.assertEqual(result['category'].tolist(), test_products_table['category'].tolist())
+        self.assertLess(result.memory_usage(deep=True).sum(), test_products_table.memory_usage(deep=True).sum())
+
+    def test_extract_with_cache(self):
+        mock_cache = MagicMock()
+        mock_cache.get.return_value = None
+        mock_extract_function = MagicMock(return_value=pd.DataFrame({'A': [1, 2, 3]}))
+        test_cached_extractor = DataExtractor(mock_cache)
+
+        # Testing if a cache miss extracts the source and caches it
+        result = test_cached_extractor.extract_with_cache(self.test_url, '"etag"', mock_extract_function, self.test_url)
+        mock_extract_function.assert_called_once_with(self.test_url)
+        mock_cache.put.assert_called_once_with(self.test_url, '"etag"', result)
+
+        # Testing if a cache hit skips the extraction
+        mock_cache.get.return_value = result
+        test_cached_extractor.extract_with_cache(self.test_url, '"etag"', mock_extract_function, self.test_url)
+        self.assertEqual(mock_extract_function.call_count, 1)
+
+        # Testing if bypass_cache always extracts the source
+        test_cached_extractor.extract_with_cache(self.test_url, '"etag"', mock_extract_function, self.test_url, bypass_cache=True)
+        self.assertEqual(mock_extract_function.call_count, 2)
+        self.assertEqual(mock_cache.put.call_count, 1)
+
+    def test_mock_read_rds_table_with_copy(self):
+        # Mock an engine whose raw DBAPI cursor reports two columns and copies two rows
+        mock_engine = MagicMock()
+        mock_engine.dialect.identifier_preparer.quote.side_effect = lambda name: f'"{name}"'
+        mock_cursor = mock_engine.raw_connection.return_value.cursor.return_value.__enter__.return_value
+        mock_cursor.description = [MagicMock(type_code=20), MagicMock(type_code=1043)]
+        mock_cursor.description[0].name = 'index'
+        mock_cursor.description[1].name = 'card_number'
+        mock_cursor.copy_expert.side_effect = lambda sql, buffer: buffer.write(b'index,card_number\n1,0123\n2,NULL\n3,""\n4,\\N\n')
+
+        test_schema = {'schemas': {'tables': {'orders_table': {'card_number': 'VARCHAR(30)'}}}}
+        result = self.test_extractor.read_rds_table_with_copy('orders_table', mock_engine, schema_config=test_schema)
+
+        # Assert that the table was copied using COPY ... TO STDOUT
+        mock_cursor.copy_expert.assert_called_once()
+        self.assertEqual(
+            mock_cursor.copy_expert.call_args[0][0],
+            'COPY (SELECT * FROM "orders_table") TO STDOUT WITH (FORMAT csv, HEADER, NULL \'\\N\')'
+        )
+        # Assert that the schema keeps card_number as a string and 'NULL' is not converted to a null
+        self.assertEqual(result['card_number'].tolist()[:3], ['0123', 'NULL', ''])
+        # Assert that only the NULL marker is read as a null, so the empty string is kept
+        self.assertTrue(pd.isna(result['card_number'][3]))
+        self.assertEqual(result['index'].tolist(), [1, 2, 3, 4])
+        mock_engine.raw_connection.return_value.close.assert_called_once()
+
     def test_retrieve_pdf_data(self):
         
         test_pdf_table = self.test_extractor.retrieve_pdf_data(
@@ -56,6 +263,65 @@ class TestDatabaseExtraction(unittest.TestCase):
             self.test_extractor.retrieve_pdf_data("Not a link to a PDF")
 
     
+    @patch('database_scripts.data_extraction.tabula.convert_into_by_batch')
+    def test_mock_retrieve_pdf_data_in_parallel(self, mock_convert_into_by_batch):
+        converted_pages = []
+
+        def convert_into_by_batch(page_directory, **kwargs):
+            # Each page holds one table with a single card number
+            for file_name in sorted(os.listdir(page_directory)):
+                page_number = int(file_name[len('page_'):-len('.pdf')])
+                converted_pages.append(page_number)
+                pd.DataFrame({'card_number': [page_number]}).to_csv(
+                    os.path.join(page_directory, f'page_{page_number}.csv'), index=False
+                )
+        mock_convert_into_by_batch.side_effect = convert_into_by_batch
+
+        def write_pdf(pdf_file_path, page_contents):
+            pdf_writer = pypdf.PdfWriter()
+            for page_content in page_contents:
+                content_stream = ContentStream(None, pdf_writer)
+                content_stream.set_data(page_content)
+                pdf_writer.add_blank_page(200, 200).replace_contents(content_stream)
+            pdf_writer.write(pdf_file_path)
+
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            pdf_file_path = os.path.join(temporary_directory, 'card_details.pdf')
+            write_pdf(pdf_file_path, [b'q Q', b'q 1 0 0 1 0 0 cm Q', b'q 2 0 0 2 0 0 cm Q'])
+            test_cached_extractor = DataExtractor(ExtractionCache(os.path.join(temporary_directory, 'cache')))
+
+            # Testing if every page is read in a single batch and combined in page order
+            result = test_cached_extractor.retrieve_pdf_data_in_parallel(pdf_file_path, max_workers=1)
+            self.assertEqual(list(result['card_number']), [1, 2, 3])
+            self.assertEqual(mock_convert_into_by_batch.call_count, 1)
+            self.assertEqual(converted_pages, [1, 2, 3])
+
+            # Testing if unchanged pages are read from the cache
+            result = test_cached_extractor.retrieve_pdf_data_in_parallel(pdf_file_path, max_workers=1)
+            self.assertEqual(list(result['card_number']), [1, 2, 3])
+            self.assertEqual(mock_convert_into_by_batch.call_count, 1)
+
+            # Testing if only the changed page is read again
+            write_pdf(pdf_file_path, [b'q Q', b'q 3 0 0 3 0 0 cm Q', b'q 2 0 0 2 0 0 cm Q'])
+            pages = dict(test_cached_extractor.iter_pdf_pages(pdf_file_path, max_workers=1))
+            self.assertEqual(sorted(pages), [1, 2, 3])
+            self.assertEqual(mock_convert_into_by_batch.call_count, 2)
+            self.assertEqual(converted_pages, [1, 2, 3, 2])
+
+            # Testing if the ranges are shared between the worker threads and still combined in page order
+            result = DataExtractor().retrieve_pdf_data_in_parallel(pdf_file_path, max_workers=2)
+            self.assertEqual(list(result['card_number']), [1, 2, 3])
+            self.assertEqual(mock_convert_into_by_batch.call_count, 4)
+
+        with self.assertRaises(ValueError):
+            list(self.test_extractor.iter_pdf_pages('This is not a pdf link'))
+
+    def test_group_page_ranges(self):
+        # Testing if the pages are split at the cached pages and shared between the workers
+        self.assertEqual(DataExtractor._group_page_ranges([1, 2, 3, 4, 5, 6, 7, 8], 4), [(1, 2), (3, 4), (5, 6), (7, 8)])
+        self.assertEqual(DataExtractor._group_page_ranges([1, 2, 3, 5, 6, 9], 1), [(1, 3), (5, 6), (9, 9)])
+        self.assertEqual(DataExtractor._group_page_ranges([], 4), [])
+
     @patch('database_scripts.data_extraction.DataExtractor._is_valid_url')
     @patch('database_scripts.data_extraction.tabula.read_pdf')
     def test_mock_retrieve_pdf_data(self, mock_read_pdf, mock_is_valid_url):
@@ -115,8 +381,8 @@ class TestDatabaseExtraction(unittest.TestCase):
     @patch('database_scripts.data_extraction.boto3.client')
     def test_mock_read_s3_bucket_to_dataframe(self, mock_client):
         # Mock the response from s3_client.get_object
-        mock_body = MagicMock()
-        mock_body.read.return_value.decode.return_value = 'col1,col2\nvalue1,value2\n'
+        # The body is a file-like stream which is parsed without being read in full
+        mock_body = BytesIO(b'col1,col2\nvalue1,value2\n')
         mock_response = {'Body': mock_body}
         mock_client.return_value.get_object.return_value = mock_response
 
@@ -124,16 +390,60 @@ class TestDatabaseExtraction(unittest.TestCase):
         expected_df = pd.DataFrame({'col1': ['value1'], 'col2': ['value2']})
 
         # Call the method under test
+        # A new extractor is used so that its shared s3_client is created from the mock
         s3_url = 's3://my-bucket-name/my-data.csv'
-        result = self.test_extractor.read_s3_bucket_to_dataframe(s3_url)
+        result = DataExtractor().read_s3_bucket_to_dataframe(s3_url)
 
         # Assert the result matches the expected DataFrame
         pd.testing.assert_frame_equal(result, expected_df)
 
         # Assert that the boto3 client was called with the correct arguments
-        mock_client.assert_called_once_with('s3')
+        mock_client.assert_called_once()
+        self.assertEqual(mock_client.call_args[0], ('s3',))
         mock_client.return_value.get_object.assert_called_once_with(Bucket='my-bucket-name', Key='my-data.csv')
 
+    @mock_aws
+    def test_read_s3_in_chunks(self):
+        # Create a local stand-in for the bucket
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+        s3_client = boto3.client('s3', region_name='eu-west-1')
+        s3_client.create_bucket(Bucket='test-bucket', CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'})
+        s3_client.put_object(Bucket='test-bucket', Key='products.csv', Body='product_name,weight\nTiffany Lamp,420g\nFurReal Dazzlin Dimples,1.6kg\nCafé Set,2kg\n'.encode('utf-8'))
+        s3_client.put_object(Bucket='test-bucket', Key='events.json', Body=b'{"time_period":"Evening"}\n{"time_period":"Evening"}\n{"time_period":"Morning"}\n')
+        test_extractor = DataExtractor()
+
+        # Assert that the csv is read in chunks of at most chunksize rows, and non-ascii text survives
+        chunks = list(test_extractor.read_s3_bucket_to_dataframe('s3://test-bucket/products.csv', chunksize=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(chunks[1]['product_name'].iloc[0], 'Café Set')
+
+        # Assert that newline-delimited json is read in chunks as well
+        chunks = list(test_extractor.read_json_from_s3('https://test-bucket.s3.eu-west-1.amazonaws.com/events.json', chunksize=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(list(pd.concat(chunks)['time_period']), ['Evening', 'Evening', 'Morning'])
+
+        with self.assertRaises(ValueError):
+            test_extractor.read_s3_bucket_to_dataframe('s3://test-bucket/products.csv', chunksize=0)
+
+    @mock_aws
+    def test_read_s3_prefix_to_dataframe(self):
+        # Create a local stand-in for the bucket with a partitioned export
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+        s3_client = boto3.client('s3', region_name='eu-west-1')
+        s3_client.create_bucket(Bucket='test-bucket', CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'})
+        s3_client.put_object(Bucket='test-bucket', Key='products/part-0001.csv', Body=b'product_name,weight\nTiffany Lamp,420g\n')
+        s3_client.put_object(Bucket='test-bucket', Key='products/part-0000.csv', Body=b'product_name,weight\nFurReal Dazzlin Dimples,1.6kg\n')
+        s3_client.put_object(Bucket='test-bucket', Key='products/_SUCCESS', Body=b'')
+
+        result = DataExtractor().read_s3_prefix_to_dataframe('s3://test-bucket/products/', max_workers=2)
+
+        # Assert that every object is read in order of its key, and other objects are ignored
+        expected_df = pd.DataFrame({'product_name': ['FurReal Dazzlin Dimples', 'Tiffany Lamp'], 'weight': ['1.6kg', '420g']})
+        pd.testing.assert_frame_equal(result, expected_df)
+
+        # Testing if an invalid url raises a ValueError
+        with self.assertRaises(ValueError):
+            DataExtractor().read_s3_prefix_to_dataframe('This is not an S3 bucket')
      
     def test_parse_s3_url(self):
         # Testing if the method returns a tuple 
@@ -0,0 +1,59 @@
+import unittest
+import tempfile
+import shutil
+import time
+import os
+import pandas as pd
+from database_scripts.extraction_cache import ExtractionCache
+
+
+class TestExtractionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.test_cache = ExtractionCache(self.cache_directory)
+        self.test_dataframe = pd.DataFrame({'product_name': ['FurReal Dazzlin Dimples', 'Tiffany Lamp'], 'weight': ['1.6kg', '420g']})
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+
+    def test_put_and_get(self):
+        # Testing if a cache miss returns None
+        self.assertIsNone(self.test_cache.get('s3://data-handling-public/products.csv', '"etag-1"'))
+
+        self.assertTrue(self.test_cache.put('s3://data-handling-public/products.csv', '"etag-1"', self.test_dataframe))
+
+        # Testing if the cached dataframe is returned for the same fingerprint
+        cached_dataframe = self.test_cache.get('s3://data-handling-public/products.csv', '"etag-1"')
+        pd.testing.assert_frame_equal(cached_dataframe, self.test_dataframe)
+
+        # Testing if a changed fingerprint is a cache miss
+        self.assertIsNone(self.test_cache.get('s3://data-handling-public/products.csv', '"etag-2"'))
+
+    def test_evict(self):
+        self.test_cache.put('first_source', '1', self.test_dataframe)
+        time.sleep(0.01)
+        self.test_cache.put('second_source', '1', self.test_dataframe)
+        entry_size = max(os.path.getsize(os.path.join(self.cache_directory, file_name)) for file_name in os.listdir(self.cache_directory))
+
+        # Shrink the cache so that only one entry fits, then add a third entry
+        self.test_cache.max_size_bytes = entry_size
+        time.sleep(0.01)
+        self.test_cache.get('second_source', '1')
+        self.test_cache.put('third_source', '1', self.test_dataframe)
+
+        # Testing if only the most recently used entry is kept
+        self.assertIsNone(self.test_cache.get('first_source', '1'))
+        self.assertIsNone(self.test_cache.get('second_source', '1'))
+        self.assertIsNotNone(self.test_cache.get('third_source', '1'))
+        self.assertEqual(len(os.listdir(self.cache_directory)), 1)
+
+    def test_put_uncacheable_dataframe(self):
+        # Testing if a dataframe which Parquet cannot store is skipped rather than raising
+        mixed_dataframe = pd.DataFrame({'number_of_staff': [34, '3n9']})
+        self.assertFalse(self.test_cache.put('legacy_store_details', '1', mixed_dataframe))
+        self.assertEqual(os.listdir(self.cache_directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main(argv=[''], verbosity=2, exit=False)
@@ -0,0 +1,78 @@
+import unittest
+import threading
+from database_scripts.pipeline_scheduler import PipelineScheduler
+
+
+class TestPipelineScheduler(unittest.TestCase):
+
+    def test_run_respects_dependencies(self):
+        test_scheduler = PipelineScheduler(max_workers=3)
+        run_order = []
+        lock = threading.Lock()
+
+        def make_pipeline(pipeline_name):
+            def pipeline():
+                with lock:
+                    run_order.append(pipeline_name)
+            return pipeline
+
+        test_scheduler.add_pipeline("users", make_pipeline("users"))
+        test_scheduler.add_pipeline("stores", make_pipeline("stores"))
+        test_scheduler.add_pipeline("orders", make_pipeline("orders"), dependencies=["users", "stores"])
+        test_scheduler.add_pipeline("alter", make_pipeline("alter"), dependencies=["orders"])
+
+        pipeline_statuses = test_scheduler.run()
+
+        # Assert that every pipeline succeeded
+        self.assertEqual(set(pipeline_statuses.values()), {"succeeded"})
+        # Assert that the dependent pipelines ran after their inputs
+        self.assertEqual(run_order[2:], ["orders", "alter"])
+
+    def test_run_runs_independent_pipelines_concurrently(self):
+        test_scheduler = PipelineScheduler(max_workers=2)
+        # Each pipeline waits for the other, which only works if both run at the same time
+        barrier = threading.Barrier(2, timeout=5)
+
+        test_scheduler.add_pipeline("users", barrier.wait)
+        test_scheduler.add_pipeline("stores", barrier.wait)
+
+        self.assertEqual(test_scheduler.run(), {"users": "succeeded", "stores": "succeeded"})
+
+    def test_run_isolates_failures(self):
+        test_scheduler = PipelineScheduler(max_workers=2)
+
+        def failing_pipeline():
+            raise RuntimeError("Source unavailable")
+
+        test_scheduler.add_pipeline("users", failing_pipeline)
+        test_scheduler.add_pipeline("stores", lambda: None)
+        test_scheduler.add_pipeline("orders", lambda: None, dependencies=["users", "stores"])
+        test_scheduler.add_pipeline("alter", lambda: None, dependencies=["orders"])
+
+        pipeline_statuses = test_scheduler.run()
+
+        # Assert that the failure only affects the pipelines which depend on it
+        expected_statuses = {"users": "failed", "stores": "succeeded", "orders": "skipped", "alter": "skipped"}
+        self.assertEqual(pipeline_statuses, expected_statuses)
+
+    def test_invalid_dependencies(self):
+        # Testing if an unknown dependency raises a ValueError
+        test_scheduler = PipelineScheduler()
+        test_scheduler.add_pipeline("orders", lambda: None, dependencies=["users"])
+        with self.assertRaises(ValueError):
+            test_scheduler.run()
+
+        # Testing if a circular dependency raises a ValueError
+        test_scheduler = PipelineScheduler()
+        test_scheduler.add_pipeline("users", lambda: None, dependencies=["orders"])
+        test_scheduler.add_pipeline("orders", lambda: None, dependencies=["users"])
+        with self.assertRaises(ValueError):
+            test_scheduler.run()
+
+        # Testing if an invalid max_workers raises a ValueError
+        with self.assertRaises(ValueError):
+            PipelineScheduler(max_workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=[''], verbosity=2, exit=False)
@@ -0,0 +1,107 @@
+import unittest
+import tempfile
+import shutil
+import os
+import pandas as pd
+from unittest import mock
+from sqlalchemy import VARCHAR, BIGINT, UUID, TEXT
+from database_scripts.schema_registry import SchemaRegistry
+from database_scripts.database_utils import DatabaseConnector
+from database_scripts.file_handler import get_absolute_file_path
+
+
+class TestSchemaRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.mkdtemp()
+        self.schema_file_path = os.path.join(self.temporary_directory, "database_schema.yaml")
+        self.compiled_file_path = os.path.join(self.temporary_directory, "cache", "database_schema.pickle")
+        with open(self.schema_file_path, "w") as schema_file:
+            schema_file.write(
+                "schemas:\n"
+                "  tables:\n"
+                "    dim_users:\n"
+                "      user_uuid: UUID\n"
+                "      user_key: BIGINT\n"
+                "      first_name: VARCHAR(255)\n"
+            )
+        self.type_mapping = DatabaseConnector().type_mapping
+
+    def tearDown(self):
+        shutil.rmtree(self.temporary_directory)
+
+    def test_compile_schema(self):
+        schema_registry = SchemaRegistry.from_yaml(self.schema_file_path, self.type_mapping)
+
+        dim_users = schema_registry.get_table("dim_users")
+        self.assertEqual([column.name for column in dim_users.columns], ["user_uuid", "user_key", "first_name"])
+
+        dtypes = schema_registry.get_dtypes("dim_users")
+        self.assertIsInstance(dtypes["user_uuid"], UUID)
+        self.assertIsInstance(dtypes["user_key"], BIGINT)
+        self.assertIsInstance(dtypes["first_name"], VARCHAR)
+        self.assertEqual(dtypes["first_name"].length, 255)
+        # Testing if the same dtype map is returned on every call
+        self.assertIs(schema_registry.get_dtypes("dim_users"), dtypes)
+
+    def test_compile_indexes(self):
+        with open(self.schema_file_path, "a") as schema_file:
+            schema_file.write("  indexes:\n    dim_users:\n    - user_uuid\n")
+        SchemaRegistry.from_yaml(self.schema_file_path, self.type_mapping, self.compiled_file_path)
+
+        # Testing if the indexes are kept in the compiled file
+        schema_registry = SchemaRegistry.from_yaml(self.schema_file_path, self.type_mapping, self.compiled_file_path)
+        indexes = schema_registry.get_indexes("dim_users")
+        self.assertEqual([index.name for index in indexes], ["ix_dim_users_user_uuid"])
+        self.assertEqual([column.name for column in indexes[0].columns], ["user_uuid"])
+
+    def test_compile_project_schema(self):
+        # Testing if every table of the project's database schema compiles
+        schema_registry = SchemaRegistry.from_yaml(
+            get_absolute_file_path("database_schema.yaml", "config"), self.type_mapping
+        )
+        self.assertIn("orders_table", schema_registry.metadata.tables)
+
+    def test_compiled_file(self):
+        SchemaRegistry.from_yaml(self.schema_file_path, self.type_mapping, self.compiled_file_path)
+        self.assertTrue(os.path.exists(self.compiled_file_path))
+
+        # Testing if the compiled file is loaded without parsing the yaml file again
+        with mock.patch("database_scripts.schema_registry.yaml.safe_load") as mock_safe_load:
+            schema_registry = SchemaRegistry.from_yaml(self.schema_file_path, self.type_mapping, self.compiled_file_path)
+            mock_safe_load.assert_not_called()
+        self.assertEqual(schema_registry.get_dtypes("dim_users")["first_name"].length, 255)
+
+        # Testing if a changed yaml file is compiled again
+        with open(self.schema_file_path, "a") as schema_file:
+            schema_file.write("      last_name: VARCHAR(100)\n")
+        schema_registry = SchemaRegistry.from_yaml(self.schema_file_path, self.type_mapping, self.compiled_file_path)
+        self.assertEqual(schema_registry.get_dtypes("dim_users")["last_name"].length, 100)
+
+        # Testing if a changed type mapping is compiled again
+        schema_registry = SchemaRegistry.from_yaml(
+            self.schema_file_path, {**self.type_mapping, "VARCHAR": TEXT}, self.compiled_file_path
+        )
+        self.assertIsInstance(schema_registry.get_dtypes("dim_users")["last_name"], TEXT)
+
+        # Testing if a corrupt compiled file is replaced
+        with open(self.compiled_file_path, "wb") as compiled_file:
+            compiled_file.write(b"not a pickle")
+        schema_registry = SchemaRegistry.from_yaml(self.schema_file_path, self.type_mapping, self.compiled_file_path)
+        self.assertIn("last_name", schema_registry.get_dtypes("dim_users"))
+
+    def test_connector_reuses_registry(self):
+        test_connector = DatabaseConnector()
+        schema_config = test_connector.load_schema(self.schema_file_path)
+
+        # Testing if the connector compiles each schema_config once
+        self.assertIs(test_connector.get_schema_registry(schema_config), test_connector.get_schema_registry(schema_config))
+        with mock.patch("database_scripts.database_utils.pd.DataFrame.to_sql") as mock_to_sql, \
+                mock.patch("database_scripts.schema_registry.SchemaRegistry._compile") as mock_compile:
+            test_connector.upload_to_db(pd.DataFrame({"user_key": [1]}), mock.MagicMock(), "dim_users", "append", schema_config=schema_config)
+            mock_compile.assert_not_called()
+            self.assertIs(mock_to_sql.call_args.kwargs["dtype"], test_connector.get_schema_registry(schema_config).get_dtypes("dim_users"))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=[''], verbosity=2, exit=False)
@@ -0,0 +1,119 @@
+import unittest
+import tempfile
+import shutil
+import os
+from sqlalchemy import create_engine, text
+from database_scripts.sql_script_runner import SqlScriptRunner
+
+
+class TestSqlScriptRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.mkdtemp()
+        self.test_engine = create_engine(
+            f"sqlite:///{os.path.join(self.temporary_directory, 'test.db')}"
+        )
+        self.sql_file_path = os.path.join(self.temporary_directory, "test_script.sql")
+        self.test_runner = SqlScriptRunner(max_workers=4)
+
+    def tearDown(self):
+        self.test_engine.dispose()
+        shutil.rmtree(self.temporary_directory)
+
+    def write_script(self, sql_script):
+        with open(self.sql_file_path, "w") as sql_file:
+            sql_file.write(sql_script)
+
+    def test_split_statements(self):
+        statements = SqlScriptRunner.split_statements(
+            "-- Initial Draft; with a semicolon\n"
+            "UPDATE dim_product SET weight_class = 'Mid;Sized' -- Optional; comment\n"
+            "WHERE weight = 2;\n"
+            "/* block; comment */\n"
+            "CREATE FUNCTION f() RETURNS int AS $body$ SELECT 1; $body$ LANGUAGE sql;\n"
+            "SELECT 'It''s; quoted', \"odd;name\" FROM dim_users\n"
+            "-- Trailing comment\n"
+        )
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(
+            statements[0]["sql"],
+            "UPDATE dim_product SET weight_class = 'Mid;Sized' -- Optional; comment\nWHERE weight = 2",
+        )
+        self.assertIn("$body$ SELECT 1; $body$", statements[1]["sql"])
+        # Testing if the last statement is found without a semicolon
+        self.assertTrue(statements[2]["sql"].startswith("SELECT 'It''s; quoted'"))
+        self.assertEqual([statement["name"] for statement in statements], ["statement_1", "statement_2", "statement_3"])
+
+    def test_directives(self):
+        statements = SqlScriptRunner.split_statements(
+            "-- @name create_table\n"
+            "CREATE TABLE t (x int);\n"
+            "-- @name card_keys\n-- @parallel\nUPDATE t SET x = 1;\n"
+            "-- @name date_keys\n-- @parallel\nUPDATE t SET x = 2;\n"
+            "-- @name country_codes\nUPDATE t SET x = 3;\n"
+            "-- @name currency_conversion_keys\n-- @depends\nUPDATE t SET x = 4;\n"
+            "-- @name views\n-- @depends card_keys, create_table\nSELECT x FROM t;\n"
+        )
+        dependencies = {statement["name"]: statement["dependencies"] for statement in statements}
+        self.assertEqual(dependencies, {
+            "create_table": [],
+            # Testing if the @parallel statements both wait for the statement above them
+            "card_keys": ["create_table"],
+            "date_keys": ["create_table"],
+            # Testing if the next statement waits for every @parallel statement
+            "country_codes": ["card_keys", "date_keys"],
+            "currency_conversion_keys": [],
+            "views": ["card_keys", "create_table"],
+        })
+
+        with self.assertRaises(ValueError):
+            SqlScriptRunner.split_statements("-- @name twice\nSELECT 1;\n-- @name twice\nSELECT 2;")
+
+    def test_run(self):
+        self.write_script(
+            "CREATE TABLE orders_table (order_key int, card_key int);\n"
+            "INSERT INTO orders_table VALUES (1, NULL), (2, NULL), (3, NULL);\n"
+            "-- @name card_keys\n"
+            "UPDATE orders_table SET card_key = order_key * 10 WHERE order_key < 3;\n"
+        )
+        statement_results = self.test_runner.run(self.sql_file_path, self.test_engine)
+
+        self.assertEqual([result["name"] for result in statement_results], ["statement_1", "statement_2", "card_keys"])
+        self.assertTrue(all(result["status"] == "succeeded" for result in statement_results))
+        # Testing if the rowcount and duration of each statement are recorded
+        self.assertEqual(statement_results[2]["rowcount"], 2)
+        self.assertTrue(all(result["duration"] >= 0 for result in statement_results))
+
+        with self.test_engine.connect() as connection:
+            card_keys = connection.execute(text("SELECT card_key FROM orders_table ORDER BY order_key")).scalars().all()
+        self.assertEqual(card_keys, [10, 20, None])
+
+    def test_run_with_failure(self):
+        self.write_script(
+            "-- @name create_table\n"
+            "CREATE TABLE dim_currency (currency_key int);\n"
+            "-- @name missing_table\n"
+            "UPDATE missing_table SET currency_key = 1;\n"
+            "-- @name after_missing_table\n"
+            "INSERT INTO dim_currency VALUES (1);\n"
+            "-- @name independent_insert\n"
+            "-- @depends create_table\n"
+            "INSERT INTO dim_currency VALUES (2);\n"
+        )
+        statement_results = {
+            result["name"]: result for result in self.test_runner.run(self.sql_file_path, self.test_engine)
+        }
+
+        # Testing if a failure only skips the statements which depend on it
+        self.assertEqual(statement_results["missing_table"]["status"], "failed")
+        self.assertEqual(statement_results["after_missing_table"]["status"], "skipped")
+        self.assertEqual(statement_results["independent_insert"]["status"], "succeeded")
+        self.assertIsNone(statement_results["after_missing_table"]["duration"])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            SqlScriptRunner(max_workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=[''], verbosity=2, exit=False)
@@ -2,9 +2,16 @@ import unittest
 import HtmlTestRunner
 from testing.test_data_cleaning import get_absolute_file_path
 from testing.test_data_cleaning import TestDataCleaning
+from testing.test_data_cleaning import TestDataFrameCleaning
 from testing.test_data_extraction import TestDatabaseExtraction
 from testing.test_database_utils import TestDatabaseConnector
 from testing.test_currency_rate_extraction import TestCurrencyRateExtraction
+from testing.test_pipeline_scheduler import TestPipelineScheduler
+from testing.test_extraction_cache import TestExtractionCache
+from testing.test_conditional_fetcher import TestConditionalFetcher
+from testing.test_async_data_extraction import TestAsyncDataExtractor
+from testing.test_schema_registry import TestSchemaRegistry
+from testing.test_sql_script_runner import TestSqlScriptRunner
 from datetime import datetime 
 import os
 # Create a Test Suite
@@ -13,8 +20,15 @@ test_suite = unittest.TestSuite()
 # Add individual test cases to the Test Suite
 test_suite.addTest(unittest.makeSuite(TestDatabaseConnector))
 test_suite.addTest(unittest.makeSuite(TestDataCleaning))
+test_suite.addTest(unittest.makeSuite(TestDataFrameCleaning))
 test_suite.addTest(unittest.makeSuite(TestDatabaseExtraction))
 test_suite.addTest(unittest.makeSuite(TestCurrencyRateExtraction))
+test_suite.addTest(unittest.makeSuite(TestPipelineScheduler))
+test_suite.addTest(unittest.makeSuite(TestExtractionCache))
+test_suite.addTest(unittest.makeSuite(TestConditionalFetcher))
+test_suite.addTest(unittest.makeSuite(TestAsyncDataExtractor))
+test_suite.addTest(unittest.makeSuite(TestSchemaRegistry))
+test_suite.addTest(unittest.makeSuite(TestSqlScriptRunner))
 
 # Get the current date in the format "YYYY-MM-DD"
 current_date = datetime.now().strftime("%Y-%m-%d")